@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from app.models.bean import CoffeeBean
 from app.schemas.bean_schema import BeanCreate, BeanUpdate
+from app.utils.pagination import keyset_page
 
 class BeanController:
     @staticmethod
@@ -22,11 +23,16 @@ class BeanController:
         return new_bean
     
     @staticmethod ## 리스트 반환이라 페이지네이션이 필요할 것으로 생각됨
-    def get_list(db: Session, page: int = 1, page_size: int = 20):
+    def get_list(db: Session, page: int = 1, page_size: int = 20,
+                 cursor: Optional[str] = None, include_total: bool = True):
         offset = (page - 1) * page_size
-        total = db.query(CoffeeBean).count()
-        items = db.query(CoffeeBean).offset(offset).limit(page_size).all()
-        return {"items": items, "total": total, "page": page, "page_size": page_size}
+        total = db.query(CoffeeBean).count() if include_total else None
+        # 등록 순서(bean_id 오름차순) 기준 키셋
+        items, next_cursor = keyset_page(
+            db.query(CoffeeBean), [CoffeeBean.bean_id], page_size,
+            cursor=cursor, offset=offset, descending=False,
+        )
+        return {"items": items, "total": total, "page": page, "page_size": page_size, "next_cursor": next_cursor}
     
     @staticmethod
     def get_detail(db: Session, bean_id: int) -> Optional[CoffeeBean]:
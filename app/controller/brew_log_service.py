@@ -0,0 +1,180 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.models.machine import Machine
+from app.schemas.machine_schema import MachineBrewLog
+from app.controller.machine_service import MachineController
+from app.controller.ws_service import ws_manager
+
+
+@dataclass
+class BrewDoneJob:
+    machine_id: str
+    recipe_id: int
+    result: Dict[str, Any]
+    session_factory: async_sessionmaker
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class BrewLogWriteQueue:
+    """
+    BREW_DONE 메시지를 받아 브루잉 로그를 백그라운드에서 묶음 저장하는 큐
+    - 머신 수신 루프는 enqueue만 하고 바로 다음 프레임(LOADCELL_VALUE 등)을 처리
+    - 워커가 batch_size 또는 flush_interval 단위로 모아서 짧은 세션 하나로 insert
+    - 저장이 끝나면 앱들에게 BREW_LOG_CREATED 전송
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval_s: float):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._metrics = {
+            "enqueued": 0,
+            "rejected": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def submit(self, job: BrewDoneJob) -> bool:
+        """큐가 가득 차면 False (수신 루프를 막지 않기 위해 대기하지 않음)"""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._metrics["rejected"] += 1
+            return False
+        self._metrics["enqueued"] += 1
+        return True
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self.flush(batch)
+            except Exception as e:
+                print(f"[BrewLogQueue] flush failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def flush(self, batch: List[BrewDoneJob]):
+        started = time.perf_counter()
+        # 테스트 등에서 세션 팩토리가 다를 수 있으므로 팩토리별로 묶어서 저장
+        groups: Dict[int, List[BrewDoneJob]] = {}
+        for job in batch:
+            groups.setdefault(id(job.session_factory), []).append(job)
+
+        for jobs in groups.values():
+            try:
+                created = await self._write(jobs)
+            except Exception as e:
+                print(f"[BrewLogQueue] Failed to save {len(jobs)} brew logs: {e}")
+                self._metrics["failed"] += len(jobs)
+                for job in jobs:
+                    await ws_manager.broadcast_to_apps(
+                        job.machine_id,
+                        {"type": "ERROR", "message": f"Failed to save brew log: {str(e)}"}
+                    )
+                continue
+
+            for job, log in created:
+                await ws_manager.broadcast_to_apps(
+                    job.machine_id,
+                    {
+                        "type": "BREW_LOG_CREATED",
+                        "machine_id": job.machine_id,
+                        "log": {"status": "logged", "log_id": str(log.log_id)},
+                    },
+                )
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        waited_ms = (started - min(job.enqueued_at for job in batch)) * 1000
+        self._metrics["batches"] += 1
+        self._metrics["last_flush_ms"] = round(elapsed_ms, 3)
+        self._metrics["max_flush_ms"] = round(max(self._metrics["max_flush_ms"], elapsed_ms), 3)
+        self._metrics["total_flush_ms"] += elapsed_ms
+        self._metrics["max_wait_ms"] = round(max(self._metrics["max_wait_ms"], waited_ms), 3)
+
+    async def _write(self, jobs: List[BrewDoneJob]):
+        async with jobs[0].session_factory() as db:
+            # 배치 안의 머신 소유자를 한 번에 조회
+            machine_ids = {job.machine_id for job in jobs}
+            rows = await db.execute(
+                select(Machine.machine_id, Machine.user_id).where(Machine.machine_id.in_(machine_ids))
+            )
+            owners = dict(rows.all())
+
+            created = []
+            for job in jobs:
+                user_id = owners.get(job.machine_id)
+                if not user_id:
+                    print(f"[BrewLogQueue] BREW_DONE but machine row not found: {job.machine_id}")
+                    continue
+                payload = MachineBrewLog(recipe_id=job.recipe_id, machine_id=job.machine_id, result=job.result)
+                created.append((job, MachineController.build_brew_log(user_id, payload)))
+
+            db.add_all([log for _, log in created])
+            await db.commit()
+            self._metrics["written"] += len(created)
+            return created
+
+    def metrics(self) -> Dict[str, Any]:
+        batches = self._metrics["batches"]
+        return {
+            **self._metrics,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_maxsize": self.maxsize,
+            "avg_flush_ms": round(self._metrics["total_flush_ms"] / batches, 3) if batches else 0.0,
+            "total_flush_ms": round(self._metrics["total_flush_ms"], 3),
+        }
+
+    async def drain(self):
+        """큐에 남은 작업이 모두 저장될 때까지 대기"""
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            await self._queue.join()
+
+    async def stop(self):
+        await self.drain()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+
+
+brew_log_queue = BrewLogWriteQueue(
+    maxsize=settings.BREW_LOG_QUEUE_SIZE,
+    batch_size=settings.BREW_LOG_BATCH_SIZE,
+    flush_interval_s=settings.BREW_LOG_FLUSH_INTERVAL_S,
+)
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.controller.recipe_service import RecipeController
+from app.schemas.recipe_schema import RecipeCreate
+
+try:
+    from app.utils.openai_helper import (
+        scrape_website_async,
+        extract_recipe_from_html_async,
+    )
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+    print("Warning: OpenAI helper not available. Bulk crawling will not work.")
+
+
+class BulkCrawler:
+    """
+    여러 URL을 동시에 크롤링하는 실행기 (프로세스 전체에서 공유)
+    - concurrency: 전체 동시 크롤링 수 (페이지 요청 + LLM 추출)
+    - per_host / host_delay_s: 같은 호스트에는 동시에 per_host개까지, 요청 시작 간격 host_delay_s 이상
+    - 결과는 끝나는 순서대로 yield (입력 순서는 index로 전달)
+    """
+
+    def __init__(self, concurrency: int, per_host: int, host_delay_s: float):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay_s = host_delay_s
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, list] = {}  # host -> [semaphore, 마지막 요청 시각, 사용 중인 작업 수]
+
+    def _ensure_loop_state(self):
+        # 세마포어는 이벤트 루프에 묶이므로 루프가 바뀌면(테스트, 재시작) 새로 만듦
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.concurrency)
+            self._hosts = {}
+
+    @asynccontextmanager
+    async def host_slot(self, host: str):
+        entry = self._hosts.setdefault(host, [asyncio.Semaphore(self.per_host), 0.0, 0])
+        entry[2] += 1
+        try:
+            async with entry[0]:
+                wait = entry[1] + self.host_delay_s - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                entry[1] = time.monotonic()
+                yield
+        finally:
+            entry[2] -= 1
+            self._prune_hosts()
+
+    def _prune_hosts(self):
+        cutoff = time.monotonic() - self.host_delay_s
+        for host, entry in list(self._hosts.items()):
+            if entry[2] == 0 and entry[1] < cutoff:
+                del self._hosts[host]
+
+    async def crawl_one(self, index: int, url: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"type": "result", "index": index, "url": url}
+        host = urlparse(url).hostname
+        if urlparse(url).scheme not in ("http", "https") or not host:
+            return {**result, "status": "failed", "error": "invalid_url"}
+
+        async def crawl():
+            async with self.host_slot(host):
+                async with self._global:
+                    html_content = await scrape_website_async(url)
+            if html_content.startswith("Error"):
+                return {"status": "failed", "error": "fetch_failed"}
+
+            async with self._global:
+                recipe_data = await extract_recipe_from_html_async(html_content)
+            if not recipe_data:
+                return {"status": "failed", "error": "parse_failed"}
+
+            recipe_data, errors = RecipeController.check_extracted_recipe(recipe_data)
+            formatted = RecipeController.format_crawled_recipe(recipe_data, url)
+            try:
+                RecipeCreate.model_validate(formatted)
+            except ValidationError as e:
+                return {"status": "invalid", "error": "schema_mismatch", "warnings": [err["msg"] for err in e.errors()]}
+            return {"status": "ok", "recipe": formatted, "warnings": errors}
+
+        try:
+            return {**result, **await asyncio.wait_for(crawl(), timeout=settings.CRAWL_TOTAL_TIMEOUT_S)}
+        except asyncio.TimeoutError:
+            return {**result, "status": "failed", "error": "crawl_timeout"}
+        except Exception as e:
+            print(f"[BulkCrawler] failed to crawl {url}: {e}")
+            return {**result, "status": "failed", "error": str(e)}
+
+    async def run(self, urls: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        if not OPENAI_AVAILABLE:
+            raise Exception("OpenAI helper not available. Check OPENAI_API_KEY configuration.")
+        self._ensure_loop_state()
+        tasks = [asyncio.create_task(self.crawl_one(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 클라이언트 연결이 끊기면 남은 크롤링 취소
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class CrawlController:
+    @staticmethod
+    async def bulk_crawl(urls: List[str], save: bool, user_id: str,
+                         session_factory: async_sessionmaker) -> AsyncIterator[Dict[str, Any]]:
+        """결과를 준비되는 대로 yield, 마지막에 요약(save=True면 저장된 recipe_id 포함)"""
+        counts = {"ok": 0, "failed": 0, "invalid": 0}
+        crawled: List[Dict[str, Any]] = []
+        async for result in bulk_crawler.run(urls):
+            counts[result["status"]] += 1
+            if result["status"] == "ok":
+                crawled.append(result["recipe"])
+            yield result
+
+        summary: Dict[str, Any] = {"type": "summary", "total": len(urls), **counts}
+        if save:
+            try:
+                summary["saved_recipe_ids"] = await RecipeController.save_recipes_async(
+                    session_factory, user_id, [RecipeCreate.model_validate(recipe) for recipe in crawled]
+                )
+            except Exception as e:
+                print(f"[BulkCrawler] failed to save crawled recipes: {e}")
+                summary["save_error"] = str(e)
+        yield summary
+
+
+bulk_crawler = BulkCrawler(
+    concurrency=settings.CRAWL_BULK_CONCURRENCY,
+    per_host=settings.CRAWL_PER_HOST_CONCURRENCY,
+    host_delay_s=settings.CRAWL_PER_HOST_DELAY_S,
+)
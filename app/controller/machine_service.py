@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
 from app.schemas.machine_schema import (
     BrewRequest, MachineRegisterSchema, MachineBrewLog, MachineNicknameUpdate
@@ -8,19 +10,22 @@ from app.models.recipe import Recipe
 from app.models.brew_log import BrewLog
 from app.models.user import User
 from app.controller.ws_service import ws_manager # WebSocket 매니저 임포트
+from app.controller.machine_state_service import machine_states
+from app.services.machine_payload import compile_recipe, machine_payloads
 import json
+import uuid
 
 class MachineController:
 
     @staticmethod
-    async def regist_machine(db: Session, email: str, machine_id: str, payload: MachineRegisterSchema):
-        user = db.query(User).filter(User.email == email).first()
+    async def regist_machine(db: AsyncSession, email: str, machine_id: str, payload: MachineRegisterSchema):
+        user = (await db.execute(select(User).where(User.email == email))).scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="user_not_found"
             )
-        existing = db.query(Machine).filter(Machine.machine_id == machine_id).first()
+        existing = await db.get(Machine, machine_id)
         if existing:
             # user.user_id 사용
             if existing.email != email:
@@ -29,105 +34,97 @@ class MachineController:
                     detail="machine_already_registered_to_another_user"
                 )
             existing.email = email
-            db.commit()
+            await db.commit()
             return {"status" : "updated", "machine_id": machine_id }
     
         new_machine = Machine(
             machine_id=machine_id,
             email=email, # user.user_id 사용
-            user_id = db.query(User).filter(User.email == email).first().user_id,
+            user_id = user.user_id,
             #nickname=payload.nickname
             # ip 
             # firmware_version
             # 생략
         )
         db.add(new_machine)
-        db.commit()
+        await db.commit()
         return {"status": "registered", "machine_id": machine_id}
 
     @staticmethod
-    async def send_brewing_recipe(db: Session, user: User, machine_id: str, payload: BrewRequest):
+    async def send_brewing_recipe(db: AsyncSession, user: User, machine_id: str, payload: BrewRequest):
         print(f"[MachineController] send_brewing_recipe called for machine {machine_id} and recipe {payload.recipe_id}")
-        if machine_id not in ws_manager.active_connections or ws_manager.active_connections[machine_id]["machine"] is None:
+        if not await ws_manager.is_machine_connected(machine_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="machine_not_connected"
             )
-        print(f"[MachineController] Fetching recipe {payload.recipe_id} from DB")
         recipe_id = int(payload.recipe_id)  # Convert explicitly
-        recipe = db.query(Recipe).filter(Recipe.recipe_id == recipe_id).first()
-        if not recipe:
+        # 버전(updated_at)만 조회해서 컴파일된 페이로드가 있으면 재사용
+        updated_at = (await db.execute(
+            select(Recipe.updated_at).where(Recipe.recipe_id == recipe_id)
+        )).scalar_one_or_none()
+        if updated_at is None:
             raise HTTPException(
                 status_code=404, detail="recipe_not_found"
             )
-        print(f"[MachineController] Preparing to send recipe {recipe.recipe_id} to machine {machine_id}")
-        # ESP32 파싱 구조에 맞게 수정
-        total_time = 0
-        steps_data = []
-        if recipe.pouring_steps:
-            for step in recipe.pouring_steps:
-                pouring_time = int(step.pour_time_s)
-                waiting_time = int(step.wait_time_s) if step.wait_time_s else 0
-                steps_data.append({
-                    "step": step.step_number,
-                    "water_g" : float(step.water_g),
-                    "technique": step.technique.value if step.technique else "center",
-                    "pour_time_s": pouring_time,
-                    "wait_time_s": waiting_time
-                })
-                total_time += pouring_time + waiting_time
-
-        grind_val = 250 # 기본값
-        if recipe.grind_level:
-            grind_val = int(recipe.grind_level)
-        print(f"[MachineController] Sending recipe {recipe.recipe_id} to machine {machine_id}")
-        command_payload = {
-            "type": "RECIPE_DATA", 
-            "recipe": {
-                "rinsing": recipe.rinsing,
-                "water_temperature_c": float(recipe.water_temperature_c),
-                "dose_g": float(recipe.dose_g),
-                "total_brew_time_s": int(recipe.total_brew_time_s) if recipe.total_brew_time_s else total_time,
-                "grind_level": grind_val,
-                "grind_microns": recipe.grind_microns if recipe.grind_microns else 600,
-                "pouring_steps": steps_data
-            }
-        }
+        compiled = machine_payloads.get(recipe_id, updated_at)
+        if compiled is None:
+            print(f"[MachineController] Compiling recipe {recipe_id} for machines")
+            recipe = (await db.execute(
+                select(Recipe).options(selectinload(Recipe.pouring_steps)).where(Recipe.recipe_id == recipe_id)
+            )).scalars().first()
+            if not recipe:
+                raise HTTPException(
+                    status_code=404, detail="recipe_not_found"
+                )
+            compiled = compile_recipe(recipe)
+            machine_payloads.put(compiled)
+        print(f"[MachineController] Sending recipe {recipe_id} to machine {machine_id}")
 
-        success = await ws_manager.send_command_to_machine(machine_id, command_payload)
+        # 머신이 붙어있는 워커에서 마지막 레시피로 기록됨
+        success = await ws_manager.send_command_to_machine(
+            machine_id, compiled.message, recipe_id=recipe_id, frames=compiled.frames
+        )
         if not success:
             raise HTTPException(status_code=500, detail="Failed to send command to machine")
-
-        ws_manager.set_last_recipe(machine_id, recipe.recipe_id)
         
         return {
             "status": "ready", 
             "machine_id": machine_id,
             "message": "Recipe loaded. Connect to WebSocket to start brewing.",
-            "loaded_recipe_id": recipe.recipe_id
+            "loaded_recipe_id": recipe_id
         }
     
     @staticmethod
-    async def create_brew_log(db: Session, user: User, payload: MachineBrewLog):
-        new_log = BrewLog(
-            user_id=user.user_id,
+    async def create_brew_log(db: AsyncSession, user: User, payload: MachineBrewLog):
+        new_log = MachineController.build_brew_log(user.user_id, payload)
+        db.add(new_log)
+        await db.commit()
+        return {"status": "logged", "log_id": str(new_log.log_id)}
+
+    @staticmethod
+    def build_brew_log(user_id: str, payload: MachineBrewLog) -> BrewLog:
+        # result 필드 파싱 (JSON -> DB 컬럼)
+        result = payload.result or {}
+        return BrewLog(
+            user_id=user_id,
             recipe_id=payload.recipe_id,
+            bean_id=payload.bean_id,
             machine_id=payload.machine_id,
-            # result 필드 파싱 필요 (JSON -> DB 컬럼)
-            tds= None, # 머신에 탑재 못했음.
-            avg_temp=payload.result.temperature_c,
-            extraction_yield=None # 계산 필요 시 추가
+            brew_id=result.get("brew_id") or f"{payload.machine_id}-{uuid.uuid4().hex[:12]}",
+            tds=result.get("tds"), # 머신에 탑재 못했음.
+            temperature_c=result.get("temperature_c"),
+            notes=result.get("notes"),
         )
-        db.add(new_log)
-        db.commit()
-        return {"status": "logged", "log_id": str(new_log.id)}
 
     @staticmethod
-    async def update_nickname(db: Session, user: User, machine_id: str, payload: MachineNicknameUpdate):
-        machine = db.query(Machine).filter(
-            Machine.machine_id == machine_id,
-            Machine.user_id == user.user_id
-        ).first()
+    async def update_nickname(db: AsyncSession, user: User, machine_id: str, payload: MachineNicknameUpdate):
+        machine = (await db.execute(
+            select(Machine).where(
+                Machine.machine_id == machine_id,
+                Machine.user_id == user.user_id
+            )
+        )).scalars().first()
         if not machine:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
@@ -135,34 +132,82 @@ class MachineController:
             )
         
         machine.nickname = payload.nickname
-        db.commit()
+        await db.commit()
         return {"status": "nickname_updated", "machine_id": machine_id, "new_nickname": payload.nickname}
     
     @staticmethod
-    async def get_machine_list(db: Session, user: User):
-        machines = db.query(Machine).filter(Machine.user_id == user.user_id).all()
+    async def get_machine_list(db: AsyncSession, user: User):
+        machines = (await db.execute(
+            select(Machine).where(Machine.user_id == user.user_id)
+        )).scalars().all()
+        # 메모리 상태가 없는(다른 워커에 붙어있거나 오프라인) 머신의 접속 여부는 한 번에 조회
+        presence = await ws_manager.machines_connected(
+            [machine.machine_id for machine in machines if machine_states.get(machine.machine_id) is None]
+        )
         machine_list = []
         for machine in machines:
+            live = MachineController.live_status(machine, presence.get(machine.machine_id, False))
             machine_list.append({
                 "machine_id": machine.machine_id,
                 "nickname": machine.nickname,
                 "ip_address": machine.ip_address,
-                "current_phase": machine.current_phase,
-                "last_brew_id": machine.last_brew_id,
+                "current_phase": live["current_phase"],
+                "last_brew_id": live["last_brew_id"],
                 "is_active": machine.is_active,
                 "firmware_version": machine.firmware_version,
                 "registered_at": machine.registered_at,
-                "last_seen_at": machine.last_seen_at
+                "last_seen_at": live["last_seen_at"],
+                "online": live["online"]
             })
         return {"machines": machine_list}
 
+    @staticmethod
+    async def get_machine_status(db: AsyncSession, user: User, machine_id: str):
+        machine = (await db.execute(
+            select(Machine).where(
+                Machine.machine_id == machine_id,
+                Machine.user_id == user.user_id
+            )
+        )).scalars().first()
+        if not machine:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="machine_not_found"
+            )
+        online = False
+        if machine_states.get(machine_id) is None:
+            online = await ws_manager.is_machine_connected(machine_id)
+        return {"machine_id": machine_id, **MachineController.live_status(machine, online)}
+
+    @staticmethod
+    def live_status(machine: Machine, online: bool) -> dict:
+        # 이 워커에 붙어있는(또는 아직 DB에 반영 전인) 머신은 메모리 상태가 최신
+        # online: 메모리 상태가 없을 때 쓰는 presence 조회 결과
+        state = machine_states.get(machine.machine_id)
+        if state is None:
+            return {
+                "online": online,
+                "current_phase": machine.current_phase,
+                "step_no": None,
+                "weight_g": None,
+                "last_brew_id": machine.last_brew_id,
+                "last_seen_at": machine.last_seen_at
+            }
+        return {
+            "online": state.online,
+            "current_phase": state.phase or machine.current_phase,
+            "step_no": state.step_no,
+            "weight_g": state.weight_g,
+            "last_brew_id": state.last_brew_id or machine.last_brew_id,
+            "last_seen_at": state.last_seen_at
+        }
+
 ##################################################################################################
 ##################################################################################################
     # deprecated : 브루잉 시작 요청 
     @staticmethod
     async def send_brewing_request(user: User, machine_id: str):
-        if (machine_id not in ws_manager.active_connections 
-            or ws_manager.active_connections[machine_id]["machine"] is None):
+        if not await ws_manager.is_machine_connected(machine_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="machine_not_connected"
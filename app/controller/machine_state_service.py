@@ -0,0 +1,172 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.machine import BrewPhaseEnum, Machine
+
+PHASES = {phase.value for phase in BrewPhaseEnum}
+
+
+@dataclass
+class MachineState:
+    machine_id: str
+    online: bool = True
+    phase: Optional[str] = None
+    step_no: Optional[int] = None
+    weight_g: Optional[float] = None
+    last_brew_id: Optional[str] = None
+    last_seen_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class MachineStateRegistry:
+    """
+    머신별 실시간 상태 (WebSocket 프레임으로 메모리만 갱신, DB에는 주기적으로 묶어서 반영)
+    - connect/disconnect, BREW_STATUS, LOADCELL_VALUE, BREW_DONE 마다 상태 갱신 (DB 쓰기 없음)
+    - flush_interval_s마다 바뀐 머신들만 UPDATE 한 번(executemany)으로 machines 테이블에 기록
+    - 기록이 끝난 오프라인 머신은 메모리에서 제거 (이후에는 DB 값 사용)
+    """
+
+    def __init__(self, flush_interval_s: float, session_factory: async_sessionmaker):
+        self.flush_interval_s = flush_interval_s
+        self.session_factory = session_factory
+        self._states: Dict[str, MachineState] = {}
+        self._dirty: Set[str] = set()
+        self._worker: asyncio.Task | None = None
+        self._metrics = {"flushes": 0, "written": 0, "failed": 0}
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[MachineState] flush failed: {e}")
+
+    def get(self, machine_id: str) -> Optional[MachineState]:
+        return self._states.get(machine_id)
+
+    def connected(self, machine_id: str):
+        state = self._states.get(machine_id)
+        if state is None:
+            self._states[machine_id] = MachineState(machine_id)
+        else:
+            state.online = True
+            state.last_seen_at = datetime.utcnow()
+        self._dirty.add(machine_id)
+        self._ensure_worker()
+
+    def disconnected(self, machine_id: str):
+        state = self._states.get(machine_id)
+        if state is None:
+            return
+        state.online = False
+        state.last_seen_at = datetime.utcnow()
+        self._dirty.add(machine_id)
+
+    def observe(self, machine_id: str, data: dict):
+        """머신에서 온 프레임 하나 반영"""
+        state = self._states.get(machine_id)
+        if state is None:
+            return
+        state.last_seen_at = datetime.utcnow()
+        msg_type = data.get("type")
+        if msg_type == "BREW_STATUS":
+            if data.get("phase"):
+                state.phase = data["phase"]
+            if "step_no" in data:
+                state.step_no = data["step_no"]
+            if data.get("brew_id"):
+                state.last_brew_id = data["brew_id"]
+        elif msg_type == "LOADCELL_VALUE":
+            state.weight_g = data.get("value")
+        elif msg_type == "BREW_DONE":
+            state.phase = BrewPhaseEnum.done.value
+            state.step_no = None
+            brew_id = (data.get("result") or {}).get("brew_id") or data.get("brew_id")
+            if brew_id:
+                state.last_brew_id = brew_id
+        self._dirty.add(machine_id)
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        states = [self._states[machine_id] for machine_id in dirty if machine_id in self._states]
+        if states:
+            try:
+                await self._write(states)
+                self._metrics["written"] += len(states)
+            except Exception as e:
+                print(f"[MachineState] Failed to save {len(states)} machine states: {e}")
+                self._metrics["failed"] += len(states)
+                # 다음 주기에 다시 시도
+                self._dirty.update(state.machine_id for state in states)
+        self._metrics["flushes"] += 1
+
+        for machine_id in dirty - self._dirty:
+            state = self._states.get(machine_id)
+            if state is not None and not state.online:
+                del self._states[machine_id]
+
+    async def _write(self, states: List[MachineState]):
+        table = Machine.__table__
+        # 아직 모르는 값(None)은 기존 컬럼 값 유지, 등록되지 않은 머신은 0행 UPDATE
+        stmt = (
+            update(table)
+            .where(table.c.machine_id == bindparam("b_machine_id"))
+            .values(
+                current_phase=func.coalesce(bindparam("b_phase", type_=table.c.current_phase.type), table.c.current_phase),
+                last_brew_id=func.coalesce(bindparam("b_brew_id", type_=table.c.last_brew_id.type), table.c.last_brew_id),
+                last_seen_at=bindparam("b_seen_at"),
+            )
+        )
+        rows = [
+            {
+                "b_machine_id": state.machine_id,
+                # DB enum에 없는 단계(펌웨어 확장 등)는 메모리에만 유지
+                "b_phase": state.phase if state.phase in PHASES else None,
+                "b_brew_id": state.last_brew_id,
+                "b_seen_at": state.last_seen_at,
+            }
+            for state in states
+        ]
+        async with self.session_factory() as db:
+            conn = await db.connection()
+            await conn.execute(stmt, rows)
+            await db.commit()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "machines": len(self._states),
+            "online": sum(1 for state in self._states.values() if state.online),
+            "pending": len(self._dirty),
+        }
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        await self.flush()
+        self._states.clear()
+        self._dirty.clear()
+
+
+machine_states = MachineStateRegistry(
+    flush_interval_s=settings.MACHINE_STATE_FLUSH_INTERVAL_S,
+    session_factory=AsyncSessionLocal,
+)
@@ -1,29 +1,82 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import Optional, List, Dict, Any
+import asyncio
+from pydantic import ValidationError
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import desc, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from app.models.recipe import Recipe, PouringStep
+from app.models.bean import CoffeeBean
 from app.models.user import User
-from app.schemas.recipe_schema import RecipeCreate, RecipeUpdate
+from app.schemas.recipe_schema import RecipeCreate, RecipeRead, RecipeUpdate
+from app.core.config import settings
+from app.utils.pagination import keyset_page
+from app.services.machine_payload import machine_payloads
 
 # OpenAI 헬퍼 함수 import
 try:
     from app.utils.openai_helper import (
         scrape_website,
+        scrape_website_async,
         extract_recipe_from_html,
+        extract_recipe_from_html_async,
         generate_recipe_from_description,
-        extract_recipe_from_description
+        extract_recipe_from_description,
+        extract_recipe_from_description_async,
+        stream_recipe_from_description,
+        validate_recipe_data,
+        fix_recipe_data,
+        close_http_clients,
     )
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
 
+# 응답 모델별 relationship 로딩 전략
+# - RecipeRead: pouring_steps를 직렬화하므로 selectin으로 한 번에 로딩
+# - RecipeListItem: pouring_steps를 쓰지 않으므로 lazy load 자체를 막음 (실수로 N+1이 생기면 바로 에러)
+RECIPE_READ_OPTIONS = (selectinload(Recipe.pouring_steps),)
+RECIPE_LIST_OPTIONS = (raiseload(Recipe.pouring_steps),)
+
+
 class RecipeController:
     @staticmethod
-    def register_recipe(db: Session, payload: RecipeCreate, current_user: User) -> Recipe:
-        # Create Recipe
-        new_recipe = Recipe(            
+    def register_recipe(db: Session, payload: RecipeCreate, current_user: User) -> RecipeRead:
+        new_recipe = RecipeController.build_recipe(payload, current_user.user_id)
+        db.add(new_recipe)
+        db.flush()  # Get recipe_id
+        # pouring_steps는 단계 수와 무관하게 INSERT 한 번
+        RecipeController.insert_steps(db, [new_recipe], [RecipeController.step_rows(payload)])
+        # commit 후 refresh/lazy load 없이 메모리 객체로 응답 생성
+        created = RecipeRead.model_validate(new_recipe)
+        db.commit()
+        return created
+
+    @staticmethod
+    def register_recipes(db: Session, payloads: List[RecipeCreate], current_user: User) -> List[int]:
+        """여러 레시피를 한 트랜잭션으로 등록 (pouring_steps는 전체를 INSERT 한 번으로)"""
+        new_recipes = [RecipeController.build_recipe(payload, current_user.user_id) for payload in payloads]
+        db.add_all(new_recipes)
+        try:
+            db.flush()
+            RecipeController.insert_steps(
+                db, new_recipes, [RecipeController.step_rows(payload) for payload in payloads]
+            )
+            recipe_ids = [recipe.recipe_id for recipe in new_recipes]
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return recipe_ids
+
+    @staticmethod
+    def build_recipe(payload: RecipeCreate, user_id: str) -> Recipe:
+        """payload로 Recipe 객체 생성 (pouring_steps는 step_insert/insert_steps로 따로 일괄 저장)"""
+        return Recipe(
             recipe_name=payload.recipe_name,
-            user_id=current_user.user_id,
+            user_id=user_id,
             bean_id=payload.bean_id,
             is_public=payload.is_public,
             dose_g=payload.dose_g,
@@ -36,51 +89,93 @@ class RecipeController:
             rinsing=payload.rinsing,
             source=payload.source,
             url=payload.url,
-            seed = payload.seed
+            seed=payload.seed,
         )
-        db.add(new_recipe)
-        db.flush() # Get recipe_id
-
-        # Create PouringSteps
-        for step in payload.pouring_steps:
-            new_step = PouringStep(
-                recipe_id=new_recipe.recipe_id,
-                step_number=step.step_number,
-                water_g=step.water_g,
-                pour_time_s=step.pour_time_s,
-                wait_time_s=step.wait_time_s,
-                bloom_time_s=step.bloom_time_s,
-                technique=step.technique
+
+    @staticmethod
+    def step_insert(recipes: List[Recipe], steps: List[List[Dict[str, Any]]]):
+        """
+        여러 레시피의 pouring_steps 전체를 INSERT ... RETURNING 문 하나로 저장하는 statement와 파라미터
+        - RETURNING 행 순서에 의존하지 않고 recipe_id로 다시 묶음 (attach_steps)
+        """
+        rows = [
+            {**step, "recipe_id": recipe.recipe_id}
+            for recipe, recipe_steps in zip(recipes, steps)
+            for step in recipe_steps
+        ]
+        return insert(PouringStep).returning(PouringStep), rows
+
+    @staticmethod
+    def attach_steps(recipes: List[Recipe], inserted: List[PouringStep]):
+        """INSERT로 받은 PouringStep을 각 레시피 컬렉션에 연결 (이후 lazy load 없음)"""
+        by_recipe = defaultdict(list)
+        for step in inserted:
+            by_recipe[step.recipe_id].append(step)
+        for recipe in recipes:
+            steps = sorted(by_recipe[recipe.recipe_id], key=lambda step: step.step_number)
+            set_committed_value(recipe, "pouring_steps", steps)
+
+    @staticmethod
+    def insert_steps(db: Session, recipes: List[Recipe], steps: List[List[Dict[str, Any]]]):
+        statement, rows = RecipeController.step_insert(recipes, steps)
+        RecipeController.attach_steps(recipes, db.scalars(statement, rows).all() if rows else [])
+
+    @staticmethod
+    def step_rows(payload: RecipeCreate) -> List[Dict[str, Any]]:
+        return [step.model_dump() for step in payload.pouring_steps]
+
+    @staticmethod
+    async def save_recipes_async(session_factory: async_sessionmaker, user_id: str,
+                                 payloads: List[RecipeCreate]) -> List[int]:
+        """여러 레시피를 한 트랜잭션으로 저장 (스트리밍 응답 등 요청 세션 밖에서 사용)"""
+        if not payloads:
+            return []
+        async with session_factory() as db:
+            new_recipes = [RecipeController.build_recipe(payload, user_id) for payload in payloads]
+            db.add_all(new_recipes)
+            await db.flush()
+            statement, rows = RecipeController.step_insert(
+                new_recipes, [RecipeController.step_rows(payload) for payload in payloads]
             )
-            db.add(new_step)
-        
-        db.commit()
-        db.refresh(new_recipe)
-        return new_recipe
+            if rows:
+                await db.execute(statement, rows)
+            await db.commit()
+            return [recipe.recipe_id for recipe in new_recipes]
 
     @staticmethod
-    def recipe_list(db: Session, page: int, page_size: int, bean_id: Optional[int] = None):
+    def recipe_list(db: Session, page: int, page_size: int, bean_id: Optional[int] = None,
+                    cursor: Optional[str] = None, include_total: bool = True):
         query = db.query(Recipe)
         if bean_id:
             query = query.filter(Recipe.bean_id == bean_id)
         
-        total = query.count()
-        items = query.order_by(desc(Recipe.created_at)).offset((page - 1) * page_size).limit(page_size).all()
+        # cursor 모드에서는 전체 count를 생략할 수 있음 (include_total=False)
+        total = query.count() if include_total else None
+        items, next_cursor = keyset_page(
+            query.options(*RECIPE_LIST_OPTIONS), [Recipe.created_at, Recipe.recipe_id], page_size,
+            cursor=cursor, offset=(page - 1) * page_size,
+        )
         
         return {
             "items": items,
             "page": page,
             "page_size": page_size,
-            "total": total
+            "total": total,
+            "next_cursor": next_cursor
         }
 
     @staticmethod
     def recipe_detail(db: Session, recipe_id: int) -> Optional[Recipe]:
-        return db.query(Recipe).filter(Recipe.recipe_id == recipe_id).first()
+        return db.query(Recipe).options(*RECIPE_READ_OPTIONS).filter(Recipe.recipe_id == recipe_id).first()
 
     @staticmethod
-    def update_recipe(db: Session, recipe_id: int, payload: RecipeUpdate, current_user: User) -> Optional[Recipe]:
-        recipe = db.query(Recipe).filter(Recipe.recipe_id == recipe_id).first()
+    def update_recipe(db: Session, recipe_id: int, payload: RecipeUpdate, current_user: User) -> Optional[RecipeRead]:
+        update_data = payload.model_dump(exclude_unset=True)
+        pouring_steps_data = update_data.pop('pouring_steps', None)
+
+        # 단계를 통째로 바꿀 때는 기존 단계를 읽지 않음 (DELETE 한 번 + 일괄 INSERT)
+        options = (raiseload(Recipe.pouring_steps),) if pouring_steps_data is not None else RECIPE_READ_OPTIONS
+        recipe = db.query(Recipe).options(*options).filter(Recipe.recipe_id == recipe_id).first()
         if not recipe:
             return None
         
@@ -89,33 +184,22 @@ class RecipeController:
         #     return None
 
         # Update fields
-        update_data = payload.model_dump(exclude_unset=True)
-        pouring_steps_data = update_data.pop('pouring_steps', None)
-
         for key, value in update_data.items():
             setattr(recipe, key, value)
         
         # Update PouringSteps if provided
         if pouring_steps_data is not None:
-            # Delete existing steps
-            db.query(PouringStep).filter(PouringStep.recipe_id == recipe_id).delete()
-            # Add new steps
-            for step in pouring_steps_data:
-                new_step = PouringStep(
-                    recipe_id=recipe.recipe_id,
-                    step_number=step['step_number'],
-                    water_g=step['water_g'],
-                    pour_time_s=step['pour_time_s'],
-                    wait_time_s=step.get('wait_time_s'),
-                    bloom_time_s=step.get('bloom_time_s'),
-                    technique=step.get('technique'),
-                    #seed=step.get('seed', False)
-                )
-                db.add(new_step)
+            db.query(PouringStep).filter(PouringStep.recipe_id == recipe_id).delete(synchronize_session=False)
+            RecipeController.insert_steps(db, [recipe], [pouring_steps_data])
+            # 단계만 바뀌어도 레시피 버전(updated_at)은 갱신
+            recipe.updated_at = datetime.utcnow()
 
+        db.flush()
+        updated = RecipeRead.model_validate(recipe)
         db.commit()
-        db.refresh(recipe)
-        return recipe
+        # 머신 페이로드는 updated_at으로도 걸러지지만 이 워커의 캐시는 바로 비움
+        machine_payloads.invalidate(recipe_id)
+        return updated
 
     @staticmethod
     def delete_recipe(db: Session, recipe_id: int, current_user: User) -> bool:
@@ -129,6 +213,7 @@ class RecipeController:
 
         db.delete(recipe)
         db.commit()
+        machine_payloads.invalidate(recipe_id)
         return True
     
     @staticmethod
@@ -150,46 +235,154 @@ class RecipeController:
             if not recipe_data:
                 return None
             
-            # 3. 반환된 데이터 구조 확인 및 포맷팅
-            # OpenAI가 반환한 JSON을 RecipeCreate에 맞게 변환
-            formatted_recipe = {
-                "recipe_name": recipe_data.get("recipe_name", "Crawled Recipe"),
-                "bean_id": None,  # 크롤링된 레시피는 bean_id 없음
-                "is_public": True,  # 크롤링 레시피는 공개
-                "dose_g": recipe_data.get("dose_g", 15.0),
-                "water_temperature_c": recipe_data.get("water_temperature_c", 93.0),
-                "total_water_g": recipe_data.get("total_water_g"),
-                "total_brew_time_s": recipe_data.get("total_brew_time_s"),
-                "brew_ratio": recipe_data.get("brew_ratio"),
-                "grind_level": recipe_data.get("grind_level"),
-                "grind_microns": recipe_data.get("grind_microns"),
-                "rinsing": recipe_data.get("rinsing", False),
-                "source": "crawled",
-                "url": url,
-                "pouring_steps": recipe_data.get("pouring_steps", [])
-            }
-            
-            return formatted_recipe
+            return RecipeController.format_crawled_recipe(recipe_data, url)
             
         except Exception as e:
             print(f"Failed to crawl recipe from {url}: {e}")
             return None
 
+    @staticmethod
+    async def crawl_recipe_async(url: str) -> Optional[Dict[str, Any]]:
+        """
+        crawl_recipe의 비동기 버전 (스레드풀을 쓰지 않음)
+        - 페이지 요청과 추출 전체를 CRAWL_TOTAL_TIMEOUT_S로 제한, 초과 시 asyncio.TimeoutError
+        """
+        if not OPENAI_AVAILABLE:
+            raise Exception("OpenAI helper not available. Check OPENAI_API_KEY configuration.")
+
+        async def crawl():
+            html_content = await scrape_website_async(url)
+            if html_content.startswith("Error"):
+                return None
+            recipe_data = await extract_recipe_from_html_async(html_content)
+            if not recipe_data:
+                return None
+            return RecipeController.format_crawled_recipe(recipe_data, url)
+
+        try:
+            return await asyncio.wait_for(crawl(), timeout=settings.CRAWL_TOTAL_TIMEOUT_S)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            print(f"Failed to crawl recipe from {url}: {e}")
+            return None
+
+    @staticmethod
+    async def close_clients():
+        """크롤링/OpenAI 커넥션 풀 정리 (애플리케이션 종료 시)"""
+        if OPENAI_AVAILABLE:
+            await close_http_clients()
+
+    @staticmethod
+    def format_crawled_recipe(recipe_data: Dict[str, Any], url: str) -> Dict[str, Any]:
+        # 반환된 데이터 구조 확인 및 포맷팅
+        # OpenAI가 반환한 JSON을 RecipeCreate에 맞게 변환
+        formatted_recipe = {
+            "recipe_name": recipe_data.get("recipe_name", "Crawled Recipe"),
+            "bean_id": None,  # 크롤링된 레시피는 bean_id 없음
+            "is_public": True,  # 크롤링 레시피는 공개
+            "dose_g": recipe_data.get("dose_g", 15.0),
+            "water_temperature_c": recipe_data.get("water_temperature_c", 93.0),
+            "total_water_g": recipe_data.get("total_water_g"),
+            "total_brew_time_s": recipe_data.get("total_brew_time_s"),
+            "brew_ratio": recipe_data.get("brew_ratio"),
+            "grind_level": recipe_data.get("grind_level"),
+            "grind_microns": recipe_data.get("grind_microns"),
+            "rinsing": recipe_data.get("rinsing", False),
+            "source": "crawled",
+            "url": url,
+            "pouring_steps": recipe_data.get("pouring_steps", [])
+        }
+        return formatted_recipe
+
+    @staticmethod
+    def check_extracted_recipe(recipe_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """LLM/로컬 추출 결과 검증, 실패하면 자동 수정 후 남은 경고 반환"""
+        is_valid, errors = validate_recipe_data(recipe_data)
+        if not is_valid:
+            recipe_data = fix_recipe_data(recipe_data)
+            is_valid, errors = validate_recipe_data(recipe_data)
+        return recipe_data, errors
+
+    @staticmethod
+    async def bean_exists(session_factory: async_sessionmaker, bean_id: int) -> bool:
+        async with session_factory() as db:
+            return await db.get(CoffeeBean, bean_id) is not None
+
+    @staticmethod
+    async def generate_recipe_stream(description: str, user_id: str, session_factory: async_sessionmaker,
+                                     bean_id: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        설명으로 레시피 생성 (이벤트 스트림)
+        - token: 생성 텍스트 조각을 도착하는 대로 전달
+        - extracting: 텍스트 완료, 구조화 추출 시작
+        - recipe: source='generated'로 저장된 레시피 / error: 실패 사유
+        """
+        if not OPENAI_AVAILABLE:
+            yield {"type": "error", "detail": "openai_unavailable"}
+            return
+
+        parts: List[str] = []
+        try:
+            async for text in stream_recipe_from_description(description):
+                parts.append(text)
+                yield {"type": "token", "text": text}
+            yield {"type": "extracting"}
+            recipe_data = await extract_recipe_from_description_async("".join(parts))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Failed to generate recipe: {e}")
+            yield {"type": "error", "detail": "generation_failed"}
+            return
+
+        # 빈 추출 결과를 기본값으로 채워서 단계 없는 레시피를 저장하지 않음
+        if not recipe_data or not recipe_data.get("pouring_steps"):
+            yield {"type": "error", "detail": "parse_failed", "text": "".join(parts)}
+            return
+        recipe_data, warnings = RecipeController.check_extracted_recipe(recipe_data)
+        formatted = {
+            **RecipeController.format_crawled_recipe(recipe_data, None),
+            "recipe_name": recipe_data.get("recipe_name") or "Generated Recipe",
+            "bean_id": bean_id,
+            "is_public": False,
+            "source": "generated",
+        }
+        try:
+            payload = RecipeCreate.model_validate(formatted)
+        except ValidationError:
+            yield {"type": "error", "detail": "parse_failed", "text": "".join(parts)}
+            return
+
+        # 헤더(200)는 이미 나갔으므로 저장 실패도 error 이벤트로 알림
+        try:
+            recipe_id = (await RecipeController.save_recipes_async(session_factory, user_id, [payload]))[0]
+        except Exception as e:
+            print(f"Failed to save generated recipe: {e}")
+            yield {"type": "error", "detail": "save_failed"}
+            return
+        yield {"type": "recipe", "recipe_id": recipe_id, "recipe": formatted, "warnings": warnings}
+
     @staticmethod
     def recommend_recipe(db: Session, user_id: str, limit: int):
         # Placeholder for recommendation logic
-        return db.query(Recipe).limit(limit).all()
+        return db.query(Recipe).options(*RECIPE_LIST_OPTIONS).limit(limit).all()
 
     @staticmethod
-    def generated_recipes(db: Session, user_id: str, page: int, page_size: int):
+    def generated_recipes(db: Session, user_id: str, page: int, page_size: int,
+                          cursor: Optional[str] = None, include_total: bool = True):
         # Placeholder for generated recipes
         query = db.query(Recipe).filter(Recipe.user_id == user_id, Recipe.source == 'generated')
-        total = query.count()
-        items = query.order_by(desc(Recipe.created_at)).offset((page - 1) * page_size).limit(page_size).all()
+        total = query.count() if include_total else None
+        items, next_cursor = keyset_page(
+            query.options(*RECIPE_LIST_OPTIONS), [Recipe.created_at, Recipe.recipe_id], page_size,
+            cursor=cursor, offset=(page - 1) * page_size,
+        )
         
         return {
             "items": items,
             "page": page,
             "page_size": page_size,
-            "total": total
+            "total": total,
+            "next_cursor": next_cursor
         }
\ No newline at end of file
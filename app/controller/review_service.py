@@ -0,0 +1,264 @@
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models.brew_log import BrewLog
+from app.models.recipe import PouringStep, Recipe
+from app.models.taste_model import UserTasteModel
+from app.services.coffee_optimizer import data_axes, modify_recipe_based_on_feedback, recipe_point
+from app.services.personalization import ResidualModel, residual_models
+from app.controller.ws_service import ws_manager
+
+
+@dataclass
+class ReviewJob:
+    brew_log_id: int
+    user_id: str
+    machine_id: Optional[str]
+    taste: int
+    tds: int
+    weight: int
+    intensity: int
+    session_factory: async_sessionmaker
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued | running | done | failed
+    new_recipe_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "brew_log_id": self.brew_log_id,
+            "new_recipe_id": self.new_recipe_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ReviewController:
+    @staticmethod
+    async def save_review(db: AsyncSession, brew_log_id: int, taste: int, tds: int, weight: int,
+                          intensity: int, notes: Optional[str] = None) -> Optional[BrewLog]:
+        brew_log = await db.get(BrewLog, brew_log_id)
+        if brew_log is None:
+            return None
+
+        # Save review data to brew log
+        brew_log.review_taste = taste
+        brew_log.review_tds = tds
+        brew_log.review_weight = weight
+        brew_log.review_intensity = intensity
+        brew_log.review_notes = notes
+        await db.commit()
+        return brew_log
+
+    @staticmethod
+    async def load_taste_model(db: AsyncSession, user_id: str) -> ResidualModel:
+        model = residual_models.get(user_id)
+        if model is None:
+            row = await db.get(UserTasteModel, user_id)
+            model = ResidualModel.from_dict(json.loads(row.state)) if row else ResidualModel()
+            residual_models.put(user_id, model)
+        return model
+
+    @staticmethod
+    async def save_taste_model(db: AsyncSession, user_id: str, model: ResidualModel):
+        row = await db.get(UserTasteModel, user_id)
+        if row is None:
+            row = UserTasteModel(user_id=user_id)
+            db.add(row)
+        row.state = json.dumps(model.to_dict(), separators=(",", ":"))
+        row.n_reviews = model.n_reviews
+
+    @staticmethod
+    def build_child_recipe(recipe: Recipe, new_recipe_data: Dict[str, Any]) -> Recipe:
+        new_recipe_data = dict(new_recipe_data)
+        pour_r = new_recipe_data.pop('ratio')
+        for key in ('predicted_tds', 'predicted_taste', 'goal_tds', 'goal_taste'):
+            new_recipe_data.pop(key)
+
+        return Recipe(
+            user_id="auto",
+            seed=True,
+            dose_g=recipe.dose_g,
+            # copy all other fields + modified parameters
+            **new_recipe_data,
+            pouring_steps=[
+                PouringStep(step_number=1, water_g=60.0, pour_time_s=20.0),
+                PouringStep(
+                    step_number=2,
+                    water_g=200*pour_r/(pour_r+1),
+                    pour_time_s=20.0,
+                    wait_time_s=20.0,
+                ),
+                PouringStep(
+                    step_number=3,
+                    water_g=200/(pour_r+1),
+                    pour_time_s=20.0,
+                ),
+            ],
+        )
+
+    @staticmethod
+    async def create_child_recipe(job: ReviewJob) -> int:
+        async with job.session_factory() as db:
+            brew_log = await db.get(BrewLog, job.brew_log_id)
+            if brew_log is None:
+                raise LookupError("brew_log_not_found")
+            recipe = (await db.execute(
+                select(Recipe)
+                .options(selectinload(Recipe.pouring_steps))
+                .where(Recipe.recipe_id == brew_log.recipe_id)
+            )).scalar_one_or_none()
+            if recipe is None:
+                raise LookupError("recipe_not_found")
+
+            # 지금까지의 리뷰로 만든 사용자 보정 (이번 리뷰는 추천 후에 반영)
+            taste_model = None
+            if settings.PERSONALIZATION_ENABLED:
+                taste_model = await ReviewController.load_taste_model(db, job.user_id)
+
+            # 최적화는 CPU 작업이므로 이벤트 루프 밖에서 실행
+            new_recipe_data = await asyncio.to_thread(
+                modify_recipe_based_on_feedback,
+                original_recipe=recipe,
+                taste=job.taste,
+                tds=job.tds,
+                weight=job.weight,
+                intensity=job.intensity,
+                correction=taste_model.correction() if taste_model else None,
+            )
+            new_recipe = ReviewController.build_child_recipe(recipe, new_recipe_data)
+            db.add(new_recipe)
+            await db.flush()  # get new_recipe.recipe_id
+
+            # Link as child
+            brew_log.child_recipe_id = new_recipe.recipe_id
+
+            if taste_model is not None:
+                # 캐시된 모델은 커밋이 성공한 뒤에만 교체
+                taste_model = ResidualModel.from_dict(taste_model.to_dict())
+                taste_model.update(data_axes(), recipe_point(recipe), job.taste, job.tds)
+                await ReviewController.save_taste_model(db, job.user_id, taste_model)
+
+            await db.commit()
+            if taste_model is not None:
+                residual_models.put(job.user_id, taste_model)
+            return new_recipe.recipe_id
+
+
+class ReviewJobRunner:
+    """
+    리뷰 기반 레시피 최적화 백그라운드 작업 실행기
+    - 리뷰 API는 피드백만 저장하고 job_id와 함께 바로 202 응답
+    - 워커가 최적화 + 자식 레시피 생성 후 리뷰한 사용자의 앱 소켓으로 REVIEW_RECIPE_READY 전송
+    - 결과는 GET /review/jobs/{job_id}로도 조회 (완료 후 result_ttl_s 동안 보관)
+    """
+
+    def __init__(self, maxsize: int, workers: int, result_ttl_s: float):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.result_ttl_s = result_ttl_s
+        self.jobs: Dict[str, ReviewJob] = {}
+        # 같은 사용자의 리뷰는 순서대로 처리 (보정 모델 갱신이 덮어써지지 않도록)
+        self._user_locks: Dict[str, list] = {}  # user_id -> [lock, 대기 작업 수]
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.workers:
+            self._workers.append(asyncio.create_task(self._run()))
+
+    def is_full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def submit(self, job: ReviewJob) -> bool:
+        """큐가 가득 차면 False"""
+        self._ensure_workers()
+        self._prune()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+        self.jobs[job.job_id] = job
+        return True
+
+    def get(self, job_id: str) -> Optional[ReviewJob]:
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl_s
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.process(job)
+            finally:
+                self._queue.task_done()
+
+    async def process(self, job: ReviewJob):
+        entry = self._user_locks.setdefault(job.user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                job.status = "running"
+                job.new_recipe_id = await ReviewController.create_child_recipe(job)
+                job.status = "done"
+        except Exception as e:
+            print(f"[ReviewJobs] job {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._user_locks[job.user_id]
+        job.finished_at = time.time()
+
+        # 결과는 리뷰를 남긴 사용자의 앱 소켓에만 전송 (같은 머신을 보는 다른 사용자에게는 보내지 않음)
+        # 앱이 연결되어 있지 않으면 /review/jobs/{job_id}로 확인
+        if job.machine_id:
+            message_type = "REVIEW_RECIPE_READY" if job.status == "done" else "REVIEW_RECIPE_FAILED"
+            await ws_manager.send_to_user(job.machine_id, job.user_id, {"type": message_type, **job.to_dict()})
+
+    async def drain(self):
+        """대기 중인 작업이 모두 끝날 때까지 대기"""
+        if self._queue is not None and any(not task.done() for task in self._workers):
+            await self._queue.join()
+
+    async def stop(self):
+        await self.drain()
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        self._queue = None
+
+
+review_jobs = ReviewJobRunner(
+    maxsize=settings.REVIEW_JOB_QUEUE_SIZE,
+    workers=settings.REVIEW_JOB_WORKERS,
+    result_ttl_s=settings.REVIEW_JOB_RESULT_TTL_S,
+)
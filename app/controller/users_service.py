@@ -1,8 +1,10 @@
+from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.models.brew_log import BrewLog
 
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select
 
 from app.schemas.user_schema import (
     UserSignUp, 
@@ -10,16 +12,18 @@ from app.schemas.user_schema import (
     UserInfoUpdate, 
     UserPreferenceUpdate
 )
-from app.core.auth import get_password_hash, verify_password, create_access_token
+from app.core.auth import create_access_token, token_cache, password_pool, CurrentUser
 from app.core.config import settings
+from app.utils.pagination import keyset_page
 
 class UserController:
     @staticmethod
-    def signup(db: Session, payload: UserSignUp):
-        check_user = db.query(User).filter(User.email == payload.email).first()
+    async def signup(db: AsyncSession, payload: UserSignUp):
+        check_user = (await db.execute(select(User).where(User.email == payload.email))).scalars().first()
         if check_user:
             return None
-        hashed_password = get_password_hash(payload.password)
+        # argon2는 전용 풀에서 실행 (포화 시 429)
+        hashed_password = await password_pool.hash(payload.password)
         new_user = User(
             email=payload.email,
             username = payload.username,
@@ -27,14 +31,14 @@ class UserController:
         )
 
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         return new_user
     
     @staticmethod
-    def login(db: Session, payload: UserLogin):
-        user = db.query(User).filter(User.email == payload.email).first()
-        if not user or not verify_password(payload.password, user.password_hash):
+    async def login(db: AsyncSession, payload: UserLogin):
+        user = (await db.execute(select(User).where(User.email == payload.email))).scalars().first()
+        if not user or not await password_pool.verify(payload.password, user.password_hash):
             return None
         
         access_token = create_access_token(data={"sub": user.email, "user_id": user.user_id})
@@ -51,29 +55,38 @@ class UserController:
 
 
     @staticmethod
-    def update_user_info(db: Session, user: User, payload: UserInfoUpdate):
-        
+    async def update_user_info(db: AsyncSession, user_id: str, payload: UserInfoUpdate):
+        user = (await db.execute(select(User).where(User.user_id == user_id))).scalars().first()
+        if not user:
+            return None
+
         # 값이 있는 필드만 업데이트
         if payload.username is not None:
             user.username = payload.username
         if payload.email is not None:
             user.email = payload.email
         if payload.password is not None:
-            user.password_hash = get_password_hash(payload.password)
+            # 비밀번호 변경도 signup과 같은 argon2 전용 풀 사용 (포화 시 429)
+            user.password_hash = await password_pool.hash(payload.password)
             
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        # 캐시된 인증 정보(이메일/이름) 무효화 -> 이전 이메일의 토큰은 다시 검증됨
+        token_cache.invalidate_user(user.user_id)
         return user
 
 
     @staticmethod
-    def get_user_pref(user: User):
-        return user  # User 모델에 선호도 필드가 포함되어 있음
+    def get_user_pref(db: Session, user: CurrentUser):
+        # 인증 캐시의 CurrentUser는 세션과 분리되어 있으므로 ORM 객체를 다시 조회
+        return db.query(User).filter(User.user_id == user.user_id).first()
 
 
     @staticmethod
-    def set_user_pref(db: Session, user: User, payload: UserPreferenceUpdate):
-        # user_id로 다시 조회하지 않고 전달받은 user 객체 사용
+    def set_user_pref(db: Session, user: CurrentUser, payload: UserPreferenceUpdate):
+        user = db.query(User).filter(User.user_id == user.user_id).first()
+        if not user:
+            return None
         update_data = payload.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(user, key, value)
@@ -83,9 +96,11 @@ class UserController:
         return user
 
     @staticmethod
-    def get_brew_log(db: Session, user_id: str, page: int = 1, page_size: int = 20):
+    def get_brew_log(db: Session, user_id: str, page: int = 1, page_size: int = 20,
+                     cursor: Optional[str] = None, include_total: bool = True):
         """
         사용자별 브루잉 로그를 페이지네이션하여 조회
+        cursor를 넘기면 (brewed_at, log_id) 키셋으로 다음 페이지 조회
         """
         if page < 1:
             page = 1
@@ -95,24 +110,25 @@ class UserController:
             page_size = 100  # 최대 100개 제한 (보안/성능)
 
         offset = (page - 1) * page_size
-        print("user_id:", user_id, "page:", page, "page_size:", page_size, "offset:", offset)
-        # 총 개수 조회
-        total = db.query(func.count(BrewLog.log_id)) \
-                .filter(BrewLog.user_id == user_id) \
-                .scalar()
+        # 총 개수 조회 (cursor 모드에서는 생략 가능)
+        total = None
+        if include_total:
+            total = db.query(func.count(BrewLog.log_id)) \
+                    .filter(BrewLog.user_id == user_id) \
+                    .scalar() or 0
 
         # 로그 목록 조회 (최신순 정렬)
-        items = db.query(BrewLog) \
-                .filter(BrewLog.user_id == user_id) \
-                .order_by(desc(BrewLog.brewed_at)) \
-                .offset(offset) \
-                .limit(page_size) \
-                .all()
+        items, next_cursor = keyset_page(
+            db.query(BrewLog).filter(BrewLog.user_id == user_id),
+            [BrewLog.brewed_at, BrewLog.log_id], page_size,
+            cursor=cursor, offset=offset,
+        )
 
         return {
             "items": items,
             "page": page,
             "page_size": page_size,
-            "total": total or 0,
-            "total_pages": (total + page_size - 1) // page_size if total else 0  # 선택사항
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size if total else 0,  # 선택사항
+            "next_cursor": next_cursor
         }
\ No newline at end of file
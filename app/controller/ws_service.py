@@ -1,11 +1,213 @@
-from fastapi import WebSocket
+from fastapi import WebSocket, status
 from typing import Dict, List, Any
+from collections import deque
+import asyncio
+import time
 import json
 
+from app.core.config import settings
+from app.core.backplane import APPS_CHANNEL_PREFIX, Backplane, apps_channel, node_channel
+from app.services.machine_payload import MACHINE_ENCODINGS, encode_recipe_frames
+
+# 브로드캐스트 프레임 직렬화 (orjson이 설치되어 있으면 사용)
+try:
+    import orjson
+
+    def encode_message(message: dict) -> str:
+        return orjson.dumps(message).decode()
+except ImportError:
+    def encode_message(message: dict) -> str:
+        # starlette의 send_json과 동일한 포맷
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+# 최신 값만 의미 있는 텔레메트리 프레임 (큐가 차면 오래된 것부터 버림)
+TELEMETRY_TYPES = {"LOADCELL_VALUE"}
+
+
+class AppConnection:
+    """
+    앱 소켓 하나에 대한 송신 큐 + 전용 송신 태스크
+    - 브로드캐스트는 enqueue만 하므로 느린 앱이 다른 앱의 수신을 지연시키지 않음
+    - 큐가 가득 차면 가장 오래된 텔레메트리 프레임을 버리고, 제어/상태 프레임은 버리지 않음
+    - 가장 오래된 대기 프레임이 max_lag_s 이상 밀리면 연결을 끊음
+    """
+
+    def __init__(self, websocket: WebSocket, user: str, maxsize: int, max_lag_s: float, user_id: str | None = None):
+        self.ws = websocket
+        self.user = user
+        self.user_id = user_id
+        self.maxsize = maxsize
+        self.max_lag_s = max_lag_s
+        self.dropped = 0
+        self.closed = False
+        # (enqueued_at, droppable, 직렬화된 text)
+        self._frames: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._sender())
+
+    def pending(self) -> int:
+        return len(self._frames)
+
+    def lag(self) -> float:
+        if not self._frames:
+            return 0.0
+        return time.monotonic() - self._frames[0][0]
+
+    def enqueue(self, message: dict, text: str | None = None) -> bool:
+        """text를 넘기면 재직렬화 없이 그대로 전송 (브로드캐스트 시 한 번만 인코딩)"""
+        if self.closed:
+            return False
+        if self.lag() > self.max_lag_s:
+            print(f"[WS Service] Slow app disconnected (User: {self.user}, lag: {self.lag():.1f}s)")
+            self._schedule_close()
+            return False
+
+        droppable = message.get("type") in TELEMETRY_TYPES
+        if len(self._frames) >= self.maxsize and droppable:
+            for i, frame in enumerate(self._frames):
+                if frame[1]:
+                    del self._frames[i]
+                    break
+            else:
+                # 대기 중인 프레임이 전부 제어 프레임이면 새 텔레메트리를 버림
+                self.dropped += 1
+                return False
+            self.dropped += 1
+
+        if text is None:
+            text = encode_message(message)
+        self._frames.append((time.monotonic(), droppable, text))
+        self._wakeup.set()
+        return True
+
+    async def _sender(self):
+        try:
+            while True:
+                if not self._frames:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                _, _, text = self._frames.popleft()
+                await asyncio.wait_for(self.ws.send_text(text), timeout=self.max_lag_s)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WS Service] Error sending to app ({self.user}): {e}")
+            await self.close()
+
+    def _schedule_close(self):
+        self.closed = True
+        asyncio.create_task(self.close())
+
+    async def close(self):
+        self.closed = True
+        self._frames.clear()
+        try:
+            await self.ws.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    def stop(self):
+        self.closed = True
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+class TelemetryCoalescer:
+    """
+    머신별 LOADCELL_VALUE 릴레이 빈도 제한
+    - window_s 안에 들어온 프레임은 최신 값 하나로 합쳐서 window가 끝날 때 전송
+    - 상태/완료 프레임 전에는 flush()로 대기 중인 최신 값을 먼저 내보냄
+    """
+
+    def __init__(self, window_s: float, send):
+        self.window_s = window_s
+        self.coalesced = 0
+        self._send = send
+        self._last_sent = float("-inf")
+        self._pending: dict | None = None
+        self._timer: asyncio.Task | None = None
+
+    async def offer(self, message: dict):
+        if self.window_s <= 0:
+            await self._send(message)
+            return
+        wait = self._last_sent + self.window_s - time.monotonic()
+        if wait <= 0 and self._pending is None:
+            await self._emit(message)
+            return
+        if self._pending is not None:
+            self.coalesced += 1
+        self._pending = message
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later(max(wait, 0.0)))
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending is not None:
+            message, self._pending = self._pending, None
+            await self._emit(message)
+
+    async def _emit(self, message: dict):
+        self._last_sent = time.monotonic()
+        await self._send(message)
+
+
 class ConnectionManager:
-    def __init__(self):
-        # { "machine_id": { "machine": WebSocket | None, "apps": [{"ws": WebSocket, "user": str}, ...] } }
+    def __init__(self, app_queue_size: int = 64, app_max_lag_s: float = 5.0, loadcell_window_s: float = 0.0):
+        # { "machine_id": { "machine": WebSocket | None, "apps": [AppConnection, ...] } }
         self.active_connections: Dict[str, Dict[str, Any]] = {}
+        self.app_queue_size = app_queue_size
+        self.app_max_lag_s = app_max_lag_s
+        # 머신별 텔레메트리 합치기 설정 { "machine_id": window_s } (없으면 기본값)
+        self.loadcell_window_s = loadcell_window_s
+        self.coalesce_windows: Dict[str, float] = {}
+        self._coalescers: Dict[str, TelemetryCoalescer] = {}
+        # 다른 워커/노드와 브로드캐스트/명령을 주고받는 백플레인 (없으면 단일 프로세스 동작)
+        self.backplane: Backplane | None = None
+
+    async def start_backplane(self, backplane: Backplane | None):
+        self.backplane = backplane
+        if backplane is not None:
+            await backplane.start(self._on_backplane_message)
+            print(f"[WS Service] Backplane started: {type(backplane).__name__} (node: {backplane.node_id})")
+
+    async def stop_backplane(self):
+        if self.backplane is not None:
+            await self.backplane.close()
+            self.backplane = None
+
+    async def _on_backplane_message(self, channel: str, envelope: dict):
+        if self.backplane is None or envelope.get("origin") == self.backplane.node_id:
+            return
+        machine_id = envelope.get("machine_id")
+        if channel.startswith(APPS_CHANNEL_PREFIX):
+            self._deliver_to_apps(machine_id, envelope["message"], envelope.get("user_id"))
+        elif channel == node_channel(self.backplane.node_id):
+            await self._deliver_to_machine(machine_id, envelope["message"], envelope.get("recipe_id"))
+
+    def set_coalesce_window(self, machine_id: str, window_s: float):
+        self.coalesce_windows[machine_id] = window_s
+        if machine_id in self._coalescers:
+            self._coalescers[machine_id].window_s = window_s
+
+    def _coalescer(self, machine_id: str) -> TelemetryCoalescer:
+        if machine_id not in self._coalescers:
+            window_s = self.coalesce_windows.get(machine_id, self.loadcell_window_s)
+            self._coalescers[machine_id] = TelemetryCoalescer(
+                window_s, lambda message: self.broadcast_to_apps(machine_id, message)
+            )
+        return self._coalescers[machine_id]
 
     async def connect_machine(self, machine_id: str, websocket: WebSocket):
         # ...existing code...
@@ -21,7 +223,26 @@ class ConnectionManager:
                 pass
             
         self.active_connections[machine_id]["machine"] = websocket
+        # 새 연결은 HELLO 핸드셰이크 전까지 기존 JSON 포맷
+        self.active_connections[machine_id]["encoding"] = "json"
         print(f"[WS Service] Machine connected: {machine_id}")
+        if self.backplane is not None:
+            try:
+                await self.backplane.set_machine_owner(machine_id)
+            except Exception as e:
+                print(f"[WS Service] Failed to publish machine presence: {e}")
+
+    def set_machine_encoding(self, machine_id: str, encodings: List[str]) -> str:
+        """펌웨어가 선호 순서대로 보낸 인코딩 중 서버가 지원하는 첫 번째를 선택"""
+        chosen = next((e for e in encodings if e in MACHINE_ENCODINGS), "json")
+        if machine_id in self.active_connections:
+            self.active_connections[machine_id]["encoding"] = chosen
+        return chosen
+
+    def get_machine_encoding(self, machine_id: str) -> str:
+        if machine_id in self.active_connections:
+            return self.active_connections[machine_id].get("encoding", "json")
+        return "json"
 
     def set_last_recipe(self, machine_id: str, recipe_id: int):
         if machine_id in self.active_connections:
@@ -34,21 +255,71 @@ class ConnectionManager:
         return None
     
     # [CHANGED] user_email 인자 추가 및 저장 구조 변경 (Dict로 저장)
-    async def connect_app(self, machine_id: str, websocket: WebSocket, user_email: str = "Unknown"):
+    async def connect_app(self, machine_id: str, websocket: WebSocket, user_email: str = "Unknown",
+                          user_id: str | None = None):
         await websocket.accept()
         if machine_id not in self.active_connections:
             self.active_connections[machine_id] = {"machine": None, "apps": []}
         print(f"[WS Service] Connecting app to machine: {machine_id} (User: {user_email})")
-        # WebSocket 객체와 사용자 정보를 함께 저장
-        connection_info = {"ws": websocket, "user": user_email}
-        self.active_connections[machine_id]["apps"].append(connection_info)
+        # WebSocket 객체와 사용자 정보, 송신 큐를 함께 저장
+        connection = AppConnection(websocket, user_email, self.app_queue_size, self.app_max_lag_s, user_id)
+        connection.start()
+        apps_list = self.active_connections[machine_id]["apps"]
+        apps_list.append(connection)
+        # 이 노드에 이 머신의 앱이 처음 붙으면 머신 채널 구독
+        if self.backplane is not None and len(apps_list) == 1:
+            try:
+                await self.backplane.subscribe_apps(machine_id)
+            except Exception as e:
+                print(f"[WS Service] Failed to subscribe apps channel: {e}")
         print(f"[WS Service] App connected to machine: {machine_id} (User: {user_email})")
 
-    def disconnect_machine(self, machine_id: str):
-        # ...existing code...
+    def disconnect_machine(self, machine_id: str, websocket: WebSocket | None = None) -> bool:
+        """websocket을 넘기면 그 소켓이 현재 연결일 때만 해제 (같은 머신의 재접속을 끊지 않음)"""
+        if websocket is not None and self.active_connections.get(machine_id, {}).get("machine") is not websocket:
+            return False
         if machine_id in self.active_connections:
             self.active_connections[machine_id]["machine"] = None
             print(f"[WS Service] Machine disconnected: {machine_id}")
+        # 마지막 무게 값은 버리지 않고 내보냄
+        coalescer = self._coalescers.pop(machine_id, None)
+        if coalescer is not None:
+            asyncio.create_task(coalescer.flush())
+        if self.backplane is not None:
+            asyncio.create_task(self._clear_machine_owner(machine_id))
+        return True
+
+    async def _clear_machine_owner(self, machine_id: str):
+        try:
+            await self.backplane.clear_machine_owner(machine_id)
+        except Exception as e:
+            print(f"[WS Service] Failed to clear machine presence: {e}")
+
+    # 머신 접속 여부 (다른 워커에 붙어있는 머신 포함)
+    async def is_machine_connected(self, machine_id: str) -> bool:
+        if machine_id in self.active_connections and self.active_connections[machine_id]["machine"] is not None:
+            return True
+        if self.backplane is not None:
+            try:
+                return await self.backplane.get_machine_owner(machine_id) is not None
+            except Exception as e:
+                print(f"[WS Service] Failed to read machine presence: {e}")
+        return False
+
+    # 여러 머신의 접속 여부 (백플레인 조회는 한 번으로 묶음)
+    async def machines_connected(self, machine_ids: List[str]) -> Dict[str, bool]:
+        connected = {
+            machine_id: machine_id in self.active_connections and self.active_connections[machine_id]["machine"] is not None
+            for machine_id in machine_ids
+        }
+        remote = [machine_id for machine_id, online in connected.items() if not online]
+        if remote and self.backplane is not None:
+            try:
+                owners = await self.backplane.get_machine_owners(remote)
+                connected.update({machine_id: owners.get(machine_id) is not None for machine_id in remote})
+            except Exception as e:
+                print(f"[WS Service] Failed to read machine presence: {e}")
+        return connected
 
     # [CHANGED] 저장 구조 변경에 따른 연결 해제 로직 수정
     def disconnect_app(self, machine_id: str, websocket: WebSocket):
@@ -56,10 +327,25 @@ class ConnectionManager:
             apps_list = self.active_connections[machine_id]["apps"]
             # 리스트에서 해당 웹소켓을 가진 항목 찾아서 제거
             for conn in apps_list:
-                if conn["ws"] == websocket:
+                if conn.ws == websocket:
+                    conn.stop()
                     apps_list.remove(conn)
-                    print(f"[WS Service] App disconnected from: {machine_id} (User: {conn['user']})")
+                    print(f"[WS Service] App disconnected from: {machine_id} (User: {conn.user})")
                     break
+            self._release_apps_channel(machine_id)
+
+    def _release_apps_channel(self, machine_id: str):
+        # 이 노드에 남은 앱이 없으면 머신 채널 구독 해제
+        if self.backplane is not None and not self.active_connections[machine_id]["apps"]:
+            asyncio.create_task(self._unsubscribe_apps(machine_id))
+
+    async def _unsubscribe_apps(self, machine_id: str):
+        if machine_id in self.active_connections and self.active_connections[machine_id]["apps"]:
+            return  # 그 사이 다시 붙은 앱이 있음
+        try:
+            await self.backplane.unsubscribe_apps(machine_id)
+        except Exception as e:
+            print(f"[WS Service] Failed to unsubscribe apps channel: {e}")
 
     #  머신 메시지 처리 로직 (라우터에서 이동)
     async def process_machine_message(self, machine_id: str, data: dict):
@@ -75,21 +361,70 @@ class ConnectionManager:
             print(f"[WS] Status from {machine_id}: {data}")
         elif msg_type == "BREW_DONE":
             print(f"[WS] Brewing Done: {machine_id}")
+        elif msg_type == "HELLO":
+            # 핸드셰이크: 레시피 프레임 인코딩 협상 (앱에는 전달하지 않음)
+            encoding = self.set_machine_encoding(machine_id, data.get("encodings") or [])
+            print(f"[WS] Hello from {machine_id}: encoding={encoding}")
+            await self._deliver_to_machine(machine_id, {"type": "HELLO_ACK", "encoding": encoding})
+            return msg_type
         else:
             print(f"[WS] Unknown msg from {machine_id}: {data}")
 
         # 2. 앱들에게 브로드캐스트 (Relay)
+        # 무게 프레임은 coalescing 창 단위로 최신 값만 전달
+        if msg_type == "LOADCELL_VALUE":
+            await self._coalescer(machine_id).offer(data)
+            return msg_type
+
+        # 상태/완료 프레임은 대기 중인 무게 값을 먼저 보낸 뒤 즉시 전달
+        if machine_id in self._coalescers:
+            await self._coalescers[machine_id].flush()
         await self.broadcast_to_apps(machine_id, data)
         return msg_type
 
     # 앱 -> 머신 명령 전달
-    async def send_command_to_machine(self, machine_id: str, message: dict):
-        # ...existing code...
+    # recipe_id를 넘기면 머신이 붙어있는 노드에서 마지막 레시피로 기록 (BREW_DONE 처리용)
+    # frames: 인코딩별로 미리 만든 프레임 (없으면 send_json, 백플레인으로는 message만 전달)
+    async def send_command_to_machine(self, machine_id: str, message: dict, recipe_id: int | None = None,
+                                      frames: Dict[str, str | bytes] | None = None):
+        if machine_id in self.active_connections and self.active_connections[machine_id]["machine"] is not None:
+            return await self._deliver_to_machine(machine_id, message, recipe_id, frames)
+
+        # 다른 워커에 연결된 머신이면 백플레인으로 전달
+        if self.backplane is not None:
+            try:
+                owner = await self.backplane.get_machine_owner(machine_id)
+                if owner and owner != self.backplane.node_id:
+                    envelope = {
+                        "origin": self.backplane.node_id,
+                        "machine_id": machine_id,
+                        "message": message,
+                        "recipe_id": recipe_id,
+                    }
+                    return await self.backplane.publish(node_channel(owner), envelope) > 0
+            except Exception as e:
+                print(f"[WS Service] Error routing command via backplane: {e}")
+        return False
+
+    async def _deliver_to_machine(self, machine_id: str, message: dict, recipe_id: int | None = None,
+                                  frames: Dict[str, str | bytes] | None = None):
         if machine_id in self.active_connections:
             machine_ws = self.active_connections[machine_id]["machine"]
             if machine_ws:
                 try:
-                    await machine_ws.send_json(message)
+                    encoding = self.active_connections[machine_id].get("encoding", "json")
+                    # 다른 노드에서 넘어온 레시피는 여기서 인코딩 (제어 명령은 항상 JSON)
+                    if frames is None and encoding != "json" and message.get("type") == "RECIPE_DATA" and recipe_id is not None:
+                        frames = encode_recipe_frames(recipe_id, message)
+                    frame = frames.get(encoding) if frames else None
+                    if isinstance(frame, bytes):
+                        await machine_ws.send_bytes(frame)
+                    elif frame is not None:
+                        await machine_ws.send_text(frame)
+                    else:
+                        await machine_ws.send_json(message)
+                    if recipe_id is not None:
+                        self.set_last_recipe(machine_id, recipe_id)
                     return True
                 except Exception as e:
                     print(f"[WS Service] Error sending to machine: {e}")
@@ -97,17 +432,44 @@ class ConnectionManager:
         return False
 
     # 내부 유틸리티: 브로드캐스트
-    # [CHANGED] 저장 구조 변경에 따른 브로드캐스트 로직 수정
+    # 앱마다 송신 큐에 넣기만 하고 실제 전송은 각 앱의 송신 태스크가 담당
+    # 메시지는 한 번만 직렬화해서 같은 text를 모든 앱에 전송
     async def broadcast_to_apps(self, machine_id: str, message: dict):
+        self._deliver_to_apps(machine_id, message)
+        # 다른 워커에 붙어있는 앱들에게도 전달 (머신별 채널, 응답을 기다리지 않아 수신 루프를 막지 않음)
+        if self.backplane is not None:
+            envelope = {"origin": self.backplane.node_id, "machine_id": machine_id, "message": message}
+            self.backplane.publish_nowait(apps_channel(machine_id), envelope)
+
+    # 한 사용자의 앱에만 전송 (리뷰 작업 결과처럼 다른 사용자가 보면 안 되는 메시지)
+    # 같은 머신 채널로 다른 워커에도 보내고, 받는 쪽에서 user_id로 걸러냄
+    async def send_to_user(self, machine_id: str, user_id: str, message: dict):
+        self._deliver_to_apps(machine_id, message, user_id)
+        if self.backplane is not None:
+            envelope = {"origin": self.backplane.node_id, "machine_id": machine_id, "user_id": user_id, "message": message}
+            self.backplane.publish_nowait(apps_channel(machine_id), envelope)
+
+    def _deliver_to_apps(self, machine_id: str, message: dict, user_id: str | None = None):
         if machine_id in self.active_connections:
-            print(len(self.active_connections[machine_id]["apps"]))
-            # apps 리스트의 각 항목은 이제 dict임
-            for conn in self.active_connections[machine_id]["apps"][:]:
-                app_ws = conn["ws"]
-                print(f"[WS Service] Broadcasting to app (User: {conn['user']}) for machine: {machine_id}")
-                try:
-                    await app_ws.send_json(message)
-                except Exception as e:
-                    print(f"[WS Service] Error sending to app ({conn['user']}): {e}")
+            apps_list = self.active_connections[machine_id]["apps"]
+            if not apps_list:
+                return
+            text = None
+            for conn in apps_list[:]:
+                if conn.closed:
+                    conn.stop()
+                    apps_list.remove(conn)
+                    continue
+                if user_id is not None and conn.user_id != user_id:
+                    continue
+                if text is None:
+                    text = encode_message(message)
+                conn.enqueue(message, text)
+            if not apps_list:
+                self._release_apps_channel(machine_id)
 
-ws_manager = ConnectionManager()
\ No newline at end of file
+ws_manager = ConnectionManager(
+    app_queue_size=settings.WS_APP_QUEUE_SIZE,
+    app_max_lag_s=settings.WS_APP_MAX_LAG_S,
+    loadcell_window_s=1 / settings.WS_LOADCELL_MAX_HZ if settings.WS_LOADCELL_MAX_HZ > 0 else 0.0,
+)
\ No newline at end of file
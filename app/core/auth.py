@@ -1,5 +1,11 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Optional, Dict, Set, Tuple
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -8,11 +14,147 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.database import get_db
 
-# 비밀번호 해싱 설정
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# 비밀번호 해싱 설정 (기존 해시는 해시 문자열에 저장된 파라미터로 검증됨)
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST_KIB,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/usr/login")
 
 
+# 인증된 사용자 정보 (세션과 분리된 가벼운 객체, 캐시에 보관)
+@dataclass(frozen=True)
+class CurrentUser:
+    user_id: str
+    email: str
+    username: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user) -> "CurrentUser":
+        return cls(user_id=user.user_id, email=user.email, username=user.username)
+
+
+class TokenCache:
+    """
+    토큰 -> CurrentUser TTL/LRU 캐시
+    - 항목은 ttl_s 또는 토큰 만료(exp) 중 먼저 오는 시점에 만료
+    - 사용자 정보가 바뀌면 invalidate_user로 해당 사용자의 토큰을 모두 제거
+    """
+
+    def __init__(self, ttl_s: float, maxsize: int):
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, Tuple[CurrentUser, float]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        with self._lock:
+            item = self._items.get(token)
+            if item is None:
+                self.misses += 1
+                return None
+            principal, expires_at = item
+            if expires_at <= time.time():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._items.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    def put(self, token: str, principal: CurrentUser, token_exp: Optional[float] = None):
+        if self.ttl_s <= 0 or self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.ttl_s
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._remove(token)
+            self._items[token] = (principal, expires_at)
+            self._by_user.setdefault(principal.user_id, set()).add(token)
+            while len(self._items) > self.maxsize:
+                self._remove(next(iter(self._items)))
+
+    def invalidate_user(self, user_id: str):
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._by_user.clear()
+
+    def _remove(self, token: str):
+        item = self._items.pop(token, None)
+        if item is None:
+            return
+        tokens = self._by_user.get(item[0].user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[item[0].user_id]
+
+
+token_cache = TokenCache(ttl_s=settings.AUTH_CACHE_TTL_S, maxsize=settings.AUTH_CACHE_MAX_SIZE)
+
+
+class PasswordHashPool:
+    """
+    argon2 해싱/검증 전용 스레드 풀
+    - argon2-cffi는 해싱 중 GIL을 놓기 때문에 스레드로도 코어를 병렬 사용
+    - 대기 작업이 max_pending을 넘으면 기다리지 않고 429로 거절 (로그인 폭주 시 다른 요청 보호)
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_pending: int):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rejected = 0
+        self._pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="too_many_auth_requests",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(self.context.verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(
+    pwd_context,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
 # 비밀번호 검증
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -28,27 +170,42 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
+
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# 토큰 검증 후 (email, exp) 반환, 유효하지 않으면 None
+def decode_access_token(token: str) -> Optional[Tuple[str, Optional[float]]]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    return email, payload.get("exp")
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> CurrentUser:
     from app.models.user import User
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    # 캐시된 토큰은 서명 검증과 DB 조회를 모두 생략
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
+
+    decoded = decode_access_token(token)
+    if decoded is None:
         raise credentials_exception
-    
+    email, exp = decoded
+
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    principal = CurrentUser.from_user(user)
+    token_cache.put(token, principal, exp)
+    return principal
@@ -0,0 +1,443 @@
+"""
+ConnectionManager용 프로세스 간 메시지 백플레인
+- 여러 uvicorn 워커/노드에 머신 소켓과 앱 소켓이 흩어져 있어도
+  머신 -> 앱 브로드캐스트, 앱 -> 머신 명령, 머신 접속 위치(presence)를 공유
+- 브로드캐스트는 머신별 채널(apps:{machine_id})로 발행하고,
+  각 노드는 자기에게 앱이 붙어있는 머신의 채널만 구독
+- InMemoryBackplane: 단일 프로세스(또는 테스트에서 같은 broker를 공유하는 여러 매니저)
+- RedisBackplane: Redis 프로토콜(RESP)로 PUBLISH/SUBSCRIBE + HSET 사용
+"""
+import asyncio
+import json
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+# on_message(channel, message)
+MessageHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+APPS_CHANNEL_PREFIX = "apps:"
+
+
+def apps_channel(machine_id: str) -> str:
+    return f"{APPS_CHANNEL_PREFIX}{machine_id}"
+
+
+def node_channel(node_id: str) -> str:
+    return f"node:{node_id}"
+
+
+class BackplaneError(Exception):
+    pass
+
+
+class Backplane(ABC):
+    """백플레인 인터페이스 (채널 이름은 prefix 없는 논리 이름 사용)"""
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or uuid.uuid4().hex[:12]
+
+    @abstractmethod
+    async def start(self, on_message: MessageHandler):
+        """자기 노드 채널을 구독"""
+
+    @abstractmethod
+    async def subscribe_apps(self, machine_id: str):
+        """이 노드에 machine_id의 앱이 처음 붙었을 때 호출"""
+
+    @abstractmethod
+    async def unsubscribe_apps(self, machine_id: str):
+        """이 노드에서 machine_id의 마지막 앱이 떨어졌을 때 호출"""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        """메시지를 발행하고 수신한 구독자 수를 반환 (명령 전달용)"""
+
+    @abstractmethod
+    def publish_nowait(self, channel: str, message: Dict[str, Any]):
+        """응답을 기다리지 않고 발행 (텔레메트리/상태 릴레이용, 실패 시 버림)"""
+
+    @abstractmethod
+    async def set_machine_owner(self, machine_id: str):
+        """machine_id가 이 노드에 접속했음을 기록"""
+
+    @abstractmethod
+    async def clear_machine_owner(self, machine_id: str):
+        """이 노드가 소유한 경우에만 presence 삭제"""
+
+    @abstractmethod
+    async def get_machine_owner(self, machine_id: str) -> Optional[str]:
+        """machine_id가 붙어있는 노드 id (없으면 None)"""
+
+    @abstractmethod
+    async def get_machine_owners(self, machine_ids: List[str]) -> Dict[str, Optional[str]]:
+        """여러 머신의 노드 id를 한 번에 조회"""
+
+    async def close(self):
+        pass
+
+
+class InMemoryBroker:
+    """InMemoryBackplane끼리 공유하는 채널/presence 저장소"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, List[MessageHandler]] = {}
+        self.machine_owners: Dict[str, str] = {}
+
+
+_default_broker = InMemoryBroker()
+
+
+class InMemoryBackplane(Backplane):
+    def __init__(self, broker: Optional[InMemoryBroker] = None, node_id: Optional[str] = None):
+        super().__init__(node_id)
+        self.broker = broker or _default_broker
+        self._on_message: Optional[MessageHandler] = None
+        self._channels: Set[str] = set()
+
+    def _subscribe(self, channel: str):
+        if channel not in self._channels:
+            self._channels.add(channel)
+            self.broker.subscribers.setdefault(channel, []).append(self._on_message)
+
+    def _unsubscribe(self, channel: str):
+        if channel in self._channels:
+            self._channels.discard(channel)
+            subscribers = self.broker.subscribers.get(channel, [])
+            if self._on_message in subscribers:
+                subscribers.remove(self._on_message)
+            if not subscribers:
+                self.broker.subscribers.pop(channel, None)
+
+    async def start(self, on_message: MessageHandler):
+        self._on_message = on_message
+        self._subscribe(node_channel(self.node_id))
+
+    async def subscribe_apps(self, machine_id: str):
+        self._subscribe(apps_channel(machine_id))
+
+    async def unsubscribe_apps(self, machine_id: str):
+        self._unsubscribe(apps_channel(machine_id))
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        handlers = list(self.broker.subscribers.get(channel, []))
+        for handler in handlers:
+            await handler(channel, message)
+        return len(handlers)
+
+    def publish_nowait(self, channel: str, message: Dict[str, Any]):
+        # 구독자가 자기 자신뿐이면 origin 확인에서 버려질 메시지이므로 태스크도 만들지 않음
+        if any(handler is not self._on_message for handler in self.broker.subscribers.get(channel, [])):
+            asyncio.create_task(self.publish(channel, message))
+
+    async def set_machine_owner(self, machine_id: str):
+        self.broker.machine_owners[machine_id] = self.node_id
+
+    async def clear_machine_owner(self, machine_id: str):
+        if self.broker.machine_owners.get(machine_id) == self.node_id:
+            del self.broker.machine_owners[machine_id]
+
+    async def get_machine_owner(self, machine_id: str) -> Optional[str]:
+        return self.broker.machine_owners.get(machine_id)
+
+    async def get_machine_owners(self, machine_ids: List[str]) -> Dict[str, Optional[str]]:
+        return {machine_id: self.broker.machine_owners.get(machine_id) for machine_id in machine_ids}
+
+    async def close(self):
+        for channel in list(self._channels):
+            self._unsubscribe(channel)
+        for machine_id, owner in list(self.broker.machine_owners.items()):
+            if owner == self.node_id:
+                del self.broker.machine_owners[machine_id]
+
+
+class RedisBackplane(Backplane):
+    """
+    외부 라이브러리 없이 RESP를 직접 주고받는 Redis 백플레인 (커넥션 3개)
+    - 명령용: presence 조회/기록, 머신 명령 PUBLISH (lock으로 요청/응답 순서 보장)
+    - 발행용: publish_nowait 프레임을 큐에서 꺼내 응답을 기다리지 않고 연속으로 기록 (응답은 별도 태스크가 버림)
+    - 구독용: 노드 채널 + 앱이 붙어있는 머신 채널만 SUBSCRIBE
+    - 발행/구독 커넥션은 끊기면 backoff 후 재접속 (구독은 현재 채널 목록으로 다시 SUBSCRIBE)
+    """
+
+    def __init__(self, url: str, prefix: str = "perbrew", node_id: Optional[str] = None,
+                 connect_timeout_s: float = 5.0, publish_queue_size: int = 1000,
+                 reconnect_max_s: float = 5.0):
+        super().__init__(node_id)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.connect_timeout_s = connect_timeout_s
+        self.reconnect_max_s = reconnect_max_s
+        self.publish_queue_size = publish_queue_size
+        self.dropped = 0
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._sub_writer: asyncio.StreamWriter | None = None
+        self._channels: Set[str] = set()
+        self._on_message: Optional[MessageHandler] = None
+        self._sub_task: asyncio.Task | None = None
+        self._pub_queue: asyncio.Queue | None = None
+        self._pub_task: asyncio.Task | None = None
+        self._owned: set = set()
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    @classmethod
+    async def _read_reply(cls, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise BackplaneError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [await cls._read_reply(reader) for _ in range(length)]
+        raise BackplaneError(f"unexpected redis reply: {line!r}")
+
+    async def _request(self, reader, writer, *args):
+        writer.write(self._encode(*args))
+        await writer.drain()
+        return await self._read_reply(reader)
+
+    async def _open(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=self.connect_timeout_s
+        )
+        try:
+            if self.password:
+                await asyncio.wait_for(self._request(reader, writer, "AUTH", self.password), self.connect_timeout_s)
+            if self.db:
+                await asyncio.wait_for(self._request(reader, writer, "SELECT", self.db), self.connect_timeout_s)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def execute(self, *args):
+        async with self._lock:
+            if self._conn is None:
+                self._conn = await self._open()
+            try:
+                return await self._request(*self._conn, *args)
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                self._conn[1].close()
+                self._conn = None
+                raise
+
+    def _backoff(self, delay: float) -> float:
+        return min(delay * 2, self.reconnect_max_s)
+
+    # ---- 구독 ----
+    async def start(self, on_message: MessageHandler):
+        self._on_message = on_message
+        self._channels.add(self._key(node_channel(self.node_id)))
+        # 첫 연결은 기다려서 기동 시 설정 오류를 바로 드러냄
+        reader = await self._subscribe_all()
+        self._sub_task = asyncio.create_task(self._subscription_loop(reader))
+        self._pub_queue = asyncio.Queue(maxsize=self.publish_queue_size)
+        self._pub_task = asyncio.create_task(self._publish_loop())
+
+    async def _subscribe_all(self) -> asyncio.StreamReader:
+        reader, writer = await self._open()
+        channels = sorted(self._channels)
+        writer.write(self._encode("SUBSCRIBE", *channels))
+        await writer.drain()
+        self._sub_writer = writer
+        return reader
+
+    async def _subscription_loop(self, reader: asyncio.StreamReader | None):
+        delay = 0.1
+        while True:
+            try:
+                if reader is None:
+                    reader = await self._subscribe_all()
+                    print(f"[Backplane] redis subscription restored ({len(self._channels)} channels)")
+                await self._read_loop(reader)
+                delay = 0.1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Backplane] redis subscription lost: {e} (retry in {delay:.1f}s)")
+            if self._sub_writer is not None:
+                self._sub_writer.close()
+                self._sub_writer = None
+            reader = None
+            await asyncio.sleep(delay)
+            delay = self._backoff(delay)
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        prefix = self._key("")
+        while True:
+            reply = await self._read_reply(reader)
+            # subscribe/unsubscribe 확인 응답은 무시
+            if not isinstance(reply, list) or len(reply) != 3 or reply[0] != b"message":
+                continue
+            channel = reply[1].decode()[len(prefix):]
+            try:
+                await self._on_message(channel, json.loads(reply[2]))
+            except Exception as e:
+                print(f"[Backplane] failed to handle message on {channel}: {e}")
+
+    async def _send_subscription(self, command: str, channel: str):
+        # 끊겨 있으면 재접속 시 _channels 기준으로 다시 구독됨
+        if self._sub_writer is None:
+            return
+        try:
+            self._sub_writer.write(self._encode(command, channel))
+            await self._sub_writer.drain()
+        except (ConnectionError, OSError) as e:
+            print(f"[Backplane] failed to {command.lower()} {channel}: {e}")
+
+    async def subscribe_apps(self, machine_id: str):
+        channel = self._key(apps_channel(machine_id))
+        if channel not in self._channels:
+            self._channels.add(channel)
+            await self._send_subscription("SUBSCRIBE", channel)
+
+    async def unsubscribe_apps(self, machine_id: str):
+        channel = self._key(apps_channel(machine_id))
+        if channel in self._channels:
+            self._channels.discard(channel)
+            await self._send_subscription("UNSUBSCRIBE", channel)
+
+    # ---- 발행 ----
+    async def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        return await self.execute("PUBLISH", self._key(channel), json.dumps(message, separators=(",", ":")))
+
+    def publish_nowait(self, channel: str, message: Dict[str, Any]):
+        if self._pub_queue is None:
+            return
+        frame = self._encode("PUBLISH", self._key(channel), json.dumps(message, separators=(",", ":")))
+        try:
+            self._pub_queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _publish_loop(self):
+        delay = 0.1
+        while True:
+            frame = await self._pub_queue.get()
+            writer = drain_task = None
+            try:
+                reader, writer = await self._open()
+                # PUBLISH 응답(구독자 수)은 읽어서 버리기만 함
+                drain_task = asyncio.create_task(self._discard_replies(reader))
+                delay = 0.1
+                while True:
+                    writer.write(frame)
+                    # 쌓여 있는 프레임은 한 번에 기록
+                    while not self._pub_queue.empty():
+                        writer.write(self._pub_queue.get_nowait())
+                    await writer.drain()
+                    if drain_task.done():
+                        raise ConnectionError("redis publish connection closed")
+                    frame = await self._pub_queue.get()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 끊긴 동안의 릴레이 프레임은 버림 (최신 상태가 곧 다시 옴)
+                self.dropped += 1
+                print(f"[Backplane] redis publish connection lost: {e} (retry in {delay:.1f}s)")
+                await asyncio.sleep(delay)
+                delay = self._backoff(delay)
+            finally:
+                if drain_task is not None:
+                    drain_task.cancel()
+                if writer is not None:
+                    writer.close()
+
+    async def _discard_replies(self, reader: asyncio.StreamReader):
+        while True:
+            try:
+                await self._read_reply(reader)
+            except BackplaneError:
+                continue
+
+    # ---- presence ----
+    async def set_machine_owner(self, machine_id: str):
+        await self.execute("HSET", self._key("machines"), machine_id, self.node_id)
+        self._owned.add(machine_id)
+
+    async def clear_machine_owner(self, machine_id: str):
+        self._owned.discard(machine_id)
+        # 그 사이 다른 노드로 재접속했다면 지우지 않음
+        if await self.get_machine_owner(machine_id) == self.node_id:
+            await self.execute("HDEL", self._key("machines"), machine_id)
+
+    async def get_machine_owner(self, machine_id: str) -> Optional[str]:
+        owner = await self.execute("HGET", self._key("machines"), machine_id)
+        return owner.decode() if owner is not None else None
+
+    async def get_machine_owners(self, machine_ids: List[str]) -> Dict[str, Optional[str]]:
+        if not machine_ids:
+            return {}
+        owners = await self.execute("HMGET", self._key("machines"), *machine_ids)
+        return {
+            machine_id: owner.decode() if owner is not None else None
+            for machine_id, owner in zip(machine_ids, owners)
+        }
+
+    async def close(self):
+        for machine_id in list(self._owned):
+            try:
+                await self.clear_machine_owner(machine_id)
+            except Exception:
+                pass
+        for task in (self._sub_task, self._pub_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._sub_task = self._pub_task = None
+        self._pub_queue = None
+        if self._sub_writer is not None:
+            self._sub_writer.close()
+            self._sub_writer = None
+        if self._conn is not None:
+            self._conn[1].close()
+            self._conn = None
+        self._channels.clear()
+
+
+def create_backplane() -> Optional[Backplane]:
+    """WS_BACKPLANE 설정(none | redis | memory)에 맞는 백플레인 생성"""
+    kind = settings.WS_BACKPLANE.lower()
+    if kind == "redis":
+        return RedisBackplane(
+            settings.REDIS_URL,
+            prefix=settings.WS_BACKPLANE_PREFIX,
+            connect_timeout_s=settings.REDIS_CONNECT_TIMEOUT_S,
+        )
+    if kind == "memory":
+        return InMemoryBackplane()
+    return None
@@ -11,5 +11,108 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL")    
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))*24
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    # AsyncOpenAI 요청 타임아웃/재시도
+    OPENAI_TIMEOUT_S: float = float(os.getenv("OPENAI_TIMEOUT_S", "45"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
 
-settings = Settings()
\ No newline at end of file
+    # 비동기 DB 설정 (비워두면 DATABASE_URL에서 드라이버만 바꿔서 사용)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_ECHO: bool = os.getenv("DB_ECHO", "true").lower() == "true"
+
+    # BREW_DONE 로그 저장 큐 설정
+    BREW_LOG_QUEUE_SIZE: int = int(os.getenv("BREW_LOG_QUEUE_SIZE", "1000"))
+    BREW_LOG_BATCH_SIZE: int = int(os.getenv("BREW_LOG_BATCH_SIZE", "50"))
+    BREW_LOG_FLUSH_INTERVAL_S: float = float(os.getenv("BREW_LOG_FLUSH_INTERVAL_S", "0.2"))
+
+    # 앱 WebSocket 송신 큐 설정 (느린 클라이언트 보호)
+    WS_APP_QUEUE_SIZE: int = int(os.getenv("WS_APP_QUEUE_SIZE", "64"))
+    WS_APP_MAX_LAG_S: float = float(os.getenv("WS_APP_MAX_LAG_S", "5.0"))
+    # LOADCELL_VALUE 릴레이 최대 전송 빈도 (0이면 모든 프레임 그대로 전달)
+    WS_LOADCELL_MAX_HZ: float = float(os.getenv("WS_LOADCELL_MAX_HZ", "20"))
+
+    # 머신 상태(단계/마지막 접속/마지막 브루) machines 테이블 반영 주기 (메모리 상태는 즉시 갱신)
+    MACHINE_STATE_FLUSH_INTERVAL_S: float = float(os.getenv("MACHINE_STATE_FLUSH_INTERVAL_S", "5.0"))
+
+    # 머신으로 보내는 컴파일된 레시피 페이로드 캐시 크기 (0이면 캐시 안 함)
+    MACHINE_PAYLOAD_CACHE_SIZE: int = int(os.getenv("MACHINE_PAYLOAD_CACHE_SIZE", "1024"))
+
+    # 워커/노드 간 WebSocket 백플레인 (none | redis | memory)
+    # - 단일 프로세스는 none (로컬 전달만), 워커가 여럿이면 redis
+    # - memory는 같은 프로세스 안에서만 동작하므로 테스트용
+    WS_BACKPLANE: str = os.getenv("WS_BACKPLANE", "none")
+    WS_BACKPLANE_PREFIX: str = os.getenv("WS_BACKPLANE_PREFIX", "perbrew")
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    REDIS_CONNECT_TIMEOUT_S: float = float(os.getenv("REDIS_CONNECT_TIMEOUT_S", "5.0"))
+
+    # 인증 토큰 -> 사용자 캐시 (워커별 메모리 캐시이므로 TTL은 짧게)
+    AUTH_CACHE_TTL_S: float = float(os.getenv("AUTH_CACHE_TTL_S", "60"))
+    AUTH_CACHE_MAX_SIZE: int = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+
+    # argon2 비용 파라미터 및 해싱 전용 풀 (포화 시 429)
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST_KIB: int = int(os.getenv("ARGON2_MEMORY_COST_KIB", "65536"))
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", "4"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+    # 리뷰 기반 레시피 최적화 백그라운드 작업 (완료된 작업 결과는 TTL 동안 조회 가능)
+    REVIEW_JOB_QUEUE_SIZE: int = int(os.getenv("REVIEW_JOB_QUEUE_SIZE", "1000"))
+    REVIEW_JOB_WORKERS: int = int(os.getenv("REVIEW_JOB_WORKERS", "2"))
+    REVIEW_JOB_RESULT_TTL_S: float = float(os.getenv("REVIEW_JOB_RESULT_TTL_S", "3600"))
+
+    # 사용자별 추천 보정 모델 (리뷰 누적 잔차, prior가 클수록 천천히 반영)
+    PERSONALIZATION_ENABLED: bool = os.getenv("PERSONALIZATION_ENABLED", "true").lower() == "true"
+    PERSONALIZATION_PRIOR_WEIGHT: float = float(os.getenv("PERSONALIZATION_PRIOR_WEIGHT", "2.0"))
+    PERSONALIZATION_CACHE_TTL_S: float = float(os.getenv("PERSONALIZATION_CACHE_TTL_S", "300"))
+    PERSONALIZATION_CACHE_SIZE: int = int(os.getenv("PERSONALIZATION_CACHE_SIZE", "10000"))
+
+    # 레시피 크롤링 HTTP 커넥션 풀 / 타임아웃 (CRAWL_TOTAL_TIMEOUT_S: 페이지 요청 + 추출 전체)
+    CRAWL_HTTP_TIMEOUT_S: float = float(os.getenv("CRAWL_HTTP_TIMEOUT_S", "10"))
+    CRAWL_TOTAL_TIMEOUT_S: float = float(os.getenv("CRAWL_TOTAL_TIMEOUT_S", "60"))
+    CRAWL_MAX_CONNECTIONS: int = int(os.getenv("CRAWL_MAX_CONNECTIONS", "20"))
+    CRAWL_MAX_KEEPALIVE: int = int(os.getenv("CRAWL_MAX_KEEPALIVE", "10"))
+
+    # 크롤링 캐시 (CRAWL_CACHE_DIR를 비우면 디스크 저장 안 함)
+    # CRAWL_PAGE_FRESH_S 동안은 재검증 요청도 생략, 그 뒤로는 ETag/Last-Modified 조건부 GET
+    CRAWL_CACHE_DIR: str = os.getenv("CRAWL_CACHE_DIR", "./.crawl_cache")
+    CRAWL_CACHE_SIZE: int = int(os.getenv("CRAWL_CACHE_SIZE", "512"))
+    CRAWL_CACHE_DISK_MAX_ENTRIES: int = int(os.getenv("CRAWL_CACHE_DISK_MAX_ENTRIES", "5000"))
+    CRAWL_PAGE_FRESH_S: float = float(os.getenv("CRAWL_PAGE_FRESH_S", "600"))
+    CRAWL_PAGE_CACHE_TTL_S: float = float(os.getenv("CRAWL_PAGE_CACHE_TTL_S", "604800"))
+    CRAWL_EXTRACTION_CACHE_TTL_S: float = float(os.getenv("CRAWL_EXTRACTION_CACHE_TTL_S", "2592000"))
+    # 이보다 큰 페이지와 HTML이 아닌 응답은 페이지 캐시에 저장하지 않음 (문자 수 기준)
+    CRAWL_PAGE_CACHE_MAX_CHARS: int = int(os.getenv("CRAWL_PAGE_CACHE_MAX_CHARS", "1000000"))
+
+    # 로컬 레시피 추출 (JSON-LD/microdata/정규식): confidence가 기준 이상이면 LLM 호출 생략
+    CRAWL_PREPARSE_ENABLED: bool = os.getenv("CRAWL_PREPARSE_ENABLED", "true").lower() == "true"
+    CRAWL_PREPARSE_MIN_CONFIDENCE: float = float(os.getenv("CRAWL_PREPARSE_MIN_CONFIDENCE", "0.8"))
+
+    # 레시피 일괄 등록 (/recipe/batch) 요청당 최대 레시피 수
+    RECIPE_BATCH_MAX: int = int(os.getenv("RECIPE_BATCH_MAX", "500"))
+
+    # 대량 크롤링 (/recipe/crawl/bulk): 요청당 URL 수, 전체 동시 크롤링 수, 호스트별 동시 요청 수/요청 간격
+    CRAWL_BULK_MAX_URLS: int = int(os.getenv("CRAWL_BULK_MAX_URLS", "500"))
+    CRAWL_BULK_CONCURRENCY: int = int(os.getenv("CRAWL_BULK_CONCURRENCY", "8"))
+    CRAWL_PER_HOST_CONCURRENCY: int = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+    CRAWL_PER_HOST_DELAY_S: float = float(os.getenv("CRAWL_PER_HOST_DELAY_S", "1.0"))
+
+    # 레시피 추천 모델 데이터와 빌드된 아티팩트(.npy + meta.json) 저장 위치
+    OPTIMIZER_DATA_PATH: str = os.getenv("OPTIMIZER_DATA_PATH", "./app/services/coffee_data.csv")
+    OPTIMIZER_ARTIFACT_DIR: str = os.getenv("OPTIMIZER_ARTIFACT_DIR", "./app/services/model_artifacts")
+
+    # 레시피 추천 탐색 설정
+    # - grid: 미리 계산한 격자(OPTIMIZER_GRID_POINTS³) 점 중에서만 선택
+    # - adaptive: 격자에서 고른 후보 주변을 보간기로 좁혀가며 재탐색 (격자는 11 정도로 낮춰도 됨)
+    OPTIMIZER_SEARCH: str = os.getenv("OPTIMIZER_SEARCH", "grid")
+    OPTIMIZER_GRID_POINTS: int = int(os.getenv("OPTIMIZER_GRID_POINTS", "31"))
+    OPTIMIZER_REFINE_SEEDS: int = int(os.getenv("OPTIMIZER_REFINE_SEEDS", "8"))
+    OPTIMIZER_REFINE_ITERATIONS: int = int(os.getenv("OPTIMIZER_REFINE_ITERATIONS", "4"))
+    OPTIMIZER_REFINE_POINTS: int = int(os.getenv("OPTIMIZER_REFINE_POINTS", "5"))
+    # estimate_outcome 양자화 키 LRU 캐시 크기 (0이면 캐시 안 함)
+    OPTIMIZER_OUTCOME_CACHE_SIZE: int = int(os.getenv("OPTIMIZER_OUTCOME_CACHE_SIZE", "4096"))
+
+settings = Settings()
@@ -1,4 +1,7 @@
+from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -10,7 +13,7 @@ SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 # SQLlite 멀티스레딩 지원
 connect_args = {"check_same_thread": False}
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL,echo = True, connect_args=connect_args)
+engine = create_engine(SQLALCHEMY_DATABASE_URL,echo = settings.DB_ECHO, connect_args=connect_args)
 
 # 세션 팩토리 생성
 Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -18,6 +21,62 @@ Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # 모델들이 상속받을 Base 클래스
 Base = declarative_base()
 
+
+# 동기 드라이버 -> 비동기 드라이버 매핑
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(url: str) -> str:
+    """동기 DATABASE_URL을 같은 DB를 가리키는 비동기 드라이버 URL로 변환"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str, **kwargs):
+    """커넥션 풀 설정을 적용한 AsyncEngine 생성 (sqlite 메모리 DB는 풀 옵션 없이 생성)"""
+    parsed = make_url(url)
+    options = {"echo": settings.DB_ECHO, "pool_pre_ping": True}
+    if parsed.get_backend_name() == "sqlite":
+        # aiosqlite도 스레드 위에서 돌기 때문에 동일 옵션 필요
+        options["connect_args"] = {"check_same_thread": False}
+    if "poolclass" not in kwargs and parsed.database not in (None, "", ":memory:"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    options.update(kwargs)
+    try:
+        return create_async_engine(url, **options)
+    except ImportError as e:
+        # DATABASE_URL에서 자동으로 바꾼 드라이버가 설치되어 있지 않은 경우
+        raise RuntimeError(
+            f"async database driver '{parsed.drivername}' is not installed ({e}). "
+            f"Install it or set ASYNC_DATABASE_URL to an installed async driver."
+        ) from e
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = create_async_db_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+
+# 비동기 세션 팩토리 (commit 이후에도 응답 직렬화에 객체를 쓰기 위해 expire 하지 않음)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 def init_db():
     Base.metadata.create_all(engine)
 
@@ -26,4 +85,15 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# 비동기 세션 팩토리 의존성 (WebSocket처럼 세션을 짧게 여러 번 열어야 하는 곳에서 사용)
+def get_async_sessionmaker() -> async_sessionmaker:
+    return AsyncSessionLocal
+
+async def get_async_db(session_factory: async_sessionmaker = Depends(get_async_sessionmaker)):
+    async with session_factory() as db:
+        yield db
+
+async def close_async_db():
+    await async_engine.dispose()
@@ -1,21 +1,40 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.core.database import init_db 
+from app.core.database import init_db, close_async_db
+from app.controller.brew_log_service import brew_log_queue
+from app.controller.machine_state_service import machine_states
+from app.controller.review_service import review_jobs
+from app.controller.ws_service import ws_manager
+from app.core.backplane import create_backplane
+from app.core.auth import password_pool
+from app.services.coffee_optimizer import load_model
 from app.routes.user_router import router as user_router
 from app.routes.bean_router  import router as bean_router
 from app.routes.recipe_router import router as recipe_router
 from app.routes.review_router import router as review_router
 from app.routes.machine_router import router as machine_router
 from app.routes.ws_router import router as ws_router
+from app.controller.recipe_service import RecipeController
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 애플리케이션 시작 시 데이터베이스 초기화
     init_db()
+    # 레시피 추천 모델 (CSV가 바뀐 경우에만 아티팩트 재빌드)
+    load_model()
+    # 워커 간 WebSocket 라우팅용 백플레인
+    await ws_manager.start_backplane(create_backplane())
     yield
     # 애플리케이션 종료 시 정리 작업 (필요한 경우 여기에 추가)  
+    await brew_log_queue.stop()
+    await machine_states.stop()
+    await review_jobs.stop()
+    await ws_manager.stop_backplane()
+    await close_async_db()
+    await RecipeController.close_clients()
+    password_pool.shutdown()
 
 app = FastAPI(
     title="Coffee Machine API",
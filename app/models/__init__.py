@@ -5,6 +5,7 @@ from app.models.bean import CoffeeBean
 from app.models.recipe import Recipe, PouringStep
 from app.models.machine import Machine
 from app.models.brew_log import BrewLog
+from app.models.taste_model import UserTasteModel
 #from app.models.review import Review
 
 __all__ = [
@@ -16,5 +17,6 @@ __all__ = [
     "PouringStep",
     "Machine",
     "BrewLog",
+    "UserTasteModel",
 #    "Review",
 ]
@@ -1,5 +1,5 @@
 # models/brew_log.py
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -60,6 +60,11 @@ class BrewLog(Base):
 
     bean = relationship("CoffeeBean", back_populates="brew_logs")
     machine = relationship("Machine", back_populates="brew_logs")
+
+    # 사용자별 키셋 페이지네이션 (user_id, brewed_at, log_id)
+    __table_args__ = (
+        Index("ix_brew_logs_user_brewed_at_log_id", "user_id", "brewed_at", "log_id"),
+    )
     
     def __repr__(self):
         return f"<BrewLog(log_id={self.log_id}, brew_id={self.brew_id}, user_id={self.user_id})>"
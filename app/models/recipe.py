@@ -1,5 +1,5 @@
 # models/recipe.py
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship , backref
 from datetime import datetime
 from app.core.database import Base
@@ -54,6 +54,12 @@ class Recipe(Base):
         cascade="all, delete-orphan"  # optional, depending on your needs
     )
     children = relationship("Recipe", backref = backref('parent', remote_side=[recipe_id]))
+
+    # 키셋 페이지네이션 정렬 순서 (created_at, recipe_id)
+    __table_args__ = (
+        Index("ix_recipes_created_at_recipe_id", "created_at", "recipe_id"),
+        Index("ix_recipes_user_source_created_at", "user_id", "source", "created_at", "recipe_id"),
+    )
     def __repr__(self):
         return f"<Recipe(recipe_id={self.recipe_id}, name={self.recipe_name})>"
 
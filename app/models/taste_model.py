@@ -0,0 +1,21 @@
+# models/taste_model.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime
+from app.core.database import Base
+
+
+class UserTasteModel(Base):
+    """사용자별 추천 보정 모델 (app.services.personalization.ResidualModel 직렬화)"""
+    __tablename__ = "user_taste_models"
+
+    # Primary Key (1:1 relationship with User)
+    user_id = Column(String(36), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+
+    n_reviews = Column(Integer, default=0, nullable=False)
+    # 3x3x3 격자 누적값 (JSON)
+    state = Column(Text, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UserTasteModel(user_id={self.user_id}, n_reviews={self.n_reviews})>"
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import APIRouter, HTTPException, status, Query, Depends
 from sqlalchemy.orm import Session
 from app.core.database import get_db
@@ -22,10 +23,14 @@ def create_bean(payload: BeanCreate, db: Session = Depends(get_db)):
 def list_beans(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset mode)"),
+    include_total: Optional[bool] = Query(None, description="default: true in page mode, false in cursor mode"),
     db: Session = Depends(get_db)
 ):
-    """원두 목록 조회 (페이지네이션)"""
-    result = BeanController.get_list(db, page, page_size)
+    """원두 목록 조회 (페이지네이션, cursor를 넘기면 키셋 모드)"""
+    if include_total is None:
+        include_total = cursor is None
+    result = BeanController.get_list(db, page, page_size, cursor, include_total)
     return result
 
 
@@ -76,11 +76,11 @@ Body (JSON): { "brew_id": "string", "recipe_id": "string", "result": { "tds": nu
 400: { "error": "invalid_body", "message": "..." }
 
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, HTTPException, status, Query, Depends
 from app.controller.machine_service import MachineController
-from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.database import get_async_db
+from app.core.auth import get_current_user, CurrentUser
 from app.models.user import User
 from app.schemas.machine_schema import (
     BrewRequest,           # { user_id, recipe_id }
@@ -96,7 +96,7 @@ router = APIRouter()
 async def regist_machine(
     machine_id: str, 
     payload: MachineRegisterSchema,  # MachineRegisterSchema 대신 새로운 스키마 사용
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # user_id 파라미터 제거, current_user 전달
     print("machine register request : " + machine_id)
@@ -111,8 +111,8 @@ async def regist_machine(
 async def prepare_brewing(
     machine_id: str, 
     payload: BrewRequest, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     return await MachineController.send_brewing_recipe(db, current_user, machine_id, payload)
 
@@ -120,8 +120,8 @@ async def prepare_brewing(
 @router.post("/log")
 async def create_brew_log(
     payload: MachineBrewLog, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     # usr_id 파라미터 제거, current_user 전달
     return await MachineController.create_brew_log(db, current_user, payload)
@@ -130,18 +130,27 @@ async def create_brew_log(
 async def update_nickname(
     machine_id: str,
     payload: MachineNicknameUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     return await MachineController.update_nickname(db, current_user, machine_id, payload)
 
 @router.get('/list')
 async def get_machine_list(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     return await MachineController.get_machine_list(db, current_user)
 
+# 머신 실시간 상태 (online, 단계, 무게 등은 WebSocket 프레임으로 갱신된 메모리 값)
+@router.get("/{machine_id}/status")
+async def get_machine_status(
+    machine_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    return await MachineController.get_machine_status(db, current_user, machine_id)
+
 #############################################################################################
 #############################################################################################
 # deprecated : 브루잉 요청 API -> ws_router의 웹소켓으로 대체
@@ -149,7 +158,7 @@ async def get_machine_list(
 @router.post("/{machine_id}/start")
 async def start_brewing(
     machine_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     return await MachineController.send_brewing_request(current_user, machine_id)
 
@@ -158,7 +167,7 @@ async def start_brewing(
 @router.post("/{machine_id}/stop")
 async def stop_brewing(
     machine_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     return await MachineController.stop_brewing(current_user, machine_id)
 
@@ -7,6 +7,14 @@ Body (JSON): { "name": "string", "dose_g": number, "water_g": number, "water_tem
 422: { "error": "validation_error", "message": "...", "details": { "field": "..." } }
 
 
+Batch Recipe Registration	레시피 일괄 등록 (한 트랜잭션)
+POST	/recipe/batch
+App	to Server
+Headers: Authorization: Bearer <token>, Content-Type: application/json
+Body (JSON): { "recipes": [ { ...레시피 등록과 같은 형식 } ] }	201: { "created": integer, "recipe_ids": [ integer ] }
+422: { "detail": [ { "type": "too_many_recipes", "loc": ["body", "recipes"], ... } ] }  (RECIPE_BATCH_MAX 초과)
+
+
 Get Recipe List	레시피 목록 조회	
 GET	/recipe/recipe_list	
 App to Server	
@@ -54,22 +62,56 @@ Example: /recipe/crawling/?url=https://example.com/post	200: { "recipe": { "name
 422: { "error": "parse_failed", "message": "..." }
 
 
+Bulk Crawling Recipes	여러 URL 크롤링 (결과 스트리밍)
+POST	/recipe/crawl/bulk
+App to	ETCs
+Headers: Authorization: Bearer <token>, Accept: application/x-ndjson (기본) | text/event-stream
+Body (JSON): { "urls": [ "string" ], "save": boolean(false) }	200 (stream): 한 줄(이벤트)씩
+{ "type": "result", "index": integer, "url": "string", "status": "ok" | "failed" | "invalid", "recipe"?: { ... }, "warnings"?: [ "string" ], "error"?: "string" }
+마지막: { "type": "summary", "total": integer, "ok": integer, "failed": integer, "invalid": integer, "saved_recipe_ids"?: [ integer ] }
+422: { "detail": "too_many_urls" }
+
+
+Generate Recipe	설명으로 레시피 생성 (토큰 스트리밍)
+POST	/recipe/generate
+App to	Server
+Headers: Authorization: Bearer <token>, Content-Type: application/json
+Body (JSON): { "description": "string", "bean_id"?: integer }	200 (text/event-stream):
+event: token  data: { "type": "token", "text": "string" }  (생성 중 반복)
+event: extracting  data: { "type": "extracting" }
+event: recipe  data: { "type": "recipe", "recipe_id": integer, "recipe": { ... }, "warnings": [ "string" ] }
+event: error  data: { "type": "error", "detail": "generation_failed" | "parse_failed" | "save_failed" | "openai_unavailable" }
+404: { "error": "bean_not_found", "message": "..." }
+
+
 """
 
 
-from fastapi import APIRouter, HTTPException, status, Query, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.auth import get_current_user
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.config import settings
+from app.core.database import get_db, get_async_sessionmaker
+from app.core.auth import get_current_user, CurrentUser
 from app.models.user import User
 from app.controller.recipe_service import RecipeController
+from app.controller.crawl_service import CrawlController
+from app.utils.streaming import (
+    NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE, STREAM_HEADERS, encode_ndjson, encode_sse,
+)
 from app.schemas.recipe_schema import (
     RecipeCreate,
     RecipeRead,
     RecipeListItem,
     RecipeUpdate,
     PaginatedRecipes,
+    BulkCrawlRequest,
+    GenerateRecipeRequest,
+    RecipeBatchCreate,
+    RecipeBatchResult,
 )
 
 router = APIRouter()
@@ -79,22 +121,41 @@ router = APIRouter()
 def create_recipe(
     payload: RecipeCreate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     created = RecipeController.register_recipe(db, payload, current_user)
     if not created:
         raise HTTPException(status_code=500, detail="failed_to_create_recipe")
     return created
 
+# 레시피 일괄 등록 (한 트랜잭션, 하나라도 실패하면 전체 롤백)
+@router.post("/batch", response_model=RecipeBatchResult, status_code=status.HTTP_201_CREATED)
+def create_recipes_batch(
+    payload: RecipeBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    # 개수 제한(RECIPE_BATCH_MAX)은 RecipeBatchCreate 검증에서 먼저 확인
+    try:
+        recipe_ids = RecipeController.register_recipes(db, payload.recipes, current_user)
+    except Exception as e:
+        print(f"Failed to import recipes: {e}")
+        raise HTTPException(status_code=500, detail="failed_to_create_recipes")
+    return {"created": len(recipe_ids), "recipe_ids": recipe_ids}
+
 # 레시피 목록 조회
 @router.get("/", response_model=PaginatedRecipes, status_code=status.HTTP_200_OK)
 def list_recipes(
     page: int = Query(1, ge=1), 
     page_size: int = Query(20, ge=1, le=100), 
     bean_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset mode)"),
+    include_total: Optional[bool] = Query(None, description="default: true in page mode, false in cursor mode"),
     db: Session = Depends(get_db)
 ):
-    result = RecipeController.recipe_list(db, page, page_size, bean_id)
+    if include_total is None:
+        include_total = cursor is None
+    result = RecipeController.recipe_list(db, page, page_size, bean_id, cursor, include_total)
     if result is None:
         raise HTTPException(status_code=500, detail="failed_to_fetch_recipes")
     return result
@@ -102,9 +163,12 @@ def list_recipes(
 
 # 레시피 크롤링 - 구체적 경로이므로 /{recipe_id}보다 먼저 등록
 @router.get("/crawl", status_code=status.HTTP_200_OK)
-def crawl_recipe(url: str = Query(..., description="URL to crawl")):
-    """URL에서 레시피를 크롤링합니다."""
-    data = RecipeController.crawl_recipe(url)
+async def crawl_recipe(url: str = Query(..., description="URL to crawl")):
+    """URL에서 레시피를 크롤링합니다. (비동기 HTTP/OpenAI 클라이언트 사용, 스레드풀 미사용)"""
+    try:
+        data = await RecipeController.crawl_recipe_async(url)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="crawl_timeout")
     if not data:
         raise HTTPException(status_code=422, detail="parse_failed")
     return {
@@ -114,12 +178,57 @@ def crawl_recipe(url: str = Query(..., description="URL to crawl")):
     }
 
 
+# 여러 URL 크롤링 - 결과를 준비되는 대로 NDJSON(기본) 또는 SSE로 스트리밍
+@router.post("/crawl/bulk", status_code=status.HTTP_200_OK)
+async def bulk_crawl_recipes(
+    payload: BulkCrawlRequest,
+    request: Request,
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    if len(payload.urls) > settings.CRAWL_BULK_MAX_URLS:
+        raise HTTPException(status_code=422, detail="too_many_urls")
+
+    sse = SSE_MEDIA_TYPE in request.headers.get("accept", "")
+    encode = encode_sse if sse else encode_ndjson
+
+    async def stream():
+        async for item in CrawlController.bulk_crawl(
+            payload.urls, payload.save, current_user.user_id, session_factory
+        ):
+            yield encode(item)
+
+    return StreamingResponse(
+        stream(), media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE, headers=STREAM_HEADERS
+    )
+
+
+# 레시피 생성 - 생성 텍스트를 SSE로 바로 흘려보내고, 끝나면 구조화해서 source='generated'로 저장
+@router.post("/generate", status_code=status.HTTP_200_OK)
+async def generate_recipe(
+    payload: GenerateRecipeRequest,
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    # 스트림을 시작하기 전에 검증 (시작 후에는 상태 코드를 바꿀 수 없음)
+    if payload.bean_id is not None and not await RecipeController.bean_exists(session_factory, payload.bean_id):
+        raise HTTPException(status_code=404, detail="bean_not_found")
+
+    async def stream():
+        async for item in RecipeController.generate_recipe_stream(
+            payload.description, current_user.user_id, session_factory, payload.bean_id
+        ):
+            yield encode_sse(item)
+
+    return StreamingResponse(stream(), media_type=SSE_MEDIA_TYPE, headers=STREAM_HEADERS)
+
+
 # 추천 레시피 목록 - 구체적 경로이므로 /{recipe_id}보다 먼저 등록
 @router.get("/recommend", response_model=List[RecipeListItem], status_code=status.HTTP_200_OK)
 def recommend_recipes(
     limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """JWT 토큰의 사용자 맞춤 추천 레시피 목록 조회"""
     items = RecipeController.recommend_recipe(db, current_user.user_id, limit)
@@ -131,11 +240,15 @@ def recommend_recipes(
 def generated_recipes(
     page: int = Query(1, ge=1), 
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset mode)"),
+    include_total: Optional[bool] = Query(None, description="default: true in page mode, false in cursor mode"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """JWT 토큰의 사용자가 생성한 레시피 목록 조회"""
-    result = RecipeController.generated_recipes(db, current_user.user_id, page, page_size)
+    if include_total is None:
+        include_total = cursor is None
+    result = RecipeController.generated_recipes(db, current_user.user_id, page, page_size, cursor, include_total)
     if result is None:
         raise HTTPException(status_code=404, detail="no_generated_recipes")
     return result
@@ -156,7 +269,7 @@ def update_recipe(
     recipe_id: int, 
     payload: RecipeUpdate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     updated = RecipeController.update_recipe(db, recipe_id, payload, current_user)
     if not updated:
@@ -168,7 +281,7 @@ def update_recipe(
 def delete_recipe(
     recipe_id: int, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     deleted = RecipeController.delete_recipe(db, recipe_id, current_user)
     if not deleted:
@@ -2,14 +2,9 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.recipe import PouringStep, Recipe
-from app.models.brew_log import BrewLog as BrewLogModel
-# assume you have a function that modifies recipe based on feedback
-from app.models.user import User
-from app.services.coffee_optimizer import modify_recipe_based_on_feedback
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.database import get_async_db, get_async_sessionmaker
+from app.controller.review_service import ReviewController, ReviewJob, review_jobs
 
 router = APIRouter()
 ratio = [0.7,0.8,0.9,1.0,1.1,1.2,1.3]
@@ -21,78 +16,54 @@ class ReviewSubmit(BaseModel):
     intensity: int      # 1-7
     notes: Optional[str] = None
 
-@router.post("/reviews")
-def submit_review(
+@router.post("/reviews", status_code=status.HTTP_202_ACCEPTED)
+async def submit_review(
     review: ReviewSubmit,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker),
 ):
-    brew_log = db.query(BrewLogModel).filter(
-        BrewLogModel.log_id == review.brew_log_id,
-    ).first()
+    """피드백을 저장하고 레시피 최적화는 백그라운드 작업으로 넘김 (결과는 앱 소켓 또는 job 조회로 확인)"""
+    if review_jobs.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="review_queue_full",
+            headers={"Retry-After": "1"},
+        )
 
-    # Save review data to brew log
-    brew_log.review_taste = review.taste
-    brew_log.review_tds = review.tds
-    brew_log.review_weight = review.weight
-    brew_log.review_intensity = review.intensity
-    brew_log.review_notes = review.notes
+    brew_log = await ReviewController.save_review(
+        db, review.brew_log_id, review.taste, review.tds, review.weight, review.intensity, review.notes
+    )
+    if brew_log is None:
+        raise HTTPException(status_code=404, detail="brew_log_not_found")
 
-    recipe = db.query(Recipe).filter(Recipe.recipe_id == brew_log.recipe_id).first()
-    print(recipe)
-    # Generate modified recipe
-    new_recipe_data = modify_recipe_based_on_feedback(
-        original_recipe=recipe,
+    job = ReviewJob(
+        brew_log_id=brew_log.log_id,
+        user_id=brew_log.user_id,
+        machine_id=brew_log.machine_id,
         taste=review.taste,
         tds=review.tds,
         weight=review.weight,
         intensity=review.intensity,
+        session_factory=session_factory,
     )
-    pour_r = new_recipe_data['ratio']
-    new_recipe_data.pop('ratio')
-    new_recipe_data.pop('predicted_tds')
-    new_recipe_data.pop('predicted_taste')
-    new_recipe_data.pop('goal_tds')
-    new_recipe_data.pop('goal_taste')
-
-    # new_recipe_data.pop('recipe')
-    new_recipe = Recipe(
-        user_id="auto",
-        # recipe_name=f"{brew_log.brew_id} (modified {brew_log.log_id})",
-        seed=True,
-        dose_g = recipe.dose_g,
-        # copy all other fields + modified parameters
-        **new_recipe_data
-
-    )
-    
-    db.add(new_recipe)
-    db.flush()  # get new_recipe.recipe_id
-    pouring_steps = [
-        PouringStep(recipe_id=new_recipe.recipe_id, step_number=1, water_g=60.0, pour_time_s=20.0),
-        PouringStep(
-            recipe_id=new_recipe.recipe_id,
-            step_number=2,
-            water_g=200*pour_r/(pour_r+1),
-            pour_time_s=20.0,
-            wait_time_s=20.0,
-        ),
-        PouringStep(
-            recipe_id=new_recipe.recipe_id,
-            step_number=3,
-            water_g=200/(pour_r+1),
-            pour_time_s=20.0,
-        ),
-    ]
-    for step in pouring_steps:
-        db.add(step)
+    if not review_jobs.submit(job):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="review_queue_full",
+            headers={"Retry-After": "1"},
+        )
 
-    db.refresh(new_recipe)
-    # Link as child
-    brew_log.child_recipe_id = new_recipe.recipe_id
+    return {
+        "message": "Review saved, new recipe is being generated",
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/review/jobs/{job.job_id}",
+    }
 
-    db.commit()
 
-    return {
-        "message": "Review saved and new recipe generated",
-        "new_recipe_id": new_recipe.recipe_id
-    }
\ No newline at end of file
+@router.get("/jobs/{job_id}")
+def get_review_job(job_id: str):
+    job = review_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return job.to_dict()
@@ -56,10 +56,12 @@ PUT	/sur/{user_id}/update
 
 """
 
+from typing import Optional
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.auth import get_current_user  # auth 모듈에서 get_current_user 가져오기
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_db
+from app.core.auth import get_current_user, CurrentUser  # auth 모듈에서 get_current_user 가져오기
 from app.models.user import User  # User 모델 가져오기 (타입 힌팅용)
 from app.models.brew_log import BrewLog as BrewLogModel
 from app.controller.users_service import UserController
@@ -81,16 +83,16 @@ router = APIRouter()
 # 회원가입 / 로그인 / 개인정보 업데이트
 #-----------------------------------
 @router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def signup(payload: UserSignUp, db: Session = Depends(get_db)):
-    created = UserController.signup(db, payload)
+async def signup(payload: UserSignUp, db: AsyncSession = Depends(get_async_db)):
+    created = await UserController.signup(db, payload)
     if not created:
         raise HTTPException(status_code=409, detail="email_in_use")
     return created
 
 @router.post("/login", response_model=TokenResponse, status_code=status.HTTP_200_OK)
-async def login(payload: UserLogin, db: Session = Depends(get_db)):
+async def login(payload: UserLogin, db: AsyncSession = Depends(get_async_db)):
     print("login request for : " + payload.email)
-    token = UserController.login(db, payload)
+    token = await UserController.login(db, payload)
     if not token:
         raise HTTPException(status_code=401, detail="invalid_credentials")
     return token
@@ -102,19 +104,19 @@ async def login(payload: UserLogin, db: Session = Depends(get_db)):
 @router.get("/me/info", response_model=UserRead, status_code=status.HTTP_200_OK)
 def get_user_info(
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     return current_user
 
 
 
 @router.patch("/me/info", response_model=UserRead, status_code=status.HTTP_200_OK)
-def update_user_info(
+async def update_user_info(
     payload: UserInfoUpdate, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    updated = UserController.update_user_info(db, current_user.user_id, payload)
+    updated = await UserController.update_user_info(db, current_user.user_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="user_not_found")
     return updated
@@ -123,10 +125,10 @@ def update_user_info(
 
 @router.get("/me/pref", response_model=UserPreference, status_code=status.HTTP_200_OK)
 def get_user_pref(
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    # DB 세션 불필요, current_user 전달
-    return UserController.get_user_pref(current_user)
+    return UserController.get_user_pref(db, current_user)
 
 
 
@@ -134,7 +136,7 @@ def get_user_pref(
 def set_user_pref(
     payload: UserPreferenceUpdate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     pref = UserController.set_user_pref(db, current_user, payload)
     if pref is None:
@@ -149,10 +151,14 @@ def set_user_pref(
 def get_brew_log(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset mode)"),
+    include_total: Optional[bool] = Query(None, description="default: true in page mode, false in cursor mode"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    result = UserController.get_brew_log(db, current_user.user_id, page, page_size)
+    if include_total is None:
+        include_total = cursor is None
+    result = UserController.get_brew_log(db, current_user.user_id, page, page_size, cursor, include_total)
     if result is None:
         raise HTTPException(status_code=404, detail="user_not_found_or_no_logs")
     return result
@@ -162,7 +168,7 @@ def get_brew_log(
 def create_brew_log(
     payload: BrewLogCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     # payload contains: recipe_id, brew_id, tds, temperature_c, machine_id, etc.
     brew_log = BrewLogModel(
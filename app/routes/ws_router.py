@@ -1,14 +1,13 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, status
-from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from app.core.database import get_db
+from app.core.database import get_async_sessionmaker
 from app.controller.ws_service import ws_manager
-from app.core.config import settings
+from app.core.auth import CurrentUser, decode_access_token, get_current_user, token_cache
 from app.models.user import User
-from app.models.machine import Machine
-from app.controller.machine_service import MachineController
-from app.schemas.machine_schema import MachineBrewLog
+from app.controller.brew_log_service import BrewDoneJob, brew_log_queue
+from app.controller.machine_state_service import machine_states
 
 import json
 
@@ -19,17 +18,20 @@ router = APIRouter()
 async def websocket_machine_endpoint(
         websocket: WebSocket, 
         machine_id: str, 
-        db: Session = Depends(get_db)
+        session_factory: async_sessionmaker = Depends(get_async_sessionmaker)
     ):
     await ws_manager.connect_machine(machine_id, websocket)
+    machine_states.connected(machine_id)
     try:
         while True:
             data = await websocket.receive_json()
+            # 상태는 메모리에만 반영 (DB는 주기적으로 묶어서 기록)
+            machine_states.observe(machine_id, data)
             # 비즈니스 로직은 서비스 계층으로 위임
             msg_type = await ws_manager.process_machine_message(machine_id, data)
             if msg_type == "BREW_DONE":
                 try:
-                    await handle_brew_done(machine_id, data, db)
+                    handle_brew_done(machine_id, data, session_factory)
                 except Exception as e:
                     print(f"[WS Error] handle_brew_done failed: {e}")
                     await ws_manager.broadcast_to_apps(
@@ -41,12 +43,20 @@ async def websocket_machine_endpoint(
                     )
             
     except WebSocketDisconnect:
-        ws_manager.disconnect_machine(machine_id)
+        pass
     except json.JSONDecodeError:
         print(f"[WS Error] Machine {machine_id} sent non-JSON data")
+        try:
+            await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        except Exception:
+            pass
     except Exception as e:
         print(f"[WS Error] Machine {machine_id}: {e}")
-        ws_manager.disconnect_machine(machine_id)
+    finally:
+        # 어떤 이유로 끝나든 접속 해제 처리 (온라인 상태가 남지 않게)
+        # 이미 같은 머신이 다시 접속해 있으면 새 연결은 그대로 둠
+        if ws_manager.disconnect_machine(machine_id, websocket):
+            machine_states.disconnected(machine_id)
 
 
 # [App] 앱 연결
@@ -55,27 +65,28 @@ async def websocket_app_endpoint(
     websocket: WebSocket, 
     machine_id: str, 
     token: str = Query(...), 
-    db: Session = Depends(get_db)
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker)
 ):
-    # JWT 토큰 검증 및 사용자 확인
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    # JWT 토큰 검증 및 사용자 확인 (HTTP 인증과 같은 토큰 캐시 사용)
+    user = token_cache.get(token)
+    if user is None:
+        decoded = decode_access_token(token)
+        if decoded is None:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
-        
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
+        email, exp = decoded
+
+        # 소켓이 살아있는 동안 세션을 잡고 있지 않도록 조회 직후 반환
+        async with session_factory() as db:
+            row = (await db.execute(select(User).where(User.email == email))).scalars().first()
+        if row is None:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
-        user_identifier = email
-
-    except JWTError:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
+        user = CurrentUser.from_user(row)
+        token_cache.put(token, user, exp)
+    user_identifier = user.email
     
-    await ws_manager.connect_app(machine_id, websocket, user.email)
+    await ws_manager.connect_app(machine_id, websocket, user.email, user.user_id)
     try:
         while True:
             data = await websocket.receive_json()
@@ -94,8 +105,8 @@ async def websocket_app_endpoint(
         ws_manager.disconnect_app(machine_id, websocket)
 
 
-async def handle_brew_done(machine_id: str, data: dict, db: Session):
-    # 1. 머신 소유자 찾기
+def handle_brew_done(machine_id: str, data: dict, session_factory: async_sessionmaker):
+    # DB 저장은 백그라운드 큐로 넘기고 수신 루프는 바로 다음 프레임 처리
     recipe_id = data.get("recipe_id")
     if not recipe_id:
         recipe_id = ws_manager.get_last_recipe(machine_id)
@@ -104,29 +115,23 @@ async def handle_brew_done(machine_id: str, data: dict, db: Session):
             raise ValueError("No recipe_id in message and no last recipe found")
         print(f"[WS] Using last prepared recipe_id: {recipe_id}")
 
-    machine = db.query(Machine).filter(Machine.machine_id == machine_id).first()
-    if not machine:
-        print(f"[WS] BREW_DONE but machine row not found: {machine_id}")
-        return
-
-    user = db.query(User).get(machine.user_id)
-    if not user:
-        print(f"[WS] BREW_DONE but user not found: machine_id={machine_id}")
-        return
-
-    brew_log_payload = MachineBrewLog(
-        recipe_id=recipe_id,
+    job = BrewDoneJob(
         machine_id=machine_id,
-        result=data.get("result", {}),
+        recipe_id=recipe_id,
+        result=data.get("result") or {},
+        session_factory=session_factory,
     )
+    if not brew_log_queue.submit(job):
+        raise RuntimeError("brew log queue is full")
+
+
+# 브루잉 로그 저장 큐 상태 (큐 길이, flush 지연시간) - 로그인한 사용자만
+@router.get("/metrics/brew_log_queue", dependencies=[Depends(get_current_user)])
+async def brew_log_queue_metrics():
+    return brew_log_queue.metrics()
 
-    log_result = await MachineController.create_brew_log(db, user, brew_log_payload)
 
-    await ws_manager.broadcast_to_apps(
-        machine_id,
-        {
-            "type": "BREW_LOG_CREATED",
-            "machine_id": machine_id,
-            "log": log_result,
-        },
-    )
\ No newline at end of file
+# 머신 상태 레지스트리 (메모리 머신 수, DB 반영 대기 수) - 로그인한 사용자만
+@router.get("/metrics/machine_states", dependencies=[Depends(get_current_user)])
+async def machine_state_metrics():
+    return machine_states.metrics()
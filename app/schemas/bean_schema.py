@@ -45,4 +45,5 @@ class PaginatedBeans(BaseModel):
     items: List[BeanRead]
     page: int
     page_size: int
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
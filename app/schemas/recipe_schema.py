@@ -1,8 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+from pydantic_core import PydanticCustomError
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from app.core.config import settings
+
 
 class TechniqueEnum(str, Enum):
     center = "center"
@@ -57,6 +60,37 @@ class RecipeCreate(BaseModel):
     pouring_steps: List[PouringStepCreate]
 
 
+class BulkCrawlRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1)
+    save: bool = False  # True면 성공한 레시피를 한 트랜잭션으로 저장
+
+
+class GenerateRecipeRequest(BaseModel):
+    description: str = Field(..., min_length=1, max_length=2000)
+    bean_id: Optional[int] = None
+
+
+class RecipeBatchCreate(BaseModel):
+    recipes: List[RecipeCreate] = Field(..., min_length=1)
+
+    # 레시피별 검증 전에 개수부터 확인 (RECIPE_BATCH_MAX 초과 요청은 항목을 하나도 검증하지 않고 422)
+    @field_validator("recipes", mode="before")
+    @classmethod
+    def check_batch_size(cls, value):
+        if isinstance(value, list) and len(value) > settings.RECIPE_BATCH_MAX:
+            raise PydanticCustomError(
+                "too_many_recipes",
+                "at most {max} recipes per batch",
+                {"max": settings.RECIPE_BATCH_MAX},
+            )
+        return value
+
+
+class RecipeBatchResult(BaseModel):
+    created: int
+    recipe_ids: List[int]
+
+
 class RecipeUpdate(BaseModel):
     recipe_name: Optional[str] = None
     bean_id: Optional[int] = None
@@ -129,3 +163,4 @@ class PaginatedRecipes(BaseModel):
     page: int
     page_size: int
     total: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -79,3 +79,4 @@ class PaginatedBrewLogs(BaseModel):
     page: int
     page_size: int
     total: Optional[int]
+    next_cursor: Optional[str] = None
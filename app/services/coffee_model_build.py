@@ -0,0 +1,143 @@
+"""
+레시피 추천 모델 오프라인 빌드
+- coffee_data.csv를 pandas로 읽고 scipy 보간으로 fine grid를 계산해서 아티팩트로 저장
+- 서버 요청 경로에서는 import하지 않음 (아티팩트가 없을 때 load_model이 한 번만 사용)
+
+사용법: python -m app.services.coffee_model_build [--csv PATH] [--out DIR] [--points N]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import RegularGridInterpolator
+
+from app.core.config import settings
+from app.services.coffee_optimizer import (
+    ARTIFACT_ARRAYS,
+    ARTIFACT_VERSION,
+    artifact_path,
+    csv_fingerprint,
+)
+
+
+def _build_arrays(csv_path: str, n_points: int) -> dict:
+    """CSV에서 데이터 격자(3x3x3)와 미리 계산한 fine grid 배열들을 만듦"""
+    df = pd.read_csv(csv_path)
+
+    # Parse TDS from "a/b" format
+    def parse_tds(x):
+        try:
+            if pd.isna(x) or '/' not in str(x):
+                return np.nan
+            a, b = str(x).split('/', 1)
+            return float(a.strip()) / float(b.strip())
+        except:
+            return np.nan
+
+    df['tds'] = df['tds'].apply(parse_tds)
+
+    # Manual fixes for known typos (safe to keep even if CSV is corrected)
+    fixes = {13: 0.85/1.08, 18: 0.81/1.05, 19: 0.73/0.92, 21: 0.55/0.70}
+    for num, val in fixes.items():
+        if 'recipe_num' in df.columns:
+            df.loc[df['recipe_num'] == num, 'tds'] = val
+
+    # Grid setup
+    grind_levels = np.array([75, 90, 105])
+    ratio_levels = np.sort(df['ratio'].unique())  # usually [1.0, 1.6667, 3.0]
+    temp_levels = np.array([85, 90, 95])
+
+    tds_grid = np.zeros((3, 3, 3))
+    taste_grid = np.zeros((3, 3, 3))
+
+    grind_map = {75: 0, 90: 1, 105: 2}
+    ratio_map = {ratio_levels[0]: 0, ratio_levels[1]: 1, ratio_levels[2]: 2}
+    temp_map = {85: 0, 90: 1, 95: 2}
+
+    for _, row in df.iterrows():
+        g_idx = grind_map[row['grind_level']]
+        r_idx = ratio_map[row['ratio']]
+        t_idx = temp_map[row['water_temp_c']]
+        tds_grid[g_idx, r_idx, t_idx] = row['tds']
+        taste_grid[g_idx, r_idx, t_idx] = row['taste']
+
+    axes = (grind_levels, ratio_levels, temp_levels)
+    tds_interp = RegularGridInterpolator(axes, tds_grid, bounds_error=False, fill_value=None)
+    taste_interp = RegularGridInterpolator(axes, taste_grid, bounds_error=False, fill_value=None)
+
+    # Pre-compute fine grid for fast recommendations
+    fine_grind = np.linspace(75, 105, n_points)
+    fine_ratio = np.linspace(1.0, 3.0, n_points)
+    fine_temp = np.linspace(85, 95, n_points)
+
+    G, R, T = np.meshgrid(fine_grind, fine_ratio, fine_temp, indexing='ij')
+    points = np.column_stack([G.ravel(), R.ravel(), T.ravel()])
+
+    return {
+        'grind_levels': grind_levels.astype(float),
+        'ratio_levels': ratio_levels.astype(float),
+        'temp_levels': temp_levels.astype(float),
+        'tds_grid': tds_grid,
+        'taste_grid': taste_grid,
+        'grind': fine_grind,
+        'ratio': fine_ratio,
+        'temp': fine_temp,
+        'tds': tds_interp(points).reshape((n_points, n_points, n_points)),
+        'taste': taste_interp(points).reshape((n_points, n_points, n_points)),
+    }
+
+
+def build_artifact(csv_path: str, artifact_dir: str, n_points: int) -> str:
+    """
+    모델 배열을 .npy(메모리 맵 가능) + meta.json 디렉터리로 저장하고 경로를 반환
+    - 임시 디렉터리에 쓴 뒤 rename하므로 여러 워커가 동시에 빌드해도 먼저 끝난 하나만 남음
+    """
+    csv_sha256 = csv_fingerprint(csv_path)
+    path = artifact_path(artifact_dir, csv_sha256, n_points)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        return path
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    arrays = _build_arrays(csv_path, n_points)
+    for name in ARTIFACT_ARRAYS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'csv_sha256': csv_sha256,
+        'n_points': n_points,
+        'built_at': time.time(),
+        'arrays': list(ARTIFACT_ARRAYS),
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # 다른 워커가 먼저 만들었으면 그쪽을 사용
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            raise
+    print(f"Coffee tuning model artifact built: {path}")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the coffee optimizer model artifact")
+    parser.add_argument("--csv", default=settings.OPTIMIZER_DATA_PATH)
+    parser.add_argument("--out", default=settings.OPTIMIZER_ARTIFACT_DIR)
+    parser.add_argument("--points", type=int, default=settings.OPTIMIZER_GRID_POINTS)
+    args = parser.parse_args(argv)
+    print(build_artifact(args.csv, args.out, args.points))
+
+
+if __name__ == "__main__":
+    main()
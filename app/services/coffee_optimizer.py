@@ -1,110 +1,248 @@
 # coffee_tuner.py
 # Modular coffee recipe tuning system based on your 27-point dataset
 
-import numpy as np
-import pandas as pd
-from scipy.interpolate import RegularGridInterpolator
+import hashlib
+import json
 import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.core.config import settings
+
+# 요청 처리 경로는 NumPy만 사용 (pandas/scipy는 coffee_model_build의 오프라인 빌드에서만 import)
+
+# 아티팩트 포맷이 바뀌면 올려서 기존 캐시를 무효화
+ARTIFACT_VERSION = 1
+ARTIFACT_ARRAYS = (
+    'grind_levels', 'ratio_levels', 'temp_levels', 'tds_grid', 'taste_grid',
+    'grind', 'ratio', 'temp', 'tds', 'taste',
+)
 
 # Global variables (built once at startup)
 _interpolators = None
 _fine_grid = None
 _ratio_levels = None
+_model_meta = None
 
-def load_and_build_model(csv_path: str = "./app/services/coffee_data.csv") -> None:
+
+class TrilinearInterpolator:
     """
-    Load the dataset and build the interpolation model.
-    Call this once at server startup.
+    NumPy만 쓰는 3차원 선형 보간기 (scipy RegularGridInterpolator(method='linear', fill_value=None)와 같은 결과)
+    - 격자 밖의 점은 가장 가까운 칸의 선형식으로 외삽
     """
-    global _interpolators, _fine_grid, _ratio_levels
 
-    df = pd.read_csv(csv_path)
+    def __init__(self, axes, values):
+        self.axes = tuple(np.asarray(a, dtype=float) for a in axes)
+        self.values = np.asarray(values, dtype=float)
+
+    def __call__(self, points) -> np.ndarray:
+        points = np.asarray(points, dtype=float)
+        shape = points.shape[:-1]
+        points = points.reshape(-1, len(self.axes))
+
+        idx, frac = [], []
+        for d, axis in enumerate(self.axes):
+            x = points[:, d]
+            i = np.clip(np.searchsorted(axis, x) - 1, 0, len(axis) - 2)
+            idx.append(i)
+            frac.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+
+        (i, j, k), (u, v, w) = idx, frac
+        c = self.values
+        c00 = c[i, j, k] * (1 - w) + c[i, j, k + 1] * w
+        c01 = c[i, j + 1, k] * (1 - w) + c[i, j + 1, k + 1] * w
+        c10 = c[i + 1, j, k] * (1 - w) + c[i + 1, j, k + 1] * w
+        c11 = c[i + 1, j + 1, k] * (1 - w) + c[i + 1, j + 1, k + 1] * w
+        c0 = c00 * (1 - v) + c01 * v
+        c1 = c10 * (1 - v) + c11 * v
+        return (c0 * (1 - u) + c1 * u).reshape(shape)
+
+
+def _axis_weights(axis: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """한 축에 대한 선형 보간 가중치 행렬 (len(x), len(axis)) - 격자 밖은 외삽"""
+    axis = np.asarray(axis, dtype=float)
+    x = np.asarray(x, dtype=float)
+    i = np.clip(np.searchsorted(axis, x) - 1, 0, len(axis) - 2)
+    f = (x - axis[i]) / (axis[i + 1] - axis[i])
+    weights = np.zeros((len(x), len(axis)))
+    rows = np.arange(len(x))
+    weights[rows, i] = 1 - f
+    weights[rows, i + 1] = f
+    return weights
+
+
+def data_axes() -> tuple:
+    """데이터 격자(3x3x3)의 축 (grind, ratio, temp) - 사용자 보정 모델이 같은 격자를 사용"""
+    _ensure_model()
+    return _interpolators['tds'].axes
+
+
+def _personalized_interpolators(correction: dict | None) -> dict:
+    """데이터 격자(3x3x3)에 보정값을 더한 보간기만 반환 (몇 개 점만 예측할 때는 fine grid가 필요 없음)"""
+    if correction is None:
+        return _interpolators
+    axes = _interpolators['tds'].axes
+    return {
+        key: TrilinearInterpolator(axes, _interpolators[key].values + np.asarray(correction[key], dtype=float))
+        for key in ('tds', 'taste')
+    }
 
-    # Parse TDS from "a/b" format
-    def parse_tds(x):
-        try:
-            if pd.isna(x) or '/' not in str(x):
-                return np.nan
-            a, b = str(x).split('/', 1)
-            return float(a.strip()) / float(b.strip())
-        except:
-            return np.nan
 
-    df['tds'] = df['tds'].apply(parse_tds)
+def _personalized(correction: dict | None):
+    """
+    데이터 격자 위의 보정값 {'tds', 'taste'}(3x3x3)을 더한 (fine grid, 보간기) 반환
+    - fine grid는 데이터 격자의 삼선형 보간이므로 축별 가중치 행렬로 보정값만 펼쳐서 더함
+    """
+    if correction is None:
+        return _fine_grid, _interpolators
+    axes = _interpolators['tds'].axes
+    weights = [_axis_weights(axis, _fine_grid[name]) for axis, name in zip(axes, ('grind', 'ratio', 'temp'))]
+    grid = dict(_fine_grid)
+    for key in ('tds', 'taste'):
+        delta = np.asarray(correction[key], dtype=float)
+        grid[key] = _fine_grid[key] + np.einsum('ia,jb,kc,abc->ijk', *weights, delta)
+    return grid, _personalized_interpolators(correction)
+
+
+def _install(arrays: dict, meta: dict) -> None:
+    """배열들로 보간기와 fine grid 전역 상태를 설정 (배열은 memmap이어도 됨)"""
+    global _interpolators, _fine_grid, _ratio_levels, _model_meta
+
+    axes = (arrays['grind_levels'], arrays['ratio_levels'], arrays['temp_levels'])
+    _interpolators = {
+        'tds': TrilinearInterpolator(axes, arrays['tds_grid']),
+        'taste': TrilinearInterpolator(axes, arrays['taste_grid']),
+    }
+    _ratio_levels = arrays['ratio_levels']
+    _fine_grid = {key: arrays[key] for key in ('grind', 'ratio', 'temp', 'tds', 'taste')}
+    _model_meta = meta
+    outcome_cache.clear()
+
 
-    # Manual fixes for known typos (safe to keep even if CSV is corrected)
-    fixes = {13: 0.85/1.08, 18: 0.81/1.05, 19: 0.73/0.92, 21: 0.55/0.70}
-    for num, val in fixes.items():
-        if 'recipe_num' in df.columns:
-            df.loc[df['recipe_num'] == num, 'tds'] = val
+def load_and_build_model(csv_path: str | None = None, n_points: int | None = None) -> None:
+    """
+    Load the dataset and build the interpolation model in memory (no artifact).
+    n_points: resolution of the precomputed grid per axis (default: settings.OPTIMIZER_GRID_POINTS)
+    """
+    from app.services.coffee_model_build import _build_arrays
 
-    # Grid setup
-    grind_levels = np.array([75, 90, 105])
-    ratio_levels = np.sort(df['ratio'].unique())  # usually [1.0, 1.6667, 3.0]
-    temp_levels = np.array([85, 90, 95])
+    csv_path = csv_path or settings.OPTIMIZER_DATA_PATH
+    n_points = n_points or settings.OPTIMIZER_GRID_POINTS
+    _install(_build_arrays(csv_path, n_points), {
+        'version': ARTIFACT_VERSION,
+        'csv_sha256': csv_fingerprint(csv_path),
+        'n_points': n_points,
+        'path': None,
+    })
 
-    _ratio_levels = ratio_levels
+    print("Coffee tuning model loaded and ready!")
 
-    tds_grid = np.zeros((3, 3, 3))
-    taste_grid = np.zeros((3, 3, 3))
 
-    grind_map = {75: 0, 90: 1, 105: 2}
-    ratio_map = {ratio_levels[0]: 0, ratio_levels[1]: 1, ratio_levels[2]: 2}
-    temp_map = {85: 0, 90: 1, 95: 2}
+def csv_fingerprint(csv_path: str) -> str:
+    with open(csv_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-    for _, row in df.iterrows():
-        g_idx = grind_map[row['grind_level']]
-        r_idx = ratio_map[row['ratio']]
-        t_idx = temp_map[row['water_temp_c']]
-        tds_grid[g_idx, r_idx, t_idx] = row['tds']
-        taste_grid[g_idx, r_idx, t_idx] = row['taste']
 
-    # Build interpolators
-    tds_interp = RegularGridInterpolator(
-        (grind_levels, ratio_levels, temp_levels), tds_grid,
-        bounds_error=False, fill_value=None
-    )
-    taste_interp = RegularGridInterpolator(
-        (grind_levels, ratio_levels, temp_levels), taste_grid,
-        bounds_error=False, fill_value=None
-    )
+def artifact_path(artifact_dir: str, csv_sha256: str, n_points: int) -> str:
+    # 버전/CSV 해시/해상도가 이름에 들어가므로 CSV가 바뀌면 자연히 새 아티팩트를 사용
+    return os.path.join(artifact_dir, f"v{ARTIFACT_VERSION}-{csv_sha256[:16]}-n{n_points}")
 
-    _interpolators = {'tds': tds_interp, 'taste': taste_interp}
 
-    # Pre-compute fine grid for fast recommendations
-    n_points = 31
-    fine_grind = np.linspace(75, 105, n_points)
-    fine_ratio = np.linspace(1.0, 3.0, n_points)
-    fine_temp = np.linspace(85, 95, n_points)
+def load_model(csv_path: str | None = None, artifact_dir: str | None = None, n_points: int | None = None) -> dict:
+    """
+    서버 시작 시 호출: 아티팩트를 메모리 맵으로 읽어 모델을 설정하고 메타데이터 반환
+    - CSV 해시에 맞는 아티팩트가 없을 때만 빌드 (python -m app.services.coffee_model_build로 미리 빌드 가능)
+    - 워커들은 같은 파일을 읽기 전용 mmap으로 공유 (페이지 캐시 공유)
+    """
+    csv_path = csv_path or settings.OPTIMIZER_DATA_PATH
+    artifact_dir = artifact_dir or settings.OPTIMIZER_ARTIFACT_DIR
+    n_points = n_points or settings.OPTIMIZER_GRID_POINTS
+
+    path = artifact_path(artifact_dir, csv_fingerprint(csv_path), n_points)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        # 배포 시 미리 빌드해두면 이 경로(pandas/scipy import)는 타지 않음
+        from app.services.coffee_model_build import build_artifact
+        path = build_artifact(csv_path, artifact_dir, n_points)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('version') != ARTIFACT_VERSION or meta.get('n_points') != n_points:
+        raise RuntimeError(f"Incompatible optimizer artifact: {path}")
+
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+        for name in ARTIFACT_ARRAYS
+    }
+    _install(arrays, {**meta, 'path': path})
+    return _model_meta
 
-    G, R, T = np.meshgrid(fine_grind, fine_ratio, fine_temp, indexing='ij')
-    points = np.column_stack([G.ravel(), R.ravel(), T.ravel()])
 
-    fine_tds = _interpolators['tds'](points).reshape((n_points, n_points, n_points))
-    fine_taste = _interpolators['taste'](points).reshape((n_points, n_points, n_points))
+def model_info() -> dict | None:
+    return _model_meta
 
-    _fine_grid = {
-        'grind': fine_grind,
-        'ratio': fine_ratio,
-        'temp': fine_temp,
-        'tds': fine_tds,
-        'taste': fine_taste,
-        'points': points
-    }
 
-    print("Coffee tuning model loaded and ready!")
+def _ensure_model() -> None:
+    if _fine_grid is None:
+        load_model()
 
 
-def estimate_outcome(grind: float, ratio: float, temp: float) -> dict:
+class OutcomeCache:
     """
-    Predict TDS and taste for any recipe (even outside original points).
+    estimate_outcome 결과 LRU 캐시
+    - 키는 응답 자릿수에 맞춰 양자화한 (grind, ratio, temp), 예측도 양자화한 점에서 계산
+    - 모델이 다시 로드되면 비움
     """
-    if _interpolators is None:
-        load_and_build_model()
-    point = np.array([[grind, ratio, temp]])
-    pred_tds = _interpolators['tds'](point)[0]
-    pred_taste = _interpolators['taste'](point)[0]
 
+    # grind 0.1, ratio 0.001, temp 0.1 단위
+    QUANTUM = (0.1, 0.001, 0.1)
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def key(cls, grind: float, ratio: float, temp: float) -> tuple:
+        return tuple(int(round(v / q)) for v, q in zip((grind, ratio, temp), cls.QUANTUM))
+
+    @classmethod
+    def point(cls, key: tuple) -> list:
+        return [k * q for k, q in zip(key, cls.QUANTUM)]
+
+    def get(self, key: tuple):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: tuple):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def info(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items), 'maxsize': self.maxsize}
+
+
+outcome_cache = OutcomeCache(maxsize=settings.OPTIMIZER_OUTCOME_CACHE_SIZE)
+
+
+def _outcome(grind: float, ratio: float, temp: float, pred_tds, pred_taste) -> dict:
     return {
         'grind_level': float(grind),
         'ratio': float(ratio),
@@ -114,85 +252,269 @@ def estimate_outcome(grind: float, ratio: float, temp: float) -> dict:
     }
 
 
-def recommend_next_recipe(
-    base_tds: float,
-    base_taste: float,
-    taste_fb: int,
-    tds_fb: int,
-    weight_fb: float = 4.0,   # 1~7
-    intensity_fb: float = 4.0, # 1~7
-    top_k: int = 5
-) -> list[dict]:
+def estimate_outcome(grind: float, ratio: float, temp: float, correction: dict | None = None) -> dict:
     """
-    로컬 코드 스타일의 추천: multiplicative goal 조정 + 가중치 error
+    Predict TDS and taste for any recipe (even outside original points).
+    correction: optional per-user residual on the data grid (see app.services.personalization)
+    - 보정이 없는 호출은 양자화 키 LRU 캐시 사용
     """
-    if _fine_grid is None:
-        raise RuntimeError("Model not loaded.")
-
-    # 로컬 스타일 adjustment factor (지수 방식)
-    def adjustment_factor(likert, intensity):
-        deviation = likert - 4
-        if deviation == 0:
-            return 1.0
-        elif deviation < 0:  # too sour/weak → increase
-            return (0.94) ** (-deviation * intensity)
-        else:
-            return (1 / 0.9) ** (deviation * intensity)
+    _ensure_model()
+    if correction is not None:
+        interpolators = _personalized_interpolators(correction)
+        point = np.array([[grind, ratio, temp]])
+        return _outcome(grind, ratio, temp, interpolators['tds'](point)[0], interpolators['taste'](point)[0])
+
+    key = OutcomeCache.key(grind, ratio, temp)
+    cached = outcome_cache.get(key)
+    if cached is None:
+        point = np.array([OutcomeCache.point(key)])
+        cached = (_interpolators['tds'](point)[0], _interpolators['taste'](point)[0])
+        outcome_cache.put(key, cached)
+    return _outcome(grind, ratio, temp, *cached)
+
+
+def estimate_outcomes(grinds, ratios, temps, correction: dict | None = None) -> list[dict]:
+    """
+    여러 레시피를 한 번에 예측 (목록 화면 등), 보간기 호출은 배열 전체에 대해 한 번씩
+    - estimate_outcome과 같은 양자화 점에서 계산하므로 결과가 일치 (캐시는 거치지 않음)
+    """
+    _ensure_model()
+    grinds, ratios, temps = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float)) for v in (grinds, ratios, temps))
+    )
+    points = np.column_stack([grinds, ratios, temps])
+    if correction is None:
+        interpolators = _interpolators
+        quantum = np.array(OutcomeCache.QUANTUM)
+        points = np.round(points / quantum) * quantum
+    else:
+        interpolators = _personalized_interpolators(correction)
+    pred_tds = interpolators['tds'](points)
+    pred_taste = interpolators['taste'](points)
+    return [
+        _outcome(g, r, t, p_tds, p_taste)
+        for g, r, t, p_tds, p_taste in zip(grinds, ratios, temps, pred_tds, pred_taste)
+    ]
+
+
+def _adjustment_factor(likert, intensity):
+    """로컬 스타일 adjustment factor (지수 방식), 배열 입력 지원"""
+    deviation = np.asarray(likert, dtype=float) - 4
+    # too sour/weak(deviation < 0) → increase, deviation == 0 이면 어느 쪽이든 1.0
+    return np.where(
+        deviation < 0,
+        0.94 ** (-deviation * intensity),
+        (1 / 0.9) ** (deviation * intensity),
+    )
+
 
+def _goal_values(base_tds, base_taste, taste_fb, tds_fb, weight_fb, intensity_fb):
+    """피드백으로 목표 TDS/taste 계산 (입력은 스칼라 또는 같은 길이의 배열)"""
     # intensity와 weight를 스케일링 (로컬처럼 1-7 → factor)
-    intensity = intensity_fb / 4.0
-    weight_taste = weight_fb / 4.0
-    calc_w = weight_taste  # 로컬에서 사용된 방식
+    intensity = np.asarray(intensity_fb, dtype=float) / 4.0
+    weight_taste = np.asarray(weight_fb, dtype=float) / 4.0
 
-    adj_taste = adjustment_factor(taste_fb, intensity)
-    adj_tds = adjustment_factor(tds_fb, intensity)
+    adj_taste = _adjustment_factor(taste_fb, intensity)
+    adj_tds = _adjustment_factor(tds_fb, intensity)
 
-    goal_taste = base_taste * (adj_taste ** (1 / calc_w))
-    goal_tds = base_tds * (adj_tds ** calc_w)
+    goal_taste = np.asarray(base_taste, dtype=float) * (adj_taste ** (1 / weight_taste))
+    goal_tds = np.asarray(base_tds, dtype=float) * (adj_tds ** weight_taste)
 
     # 클리핑
     goal_taste = np.clip(goal_taste, 1.0, 8.0)
     goal_tds = np.clip(goal_tds, 0.3, 2.0)
+    return goal_tds, goal_taste, weight_taste
 
-    # 로컬 스타일 error: 덧셈 + weight
-    diff_tds = np.abs(_fine_grid['tds'] - goal_tds)
-    diff_taste = np.abs(_fine_grid['taste'] - goal_taste)
-    error = diff_tds + (weight_taste * diff_taste)
 
-    best_idxs = np.argsort(error.ravel())[:top_k * 3]
+def _candidate(rank: int, g: float, r: float, t: float, pred_tds, pred_taste, goal_tds: float, goal_taste: float) -> dict:
+    return {
+        'rank': rank,
+        'grind_level': g,
+        'ratio': r,
+        'brew_ratio_1_to': round(1 / r, 2),
+        'water_temp_c': t,
+        'predicted_tds': round(pred_tds, 4),
+        'predicted_taste': round(pred_taste, 2),
+        'goal_tds': round(goal_tds, 4),
+        'goal_taste': round(goal_taste, 2),
+    }
+
 
+def _format_candidates(best_idxs, goal_tds: float, goal_taste: float, top_k: int, grid: dict | None = None) -> list[dict]:
+    grid = grid if grid is not None else _fine_grid
+    shape = grid['tds'].shape
     results = []
     seen = set()
     for idx in best_idxs:
-        i, j, k = np.unravel_index(idx, error.shape)
-        g = round(_fine_grid['grind'][i], 1)
-        r = round(_fine_grid['ratio'][j], 3)
-        t = round(_fine_grid['temp'][k], 1)
+        i, j, k = np.unravel_index(idx, shape)
+        g = round(grid['grind'][i], 1)
+        r = round(grid['ratio'][j], 3)
+        t = round(grid['temp'][k], 1)
         key = (g, r, t)
         if key in seen:
             continue
         seen.add(key)
 
-        pred_tds = round(_fine_grid['tds'][i, j, k], 4)
-        pred_taste = round(_fine_grid['taste'][i, j, k], 2)
-
-        results.append({
-            'rank': len(results) + 1,
-            'grind_level': g,
-            'ratio': r,
-            'brew_ratio_1_to': round(1 / r, 2),
-            'water_temp_c': t,
-            'predicted_tds': pred_tds,
-            'predicted_taste': pred_taste,
-            'goal_tds': round(goal_tds, 4),
-            'goal_taste': round(goal_taste, 2),
-        })
+        results.append(_candidate(
+            len(results) + 1, g, r, t,
+            grid['tds'][i, j, k], grid['taste'][i, j, k], goal_tds, goal_taste,
+        ))
+        if len(results) >= top_k:
+            break
+    return results
+
+
+def _grid_top_indices(goal_tds, goal_taste, weight_taste, n_candidates: int, chunk_size: int, grid: dict | None = None):
+    """
+    격자에서 행마다 error가 가장 작은 n_candidates개의 flat index를 error 순으로 반환
+    - 전체 정렬 대신 argpartition으로 후보만 고른 뒤 그 안에서만 정렬
+    - error 행렬은 (chunk_size, grid 크기) 버퍼 두 개를 재사용해서 in-place로 계산 (캐시에 들어가는 크기 유지)
+    """
+    grid = grid if grid is not None else _fine_grid
+    grid_tds = grid['tds'].ravel()
+    grid_taste = grid['taste'].ravel()
+    n_candidates = min(n_candidates, grid_tds.size)
+
+    error_buf = np.empty((min(chunk_size, len(goal_tds)), grid_tds.size))
+    taste_buf = np.empty_like(error_buf)
+
+    for start in range(0, len(goal_tds), chunk_size):
+        g_tds = goal_tds[start:start + chunk_size, None]
+        g_taste = goal_taste[start:start + chunk_size, None]
+        w = weight_taste[start:start + chunk_size, None]
+        error = error_buf[:len(g_tds)]
+        diff_taste = taste_buf[:len(g_tds)]
+
+        # 로컬 스타일 error: 덧셈 + weight, shape (chunk, grid)
+        np.subtract(grid_tds, g_tds, out=error)
+        np.abs(error, out=error)
+        np.subtract(grid_taste, g_taste, out=diff_taste)
+        np.abs(diff_taste, out=diff_taste)
+        diff_taste *= w
+        error += diff_taste
+
+        if n_candidates < grid_tds.size:
+            candidates = np.argpartition(error, n_candidates - 1, axis=1)[:, :n_candidates]
+        else:
+            candidates = np.broadcast_to(np.arange(grid_tds.size), error.shape)
+        order = np.argsort(np.take_along_axis(error, candidates, axis=1), axis=1, kind='stable')
+        yield from np.take_along_axis(candidates, order, axis=1)
+
+
+def _refine(goal_tds: float, goal_taste: float, weight_taste: float, seed_idxs, top_k: int,
+            grid: dict | None = None, interpolators: dict | None = None) -> list[dict]:
+    """
+    격자 후보(seed) 주변을 보간기로 직접 평가하며 좁혀가는 국소 탐색
+    - 매 반복마다 중심 ±half 범위를 축마다 OPTIMIZER_REFINE_POINTS개로 샘플링, 가장 좋은 점으로 이동 후 half를 절반으로
+    - 평가 횟수: seeds × iterations × points³ (격자 해상도와 무관)
+    """
+    grid = grid if grid is not None else _fine_grid
+    interpolators = interpolators if interpolators is not None else _interpolators
+    axes = (grid['grind'], grid['ratio'], grid['temp'])
+    shape = grid['tds'].shape
+    lo = np.array([a[0] for a in axes])
+    hi = np.array([a[-1] for a in axes])
+
+    def error_at(points):
+        tds = interpolators['tds'](points)
+        taste = interpolators['taste'](points)
+        return np.abs(tds - goal_tds) + weight_taste * np.abs(taste - goal_taste), tds, taste
+
+    seed_pos = np.unravel_index(np.asarray(seed_idxs), shape)
+    centers = np.column_stack([a[i] for a, i in zip(axes, seed_pos)])
+    best_err = error_at(centers)[0]
+
+    n = max(settings.OPTIMIZER_REFINE_POINTS, 2)
+    offsets = np.stack(np.meshgrid(*[np.linspace(-1, 1, n)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    half = (hi - lo) / (np.array(shape) - 1)  # 처음에는 격자 한 칸
+    rows = np.arange(len(centers))
+    for _ in range(settings.OPTIMIZER_REFINE_ITERATIONS):
+        points = np.clip(centers[:, None, :] + offsets * half, lo, hi)
+        err = error_at(points.reshape(-1, 3))[0].reshape(len(centers), -1)
+        best = err.argmin(axis=1)
+        improved = err[rows, best] < best_err
+        centers = np.where(improved[:, None], points[rows, best], centers)
+        best_err = np.where(improved, err[rows, best], best_err)
+        half = half / 2
+
+    # 응답과 같은 자릿수로 반올림한 점에서 다시 평가해서 정렬
+    rounded = np.column_stack([centers[:, 0].round(1), centers[:, 1].round(3), centers[:, 2].round(1)])
+    err, tds, taste = error_at(rounded)
+
+    results = []
+    seen = set()
+    for s in np.argsort(err, kind='stable'):
+        g, r, t = (float(v) for v in rounded[s])
+        if (g, r, t) in seen:
+            continue
+        seen.add((g, r, t))
+        results.append(_candidate(len(results) + 1, g, r, t, tds[s], taste[s], goal_tds, goal_taste))
         if len(results) >= top_k:
             break
+    return results
+
+
+def recommend_next_recipes(
+    base_tds,
+    base_taste,
+    taste_fb,
+    tds_fb,
+    weight_fb=4.0,
+    intensity_fb=4.0,
+    top_k: int = 5,
+    chunk_size: int = 8,
+    search: str | None = None,
+    correction: dict | None = None,
+) -> list[list[dict]]:
+    """
+    N개의 (base, feedback) 쌍을 한 번에 추천 (각 인자는 길이 N 배열 또는 스칼라)
+    - 목표값 계산과 격자 error 계산을 브로드캐스팅으로 처리
+    - search="adaptive"면 격자 후보를 seed로 보간기 국소 탐색 (기본값: settings.OPTIMIZER_SEARCH)
+    - correction이 있으면 사용자 보정이 더해진 예측면에서 탐색
+    """
+    _ensure_model()
+    search = search or settings.OPTIMIZER_SEARCH
+    grid, interpolators = _personalized(correction)
+
+    goal_tds, goal_taste, weight_taste = np.broadcast_arrays(
+        *_goal_values(base_tds, base_taste, taste_fb, tds_fb, weight_fb, intensity_fb)
+    )
+    goal_tds, goal_taste, weight_taste = (np.atleast_1d(a) for a in (goal_tds, goal_taste, weight_taste))
+
+    adaptive = search == "adaptive"
+    n_candidates = max(settings.OPTIMIZER_REFINE_SEEDS, top_k) if adaptive else top_k * 3
 
+    results = []
+    best_rows = _grid_top_indices(goal_tds, goal_taste, weight_taste, n_candidates, chunk_size, grid)
+    for row, idxs in enumerate(best_rows):
+        g_tds, g_taste = float(goal_tds[row]), float(goal_taste[row])
+        if adaptive:
+            results.append(_refine(g_tds, g_taste, float(weight_taste[row]), idxs, top_k, grid, interpolators))
+        else:
+            results.append(_format_candidates(idxs, g_tds, g_taste, top_k, grid))
     return results
 
 
+def recommend_next_recipe(
+    base_tds: float,
+    base_taste: float,
+    taste_fb: int,
+    tds_fb: int,
+    weight_fb: float = 4.0,   # 1~7
+    intensity_fb: float = 4.0, # 1~7
+    top_k: int = 5,
+    correction: dict | None = None,
+) -> list[dict]:
+    """
+    로컬 코드 스타일의 추천: multiplicative goal 조정 + 가중치 error
+    (단건 호출, recommend_next_recipes의 N=1 경우)
+    """
+    return recommend_next_recipes(
+        [base_tds], [base_taste], [taste_fb], [tds_fb], [weight_fb], [intensity_fb],
+        top_k=top_k, correction=correction,
+    )[0]
+
+
 # app/services/recipe_modifier.py
 
 from typing import Dict, Any
@@ -259,17 +581,8 @@ def interpret_feedback(
     return delta_tds, delta_taste
 """
 
-def modify_recipe_based_on_feedback(
-    original_recipe: Recipe,
-    taste: int,          # 1-7 Acidic → Nutty
-    tds: int,            # 1-7 Low → High
-    weight: int = 4,     # 1-7 (body perception)
-    intensity: int = 4,  # 1-7 Weak → Strong
-    top_k: int = 5
-) -> Dict[str, Any]:
-    """
-    로컬 스타일로 완전히 통합된 수정 함수
-    """
+def recipe_point(original_recipe: Recipe) -> tuple[float, float, float]:
+    """레시피의 (grind, ratio, temp) 모델 좌표"""
     # 현재 ratio 추출 (pouring_steps 기반 - 실제 앱에 맞게)
     current_grind = original_recipe.grind_level
     current_temp = original_recipe.water_temperature_c
@@ -282,9 +595,25 @@ def modify_recipe_based_on_feedback(
             current_ratio = original_recipe.pouring_steps[1].water_g / original_recipe.pouring_steps[2].water_g
         except:
             pass
+    return current_grind, current_ratio, current_temp
+
+
+def modify_recipe_based_on_feedback(
+    original_recipe: Recipe,
+    taste: int,          # 1-7 Acidic → Nutty
+    tds: int,            # 1-7 Low → High
+    weight: int = 4,     # 1-7 (body perception)
+    intensity: int = 4,  # 1-7 Weak → Strong
+    top_k: int = 5,
+    correction: dict | None = None,  # 사용자별 보정 (app.services.personalization)
+) -> Dict[str, Any]:
+    """
+    로컬 스타일로 완전히 통합된 수정 함수
+    """
+    current_grind, current_ratio, current_temp = recipe_point(original_recipe)
 
     # 현재 예측
-    current_pred = estimate_outcome(current_grind, current_ratio, current_temp)
+    current_pred = estimate_outcome(current_grind, current_ratio, current_temp, correction=correction)
     base_tds = current_pred['predicted_tds']
     base_taste = current_pred['predicted_taste']
 
@@ -296,7 +625,8 @@ def modify_recipe_based_on_feedback(
         tds_fb=tds,
         weight_fb=weight,
         intensity_fb=intensity,
-        top_k=top_k
+        top_k=top_k,
+        correction=correction,
     )
 
     if not candidates:
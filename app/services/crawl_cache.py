@@ -0,0 +1,192 @@
+"""
+레시피 크롤링 캐시 (2단계)
+- page_cache: URL -> HTML + ETag/Last-Modified (조건부 GET으로 재검증, 304면 저장된 HTML 재사용)
+  → HTML이 아니거나 CRAWL_PAGE_CACHE_MAX_CHARS보다 큰 응답은 저장하지 않음
+- extraction_cache: sha256(프롬프트 버전 + 정규화된 본문 텍스트) -> LLM 추출 결과
+  → 같은 글이 다른 URL/광고/마크업으로 와도 본문이 같으면 추출을 다시 하지 않음
+- 메모리 LRU(+TTL) 위에 디스크 저장소(JSON 파일)를 두어 재시작/다른 워커에서도 재사용
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 본문 정규화 (공백/줄바꿈 차이 무시)"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class CrawlCache:
+    """
+    key -> dict TTL/LRU 캐시 + 선택적 디스크 저장소
+    - 메모리에는 maxsize개까지, 디스크에는 disk_max_entries개까지 (넘으면 오래된 파일부터 삭제)
+    - 디스크 파일: {directory}/{key[:2]}/{key}.json = {"expires_at": ..., "value": ...}
+    """
+
+    def __init__(self, ttl_s: float, maxsize: int, directory: Optional[str] = None, disk_max_entries: int = 0):
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self.directory = directory
+        self.disk_max_entries = disk_max_entries
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_count: Optional[int] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at > now:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+
+        item = self._read_disk(key, now)
+        with self._lock:
+            if item is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, *item)
+        return item[0]
+
+    def put(self, key: str, value: Dict[str, Any]):
+        if self.ttl_s <= 0:
+            return
+        expires_at = time.time() + self.ttl_s
+        with self._lock:
+            self._remember(key, value, expires_at)
+        self._write_disk(key, value, expires_at)
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float):
+        if self.maxsize <= 0:
+            return
+        self._items[key] = (value, expires_at)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("expires_at", 0) <= now:
+            self._remove(path)
+            return None
+        return data["value"], data["expires_at"]
+
+    def _write_disk(self, key: str, value: Dict[str, Any], expires_at: float):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existed = os.path.exists(path)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[CrawlCache] failed to write {path}: {e}")
+            self._remove(tmp_path)
+            return
+        if not existed:
+            self._count_new_file()
+
+    def _count_new_file(self):
+        if self.disk_max_entries <= 0:
+            return
+        with self._lock:
+            if self._disk_count is None:
+                self._disk_count = len(self._disk_files())
+            else:
+                self._disk_count += 1
+            if self._disk_count > self.disk_max_entries:
+                self._prune_disk()
+
+    def _disk_files(self) -> list:
+        files = []
+        for root, _, names in os.walk(self.directory):
+            files.extend(os.path.join(root, name) for name in names if name.endswith(".json"))
+        return files
+
+    def _prune_disk(self):
+        """오래된(mtime) 파일부터 지워 disk_max_entries의 90%까지 줄임"""
+        files = []
+        for path in self._disk_files():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        files.sort()
+        excess = len(files) - int(self.disk_max_entries * 0.9)
+        for _, path in files[:max(excess, 0)]:
+            self._remove(path)
+        self._disk_count = len(files) - max(excess, 0)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            if self.directory and os.path.isdir(self.directory):
+                for path in self._disk_files():
+                    self._remove(path)
+            self._disk_count = None
+
+    def info(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items), 'maxsize': self.maxsize}
+
+
+def _cache_dir(name: str) -> Optional[str]:
+    return os.path.join(settings.CRAWL_CACHE_DIR, name) if settings.CRAWL_CACHE_DIR else None
+
+
+page_cache = CrawlCache(
+    ttl_s=settings.CRAWL_PAGE_CACHE_TTL_S,
+    maxsize=settings.CRAWL_CACHE_SIZE,
+    directory=_cache_dir("pages"),
+    disk_max_entries=settings.CRAWL_CACHE_DISK_MAX_ENTRIES,
+)
+
+extraction_cache = CrawlCache(
+    ttl_s=settings.CRAWL_EXTRACTION_CACHE_TTL_S,
+    maxsize=settings.CRAWL_CACHE_SIZE,
+    directory=_cache_dir("extractions"),
+    disk_max_entries=settings.CRAWL_CACHE_DISK_MAX_ENTRIES,
+)
@@ -0,0 +1,171 @@
+"""
+머신(ESP32)으로 보내는 RECIPE_DATA 페이로드 컴파일러 + 캐시
+- 레시피 (recipe_id, updated_at) 버전마다 한 번만 만들고, 인코딩된 프레임까지 미리 만들어 둠
+- 펌웨어가 HELLO 핸드셰이크에서 고른 인코딩으로 전송 (json | binary | msgpack)
+  - json: 기존 RECIPE_DATA JSON (공백 없이)
+  - binary: 고정 길이 little-endian 구조체 (BINARY_HEADER + 단계마다 BINARY_STEP)
+  - msgpack: msgpack 패키지가 설치되어 있을 때만 사용 가능
+"""
+import json
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+from app.core.config import settings
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# 서버가 지원하는 인코딩 (HELLO에서 펌웨어가 보낸 순서대로 첫 번째로 맞는 것을 선택)
+MACHINE_ENCODINGS = ("json", "binary", "msgpack") if MSGPACK_AVAILABLE else ("json", "binary")
+
+# binary 포맷
+# 헤더: magic "PB", 포맷 버전, 메시지 타입(1=RECIPE_DATA), recipe_id, rinsing,
+#       물 온도(0.1°C), 원두량(0.1g), 총 추출 시간(s), grind_level, grind_microns, 단계 수
+# 단계: step, 물 양(0.1g), technique 코드, 붓는 시간(s), 대기 시간(s)
+BINARY_MAGIC = b"PB"
+BINARY_VERSION = 1
+BINARY_RECIPE_DATA = 1
+BINARY_HEADER = struct.Struct("<2sBBIBHHHHHB")
+BINARY_STEP = struct.Struct("<BHBHH")
+TECHNIQUE_CODES = {"center": 0, "spiral_out": 1, "pulse": 2}
+
+Frame = Union[str, bytes]
+
+
+def build_recipe_message(recipe) -> Dict[str, Any]:
+    """Recipe(+pouring_steps) -> ESP32가 파싱하는 RECIPE_DATA 메시지"""
+    total_time = 0
+    steps_data = []
+    for step in recipe.pouring_steps or []:
+        pouring_time = int(step.pour_time_s)
+        waiting_time = int(step.wait_time_s) if step.wait_time_s else 0
+        steps_data.append({
+            "step": step.step_number,
+            "water_g": float(step.water_g),
+            "technique": step.technique.value if step.technique else "center",
+            "pour_time_s": pouring_time,
+            "wait_time_s": waiting_time
+        })
+        total_time += pouring_time + waiting_time
+
+    return {
+        "type": "RECIPE_DATA",
+        "recipe": {
+            "rinsing": recipe.rinsing,
+            "water_temperature_c": float(recipe.water_temperature_c),
+            "dose_g": float(recipe.dose_g),
+            "total_brew_time_s": int(recipe.total_brew_time_s) if recipe.total_brew_time_s else total_time,
+            "grind_level": int(recipe.grind_level) if recipe.grind_level else 250,  # 기본값 250
+            "grind_microns": recipe.grind_microns if recipe.grind_microns else 600,
+            "pouring_steps": steps_data
+        }
+    }
+
+
+def encode_binary(recipe_id: int, message: Dict[str, Any]) -> bytes:
+    """RECIPE_DATA -> binary 프레임 (범위를 벗어나는 값이 있으면 struct.error)"""
+    recipe = message["recipe"]
+    steps = recipe["pouring_steps"]
+    parts = [BINARY_HEADER.pack(
+        BINARY_MAGIC, BINARY_VERSION, BINARY_RECIPE_DATA, recipe_id,
+        1 if recipe["rinsing"] else 0,
+        round(recipe["water_temperature_c"] * 10),
+        round(recipe["dose_g"] * 10),
+        recipe["total_brew_time_s"],
+        recipe["grind_level"],
+        recipe["grind_microns"],
+        len(steps),
+    )]
+    for step in steps:
+        parts.append(BINARY_STEP.pack(
+            step["step"],
+            round(step["water_g"] * 10),
+            TECHNIQUE_CODES.get(step["technique"], 0),
+            step["pour_time_s"],
+            step["wait_time_s"],
+        ))
+    return b"".join(parts)
+
+
+def encode_recipe_frames(recipe_id: int, message: Dict[str, Any]) -> Dict[str, Frame]:
+    """인코딩별 프레임 (binary로 표현할 수 없는 레시피는 binary 프레임 없이 json으로 전송)"""
+    frames: Dict[str, Frame] = {"json": json.dumps(message, separators=(",", ":"), ensure_ascii=False)}
+    try:
+        frames["binary"] = encode_binary(recipe_id, message)
+    except (struct.error, TypeError, ValueError) as e:
+        print(f"[MachinePayload] recipe {recipe_id} cannot be encoded as binary: {e}")
+    if MSGPACK_AVAILABLE:
+        frames["msgpack"] = msgpack.packb(message)
+    return frames
+
+
+@dataclass(frozen=True)
+class CompiledRecipe:
+    recipe_id: int
+    updated_at: datetime
+    message: Dict[str, Any]
+    frames: Dict[str, Frame] = field(repr=False)
+
+
+def compile_recipe(recipe) -> CompiledRecipe:
+    message = build_recipe_message(recipe)
+    return CompiledRecipe(
+        recipe_id=recipe.recipe_id,
+        updated_at=recipe.updated_at,
+        message=message,
+        frames=encode_recipe_frames(recipe.recipe_id, message),
+    )
+
+
+class MachinePayloadCache:
+    """
+    recipe_id -> CompiledRecipe LRU 캐시
+    - updated_at이 다르면 miss (다른 워커에서 수정된 레시피도 버전 비교로 걸러냄)
+    - 이 워커에서 수정/삭제하면 invalidate로 바로 제거
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[int, CompiledRecipe]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, recipe_id: int, updated_at: datetime) -> Optional[CompiledRecipe]:
+        with self._lock:
+            compiled = self._items.get(recipe_id)
+            if compiled is None or compiled.updated_at != updated_at:
+                self.misses += 1
+                return None
+            self._items.move_to_end(recipe_id)
+            self.hits += 1
+            return compiled
+
+    def put(self, compiled: CompiledRecipe):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[compiled.recipe_id] = compiled
+            self._items.move_to_end(compiled.recipe_id)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, recipe_id: int):
+        with self._lock:
+            self._items.pop(recipe_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+machine_payloads = MachinePayloadCache(maxsize=settings.MACHINE_PAYLOAD_CACHE_SIZE)
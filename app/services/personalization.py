@@ -0,0 +1,121 @@
+"""
+사용자별 추천 보정 모델
+- 전역 27점 데이터 격자(3x3x3) 위에 사용자별 잔차(tds, taste)를 누적
+- 리뷰 1건은 브루잉한 레시피 좌표를 둘러싼 8개 격자점에 삼선형 가중치로만 반영 → 업데이트 O(1)
+- 잔차 = 가중 평균을 prior_weight만큼 0쪽으로 당긴 값 (리뷰가 적을 때 과하게 움직이지 않도록)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# 리뷰 1점(4 기준) 차이가 의미하는 예측값 차이
+TASTE_PER_POINT = 0.35
+TDS_PER_POINT = 0.015
+GRID_SHAPE = (3, 3, 3)
+
+
+def _corner_weights(axes: Sequence[np.ndarray], point: Sequence[float]) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+    """point를 둘러싼 8개 격자점의 index와 삼선형 가중치 (격자 밖 좌표는 경계로 clip)"""
+    lower, frac = [], []
+    for axis, x in zip(axes, point):
+        x = float(np.clip(x, axis[0], axis[-1]))
+        i = int(np.clip(np.searchsorted(axis, x) - 1, 0, len(axis) - 2))
+        lower.append(i)
+        frac.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+
+    offsets = np.array([(a, b, c) for a in (0, 1) for b in (0, 1) for c in (0, 1)])
+    idx = tuple(np.array(lower)[d] + offsets[:, d] for d in range(3))
+    f = np.array(frac)
+    weights = np.prod(np.where(offsets == 1, f, 1 - f), axis=1)
+    return idx, weights
+
+
+class ResidualModel:
+    """격자점별 (가중치 합, 가중 잔차 합)만 들고 있는 누적 모델"""
+
+    def __init__(self, weights=None, tds_sums=None, taste_sums=None, n_reviews: int = 0):
+        self.weights = np.zeros(GRID_SHAPE) if weights is None else np.asarray(weights, dtype=float).reshape(GRID_SHAPE)
+        self.tds_sums = np.zeros(GRID_SHAPE) if tds_sums is None else np.asarray(tds_sums, dtype=float).reshape(GRID_SHAPE)
+        self.taste_sums = np.zeros(GRID_SHAPE) if taste_sums is None else np.asarray(taste_sums, dtype=float).reshape(GRID_SHAPE)
+        self.n_reviews = n_reviews
+
+    def update(self, axes, point: Sequence[float], taste_fb: int, tds_fb: int):
+        """리뷰 1건 반영: 체감 맛/TDS가 예측보다 (피드백 - 4) × 단위만큼 다르다고 보고 누적"""
+        idx, w = _corner_weights(axes, point)
+        self.weights[idx] += w
+        self.tds_sums[idx] += w * (tds_fb - 4) * TDS_PER_POINT
+        self.taste_sums[idx] += w * (taste_fb - 4) * TASTE_PER_POINT
+        self.n_reviews += 1
+
+    def correction(self, prior_weight: Optional[float] = None) -> Optional[Dict[str, np.ndarray]]:
+        """coffee_optimizer에 넘길 격자 보정값, 리뷰가 없으면 None"""
+        if self.n_reviews == 0:
+            return None
+        prior = settings.PERSONALIZATION_PRIOR_WEIGHT if prior_weight is None else prior_weight
+        denom = self.weights + prior
+        return {'tds': self.tds_sums / denom, 'taste': self.taste_sums / denom}
+
+    def to_dict(self) -> dict:
+        return {
+            'weights': self.weights.ravel().tolist(),
+            'tds_sums': self.tds_sums.ravel().tolist(),
+            'taste_sums': self.taste_sums.ravel().tolist(),
+            'n_reviews': self.n_reviews,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResidualModel":
+        return cls(data['weights'], data['tds_sums'], data['taste_sums'], data.get('n_reviews', 0))
+
+
+class ResidualModelCache:
+    """
+    user_id -> ResidualModel TTL/LRU 캐시
+    - 워커별 메모리 캐시이므로 다른 워커의 갱신은 TTL 안에 반영
+    """
+
+    def __init__(self, ttl_s: float, maxsize: int):
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, Tuple[ResidualModel, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[ResidualModel]:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+            model, expires_at = item
+            if expires_at <= time.time():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+            return model
+
+    def put(self, user_id: str, model: ResidualModel):
+        if self.ttl_s <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[user_id] = (model, time.time() + self.ttl_s)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+residual_models = ResidualModelCache(
+    ttl_s=settings.PERSONALIZATION_CACHE_TTL_S,
+    maxsize=settings.PERSONALIZATION_CACHE_SIZE,
+)
@@ -3,24 +3,83 @@ OpenAI Assistant 관련 헬퍼 함수들
 기존 assistant_func.py와 recipe_profile.py를 FastAPI 환경에 맞게 이식
 엄격한 검증 규칙 적용
 """
-import os
+import copy
 import json
+import time
+import asyncio
+import importlib.util
+import httpx
 import requests
-from openai import OpenAI
-from typing import Optional, Dict, Any, List
+from openai import OpenAI, AsyncOpenAI
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+from app.core.config import settings
+from app.services.crawl_cache import extraction_cache, make_key, normalize_text, page_cache
+from app.utils.recipe_preparser import PREPARSER_VERSION, preparse_soup
 
 # OpenAI 클라이언트 초기화
-try:
-    from app.core.config import settings
-    OPENAI_API_KEY = settings.OPENAI_API_KEY
-except ImportError:
-    # settings를 import할 수 없는 경우 환경변수에서 직접 로드
-    from dotenv import load_dotenv
-    load_dotenv()
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# (크롤링 타임아웃/커넥션 풀 설정도 settings에서 읽으므로 config는 항상 import)
+OPENAI_API_KEY = settings.OPENAI_API_KEY
 
 client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 
+# 비동기 클라이언트 (이벤트 루프 안에서 처음 사용할 때 생성, 커넥션 풀 공유)
+_async_client: Optional[AsyncOpenAI] = None
+_http_client: Optional[httpx.AsyncClient] = None
+# h2 패키지가 있으면 HTTP/2 사용
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    # Accept-Encoding은 지정하지 않음: httpx/requests가 풀 수 있는 인코딩만 알아서 요청
+    # (brotli 미설치 상태에서 br을 요청하면 압축된 본문을 그대로 받게 됨)
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """크롤링용 공유 AsyncClient (keep-alive 커넥션 풀, 연결 수 제한)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            headers=BROWSER_HEADERS,
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.CRAWL_HTTP_TIMEOUT_S),
+            limits=httpx.Limits(
+                max_connections=settings.CRAWL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.CRAWL_MAX_KEEPALIVE,
+            ),
+        )
+    return _http_client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    global _async_client
+    if not OPENAI_API_KEY:
+        raise ValueError("OpenAI API key not configured")
+    if _async_client is None:
+        _async_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            timeout=settings.OPENAI_TIMEOUT_S,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+    return _async_client
+
+
+async def close_http_clients():
+    """애플리케이션 종료 시 커넥션 풀 정리"""
+    global _async_client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
 # Validation Constants (from recipe_profile.py)
 AGITATION_TYPES = ['center', 'spiral_out', 'pulse', 'center pour', 'spiral outward', 
                    'outer edge spiral', 'zig-zag', 'swirling']
@@ -92,40 +151,163 @@ ENSURE ALL MATHEMATICAL RELATIONSHIPS ARE CORRECT BEFORE RESPONDING.
 If you cannot extract accurate values, return null for optional fields but ensure required fields have sensible defaults.
 """
 
+# 추출 모델/프롬프트(REFORMAT_SYSTEM, _extract_html_messages)를 바꾸면 버전을 올려 추출 캐시 무효화
+EXTRACTION_MODEL = "gpt-4o-mini"
+# 2: LLM 입력이 본문 앞부분에서 relevant_section 구간으로 바뀜
+EXTRACTION_PROMPT_VERSION = "2"
+
+
+def _page_lookup(url: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, str]]:
+    """캐시된 페이지와 조건부 GET 헤더"""
+    entry = page_cache.get(make_key(url))
+    conditional = {}
+    if entry is not None:
+        if entry.get("etag"):
+            conditional["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            conditional["If-Modified-Since"] = entry["last_modified"]
+    return entry, conditional
+
+
+def _page_is_fresh(entry: Optional[Dict[str, Any]]) -> bool:
+    return entry is not None and time.time() - entry["fetched_at"] < settings.CRAWL_PAGE_FRESH_S
+
+
+CACHEABLE_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+def _page_cacheable(html: str, headers) -> bool:
+    """HTML이고 CRAWL_PAGE_CACHE_MAX_CHARS 이하인 페이지만 저장 (Content-Type이 없으면 HTML로 간주)"""
+    content_type = (headers.get("content-type") or "").split(";")[0].strip().lower()
+    if content_type and content_type not in CACHEABLE_CONTENT_TYPES:
+        return False
+    return len(html) <= settings.CRAWL_PAGE_CACHE_MAX_CHARS
+
+
+def _page_store(url: str, html: str, headers, previous: Optional[Dict[str, Any]] = None) -> str:
+    if previous is None and not _page_cacheable(html, headers):
+        return html
+    previous = previous or {}
+    page_cache.put(make_key(url), {
+        "html": html,
+        "etag": headers.get("etag") or previous.get("etag"),
+        "last_modified": headers.get("last-modified") or previous.get("last_modified"),
+        "fetched_at": time.time(),
+    })
+    return html
+
+
+def _extraction_key(text_content: str) -> str:
+    # 로컬 추출 결과와 LLM 입력 구간 모두 pre-parser 규칙에 따라 달라지므로 키에 포함
+    return make_key(EXTRACTION_PROMPT_VERSION, PREPARSER_VERSION, EXTRACTION_MODEL, normalize_text(text_content))
+
+
+def _prepare_html_extraction(html_content: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    """
+    (LLM에 보낼 본문, 추출 캐시 키, 캐시 또는 로컬 추출 결과)
+    - 로컬 추출(JSON-LD/microdata/정규식)이 충분히 확실하고 검증도 통과하면 LLM 생략
+    - 아니면 본문 앞부분 대신 레시피로 보이는 구간만 LLM에 전달
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    text_content = soup.get_text(separator='\n', strip=True)
+    key = _extraction_key(text_content)
+    cached = extraction_cache.get(key)
+    if cached is not None:
+        return text_content, key, copy.deepcopy(cached)
+    if not settings.CRAWL_PREPARSE_ENABLED:
+        return text_content, key, None
+
+    preparsed = preparse_soup(soup, text_content)
+    if preparsed.is_confident(settings.CRAWL_PREPARSE_MIN_CONFIDENCE) and validate_recipe_data(preparsed.recipe)[0]:
+        print(f"Recipe extracted locally ({preparsed.method}, confidence {preparsed.confidence})")
+        extraction_cache.put(key, preparsed.recipe)
+        return text_content, key, copy.deepcopy(preparsed.recipe)
+    return preparsed.section, key, None
+
 
 def scrape_website(url: str) -> str:
-    """웹 페이지를 가져오고 HTML을 반환합니다."""
+    """웹 페이지를 가져오고 HTML을 반환합니다. (페이지 캐시 + 조건부 GET)"""
+    entry, conditional = _page_lookup(url)
+    if _page_is_fresh(entry):
+        return entry["html"]
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers={**BROWSER_HEADERS, **conditional}, timeout=10)
+        if response.status_code == 304 and entry is not None:
+            return _page_store(url, entry["html"], response.headers, entry)
         response.raise_for_status()
-        return response.text
+        return _page_store(url, response.text, response.headers)
     except Exception as e:
         return f"Error fetching '{url}': {str(e)}"
 
 
+async def scrape_website_async(url: str) -> str:
+    """scrape_website의 비동기 버전 (공유 커넥션 풀 사용, 캐시 디스크 I/O는 스레드에서)"""
+    entry, conditional = await asyncio.to_thread(_page_lookup, url)
+    if _page_is_fresh(entry):
+        return entry["html"]
+    try:
+        response = await get_http_client().get(url, headers=conditional)
+        if response.status_code == 304 and entry is not None:
+            return await asyncio.to_thread(_page_store, url, entry["html"], response.headers, entry)
+        response.raise_for_status()
+        return await asyncio.to_thread(_page_store, url, response.text, response.headers)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        return f"Error fetching '{url}': {str(e)}"
+
+
+def html_to_text(html_content: str) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return soup.get_text(separator='\n', strip=True)
+
+
+def _generate_messages(coffee_description: str) -> List[Dict[str, str]]:
+    guidance = "Suggest a pour-over coffee recipe for the following. Provide your explanations below the recipe.\n"
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": guidance + coffee_description}
+    ]
+
+
+def _extract_html_messages(text_content: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": REFORMAT_SYSTEM},
+        {"role": "user", "content": f"Extract coffee recipe from this text and return as JSON:\n\n{text_content[:4000]}"}
+    ]
+
+
+def _extract_description_messages(recipe_text: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": REFORMAT_SYSTEM},
+        {"role": "user", "content": f"Extract recipe from this text and return as JSON:\n\n{recipe_text}"}
+    ]
+
+
+def _validated(recipe_data: Dict[str, Any]) -> Dict[str, Any]:
+    # 검증 수행
+    is_valid, errors = validate_recipe_data(recipe_data)
+
+    if not is_valid:
+        print(f"Recipe validation warnings: {errors}")
+        # 자동 수정 시도
+        recipe_data = fix_recipe_data(recipe_data)
+        print(f"Applied automatic fixes to recipe data")
+
+    return recipe_data
+
+
 def generate_recipe_from_description(coffee_description: str) -> str:
     """설명을 바탕으로 새로운 레시피(텍스트)를 생성합니다."""
     if not client:
         raise ValueError("OpenAI API key not configured")
     
     try:
-        guidance = "Suggest a pour-over coffee recipe for the following. Provide your explanations below the recipe.\n"
-        full_prompt = guidance + coffee_description
-        
         completion = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM},
-                {"role": "user", "content": full_prompt}
-            ]
+            messages=_generate_messages(coffee_description)
         )
         
         return completion.choices[0].message.content
@@ -133,44 +315,91 @@ def generate_recipe_from_description(coffee_description: str) -> str:
         raise Exception(f"Failed to generate recipe: {e}")
 
 
+async def generate_recipe_from_description_async(coffee_description: str) -> str:
+    async_client = get_async_openai_client()
+    try:
+        completion = await async_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_generate_messages(coffee_description)
+        )
+        return completion.choices[0].message.content
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to generate recipe: {e}")
+
+
+async def stream_recipe_from_description(coffee_description: str) -> AsyncIterator[str]:
+    """generate_recipe_from_description의 스트리밍 버전 (텍스트 조각을 도착하는 대로 yield)"""
+    async_client = get_async_openai_client()
+    try:
+        stream = await async_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_generate_messages(coffee_description),
+            stream=True
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to generate recipe: {e}")
+
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # 클라이언트가 끊으면 OpenAI 스트림도 바로 닫아 토큰 낭비를 막음
+        await stream.close()
+
+
 def extract_recipe_from_html(html_content: str) -> Optional[Dict[str, Any]]:
     """HTML에서 레시피 정보를 추출하고 검증합니다."""
+    # HTML에서 텍스트 추출 (본문이 같으면 캐시된 추출 결과 사용)
+    text_content, key, cached = _prepare_html_extraction(html_content)
+    if cached is not None:
+        return cached
+
     if not client:
         raise ValueError("OpenAI API key not configured")
     
     try:
-        # HTML에서 텍스트 추출
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
-        text_content = soup.get_text(separator='\n', strip=True)
-        
         # OpenAI로 구조화
         completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": REFORMAT_SYSTEM},
-                {"role": "user", "content": f"Extract coffee recipe from this text and return as JSON:\n\n{text_content[:4000]}"}
-            ],
+            model=EXTRACTION_MODEL,
+            messages=_extract_html_messages(text_content),
             response_format={"type": "json_object"}
         )
         
-        recipe_data = json.loads(completion.choices[0].message.content)
-        
-        # 검증 수행
-        is_valid, errors = validate_recipe_data(recipe_data)
-        
-        if not is_valid:
-            print(f"Recipe validation warnings: {errors}")
-            # 자동 수정 시도
-            recipe_data = fix_recipe_data(recipe_data)
-            print(f"Applied automatic fixes to recipe data")
-        
-        return recipe_data
+        recipe_data = _validated(json.loads(completion.choices[0].message.content))
+        extraction_cache.put(key, recipe_data)
+        return copy.deepcopy(recipe_data)
         
     except Exception as e:
         raise Exception(f"Failed to extract recipe from HTML: {e}")
 
 
+async def extract_recipe_from_html_async(html_content: str) -> Optional[Dict[str, Any]]:
+    """extract_recipe_from_html의 비동기 버전 (HTML 파싱은 스레드에서, OpenAI 호출은 AsyncOpenAI로)"""
+    text_content, key, cached = await asyncio.to_thread(_prepare_html_extraction, html_content)
+    if cached is not None:
+        return cached
+
+    async_client = get_async_openai_client()
+    try:
+        completion = await async_client.chat.completions.create(
+            model=EXTRACTION_MODEL,
+            messages=_extract_html_messages(text_content),
+            response_format={"type": "json_object"}
+        )
+        recipe_data = _validated(json.loads(completion.choices[0].message.content))
+        await asyncio.to_thread(extraction_cache.put, key, recipe_data)
+        return copy.deepcopy(recipe_data)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to extract recipe from HTML: {e}")
+
+
 def extract_recipe_from_description(recipe_text: str) -> Optional[Dict[str, Any]]:
     """텍스트 설명에서 구조화된 레시피를 추출합니다."""
     if not client:
@@ -179,10 +408,7 @@ def extract_recipe_from_description(recipe_text: str) -> Optional[Dict[str, Any]
     try:
         completion = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": REFORMAT_SYSTEM},
-                {"role": "user", "content": f"Extract recipe from this text and return as JSON:\n\n{recipe_text}"}
-            ],
+            messages=_extract_description_messages(recipe_text),
             response_format={"type": "json_object"}
         )
         
@@ -193,6 +419,21 @@ def extract_recipe_from_description(recipe_text: str) -> Optional[Dict[str, Any]
         raise Exception(f"Failed to extract recipe from description: {e}")
 
 
+async def extract_recipe_from_description_async(recipe_text: str) -> Optional[Dict[str, Any]]:
+    async_client = get_async_openai_client()
+    try:
+        completion = await async_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_extract_description_messages(recipe_text),
+            response_format={"type": "json_object"}
+        )
+        return json.loads(completion.choices[0].message.content)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to extract recipe from description: {e}")
+
+
 def validate_recipe_data(recipe_data: Dict[str, Any]) -> tuple[bool, List[str]]:
     """
     레시피 데이터의 일관성을 검증합니다.
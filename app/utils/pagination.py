@@ -0,0 +1,69 @@
+"""
+키셋(커서) 페이지네이션 헬퍼
+- 정렬 컬럼 값(예: created_at, recipe_id)을 불투명한 커서 문자열로 인코딩
+- 다음 페이지는 OFFSET 대신 "마지막 행보다 뒤" 조건으로 조회하므로 깊은 페이지도 O(page_size)
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, asc, desc, or_
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+        return [
+            datetime.fromisoformat(v) if col.type.python_type is datetime else v
+            for col, v in zip(columns, values)
+        ]
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_cursor")
+
+
+def _after(columns: Sequence[Any], values: Sequence[Any], descending: bool):
+    # (c1, c2) < (v1, v2)  ==  c1 < v1 OR (c1 = v1 AND c2 < v2)
+    col, value = columns[0], values[0]
+    beyond = col < value if descending else col > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond, and_(col == value, _after(columns[1:], values[1:], descending)))
+
+
+def keyset_page(
+    query,
+    columns: Sequence[Any],
+    page_size: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    descending: bool = True,
+) -> Tuple[list, Optional[str]]:
+    """
+    columns 순서로 정렬한 한 페이지와 next_cursor를 반환
+    - cursor가 있으면 키셋 조건으로, 없으면 offset으로 시작 위치 결정
+    - page_size + 1개를 조회해서 다음 페이지가 있을 때만 next_cursor 생성
+    """
+    order = desc if descending else asc
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+    query = query.order_by(*[order(c) for c in columns])
+    if offset and not cursor:
+        query = query.offset(offset)
+    rows = query.limit(page_size + 1).all()
+
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return items, next_cursor
@@ -0,0 +1,339 @@
+"""
+LLM 호출 전 로컬 레시피 추출기
+- 순서: schema.org Recipe JSON-LD → microdata → 본문 정규식 (g / ml / °C / s 패턴)
+- 찾은 필드로 confidence(0~1)를 매기고, 기준 이상이면 LLM 없이 그대로 사용
+- 기준 미만이면 LLM에 앞부분 4000자 대신 단위 패턴이 가장 많이 모인 구간(relevant section)만 전달
+
+오프라인 적중률 측정: python -m app.utils.recipe_preparser <html 디렉터리>
+"""
+import argparse
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+# 추출 규칙/구간 선택(relevant_section)을 바꾸면 버전을 올려 추출 캐시 무효화
+PREPARSER_VERSION = "1"
+SECTION_CHARS = 4000
+SECTION_CONTEXT_LINES = 3
+
+_NUM = r"(\d+(?:\.\d+)?)"
+_AMOUNT = re.compile(_NUM + r"\s*(?:g|grams?|ml)\b", re.I)
+# 한 줄 안에서만 매칭 (줄을 넘어가면 "30 grams of coffee\nWater"처럼 엉뚱한 값이 잡힘)
+_DOSE = [
+    re.compile(_NUM + r"[ \t]*(?:g|grams?)[ \t]+(?:of[ \t]+)?(?:[\w-]+[ \t]+){0,2}(?:coffee|beans?|grounds)\b", re.I),
+    re.compile(r"\b(?:coffee|dose|beans?)[ \t]*[:\-]?[ \t]*" + _NUM + r"[ \t]*(?:g|grams?)\b", re.I),
+]
+_WATER = [
+    re.compile(_NUM + r"[ \t]*(?:g|grams?|ml)[ \t]+(?:of[ \t]+)?(?:[\w-]+[ \t]+)?water\b", re.I),
+    re.compile(r"\bwater[ \t]*[:\-]?[ \t]*" + _NUM + r"[ \t]*(?:g|grams?|ml)\b", re.I),
+]
+_RATIO = re.compile(r"\b1\s*:\s*" + _NUM, re.I)
+_TEMP_C = re.compile(_NUM + r"\s*(?:°\s*C|º\s*C|degrees?\s*(?:c|celsius)\b|celsius\b)", re.I)
+_TEMP_F = re.compile(_NUM + r"\s*(?:°\s*F|º\s*F|degrees?\s*(?:f|fahrenheit)\b|fahrenheit\b)", re.I)
+_MICRONS = re.compile(r"(\d{3,4})\s*(?:µm|μm|microns?)\b", re.I)
+_SECONDS = r"(\d+)\s*(?:s|secs?|seconds?)\b"
+_POUR_TIME = re.compile(r"\b(?:over|for|in|about|within)\s+" + _SECONDS, re.I)
+_BLOOM = re.compile(r"\bbloom\w*\D{0,25}?" + _SECONDS, re.I)
+_WAIT = re.compile(r"\b(?:wait|rest|let it (?:sit|rest|drain))\w*\D{0,20}?" + _SECONDS, re.I)
+_CUMULATIVE = re.compile(r"\b(?:to|until|up to|total(?:\s+of)?|reaching)\s+(?:\w+\s+){0,3}?" + _NUM + r"\s*(?:g|grams?|ml)\b", re.I)
+_STEP_HINT = re.compile(r"\b(?:pour|bloom|add|top up|fill)\w*", re.I)
+_SECTION_HINT = re.compile(
+    r"\d\s*(?:g|grams?|ml|°\s*[cf]|s|secs?|seconds?)\b|\b1\s*:\s*\d|\b(?:pour|bloom|ratio|grind)\w*", re.I
+)
+_TECHNIQUES = (("spiral", "spiral_out"), ("pulse", "pulse"), ("center", "center"), ("centre", "center"))
+
+# 필드별 confidence 가중치 (합 1.0)
+WEIGHTS = {"dose": 0.25, "water": 0.25, "steps": 0.25, "temperature": 0.15, "consistent": 0.10}
+
+
+@dataclass
+class PreparseResult:
+    method: str  # json-ld | microdata | regex | none
+    confidence: float
+    recipe: Optional[Dict[str, Any]] = None
+    section: str = ""
+    found: List[str] = field(default_factory=list)
+
+    def is_confident(self, min_confidence: float) -> bool:
+        return self.recipe is not None and self.confidence >= min_confidence - 1e-9
+
+
+def _first(patterns: Iterable[re.Pattern], text: str) -> Optional[float]:
+    for pattern in patterns:
+        m = pattern.search(text)
+        if m:
+            return float(m.group(1))
+    return None
+
+
+def _largest(patterns: Iterable[re.Pattern], text: str) -> Optional[float]:
+    """총 물 양: 단계별 물 양보다 큰 값이 총량인 경우가 대부분이므로 최댓값 사용"""
+    values = [float(m.group(1)) for pattern in patterns for m in pattern.finditer(text)]
+    return max(values) if values else None
+
+
+def _temperature(text: str) -> Optional[float]:
+    m = _TEMP_C.search(text)
+    if m:
+        return float(m.group(1))
+    m = _TEMP_F.search(text)
+    if m:
+        return round((float(m.group(1)) - 32) * 5 / 9, 1)
+    return None
+
+
+def _technique(line: str) -> Optional[str]:
+    lower = line.lower()
+    for word, technique in _TECHNIQUES:
+        if word in lower:
+            return technique
+    return None
+
+
+def _is_dose_line(line: str) -> bool:
+    return any(p.search(line) for p in _DOSE) and "water" not in line.lower() and "pour" not in line.lower()
+
+
+def _is_step_line(line: str) -> bool:
+    return bool(_STEP_HINT.search(line)) and not _is_dose_line(line)
+
+
+def _parse_steps(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """주입 단계 추출 (누적 표기 'pour to 100g'는 직전까지의 합을 빼서 단계 물 양으로 변환)"""
+    steps: List[Dict[str, Any]] = []
+    poured = 0.0
+    for line in lines:
+        line = line.strip()
+        if not line or not _is_step_line(line):
+            continue
+        cumulative = _CUMULATIVE.search(line)
+        amount = _AMOUNT.search(line)
+        if cumulative:
+            water_g = float(cumulative.group(1)) - poured
+        elif amount:
+            water_g = float(amount.group(1))
+        else:
+            wait = _WAIT.search(line) or _BLOOM.search(line)
+            if wait and steps:
+                steps[-1]["wait_time_s"] = float(wait.group(1))
+            continue
+        if water_g <= 0:
+            continue
+
+        pour_time = _POUR_TIME.search(line)
+        step: Dict[str, Any] = {
+            "step_number": len(steps) + 1,
+            "water_g": round(water_g, 1),
+            "pour_time_s": float(pour_time.group(1)) if pour_time else 10.0,
+        }
+        bloom = _BLOOM.search(line)
+        wait = _WAIT.search(line)
+        if bloom:
+            step["bloom_time_s"] = float(bloom.group(1))
+        elif wait:
+            step["wait_time_s"] = float(wait.group(1))
+        technique = _technique(line)
+        if technique:
+            step["technique"] = technique
+        steps.append(step)
+        poured += water_g
+    return steps
+
+
+def _build(method: str, name: Optional[str], ingredients: List[str], instructions: List[str]) -> PreparseResult:
+    # 주입 단계 줄의 물 양("Pour 50g of water")을 총 물 양으로 착각하지 않도록 제외
+    ingredient_text = "\n".join(line for line in ingredients if not _is_step_line(line))
+    all_text = "\n".join(ingredients + instructions)
+
+    dose = _first(_DOSE, ingredient_text) or _first(_DOSE, all_text)
+    water = _largest(_WATER, ingredient_text)
+    ratio_match = _RATIO.search(all_text)
+    temperature = _temperature(all_text)
+    steps = _parse_steps(instructions)
+    microns = _MICRONS.search(all_text)
+
+    steps_water = sum(s["water_g"] for s in steps)
+    if water is None and dose and ratio_match:
+        water = dose * float(ratio_match.group(1))
+    if water is None and steps:
+        water = steps_water
+
+    found = [key for key, ok in (
+        ("dose", dose), ("water", water), ("steps", steps), ("temperature", temperature),
+        ("consistent", steps and water and abs(steps_water - water) <= water * 0.05),
+    ) if ok]
+    confidence = round(sum(WEIGHTS[key] for key in found), 2)
+    if not (dose and water and steps):
+        return PreparseResult(method=method, confidence=confidence, found=found)
+
+    recipe = {
+        "recipe_name": name or "Crawled Recipe",
+        "dose_g": dose,
+        "water_temperature_c": temperature if temperature is not None else 93.0,
+        "total_water_g": water,
+        "brew_ratio": round(water / dose, 2),
+        "total_brew_time_s": sum(s["pour_time_s"] + s.get("bloom_time_s", 0) for s in steps),
+        "grind_microns": int(microns.group(1)) if microns else None,
+        "pouring_steps": steps,
+    }
+    return PreparseResult(method=method, confidence=confidence, recipe=recipe, found=found)
+
+
+def _instruction_texts(value: Any) -> List[str]:
+    """JSON-LD recipeInstructions: 문자열 / HowToStep / HowToSection(itemListElement) / 리스트"""
+    if isinstance(value, str):
+        return [line for line in re.split(r"\n|(?<=\.)\s+(?=[A-Z])", value) if line.strip()]
+    if isinstance(value, list):
+        return [text for item in value for text in _instruction_texts(item)]
+    if isinstance(value, dict):
+        if "itemListElement" in value:
+            return _instruction_texts(value["itemListElement"])
+        return _instruction_texts(value.get("text") or value.get("name") or "")
+    return []
+
+
+def _is_recipe_type(node: Dict[str, Any]) -> bool:
+    node_type = node.get("@type")
+    types = node_type if isinstance(node_type, list) else [node_type]
+    return "Recipe" in types
+
+
+def _find_jsonld_recipe(data: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(data, list):
+        for item in data:
+            found = _find_jsonld_recipe(item)
+            if found:
+                return found
+    elif isinstance(data, dict):
+        if _is_recipe_type(data):
+            return data
+        if "@graph" in data:
+            return _find_jsonld_recipe(data["@graph"])
+    return None
+
+
+def _from_jsonld(soup: BeautifulSoup) -> Optional[PreparseResult]:
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or script.get_text() or "")
+        except ValueError:
+            continue
+        node = _find_jsonld_recipe(data)
+        if node is None:
+            continue
+        ingredients = node.get("recipeIngredient") or node.get("ingredients") or []
+        if isinstance(ingredients, str):
+            ingredients = [ingredients]
+        extra = [node.get("description") or ""]
+        return _build("json-ld", node.get("name"), list(ingredients) + extra, _instruction_texts(node.get("recipeInstructions")))
+    return None
+
+
+def _from_microdata(soup: BeautifulSoup) -> Optional[PreparseResult]:
+    scope = soup.find(attrs={"itemtype": re.compile(r"schema\.org/Recipe", re.I)})
+    if scope is None:
+        return None
+    name_el = scope.find(attrs={"itemprop": "name"})
+    ingredients = [el.get_text(" ", strip=True) for el in scope.find_all(attrs={"itemprop": re.compile(r"^(recipeIngredient|ingredients)$")})]
+    instructions: List[str] = []
+    for el in scope.find_all(attrs={"itemprop": "recipeInstructions"}):
+        items = el.find_all("li")
+        if items:
+            instructions.extend(li.get_text(" ", strip=True) for li in items)
+        else:
+            instructions.extend(el.get_text("\n", strip=True).split("\n"))
+    return _build("microdata", name_el.get_text(" ", strip=True) if name_el else None, ingredients, instructions)
+
+
+def _page_title(soup: BeautifulSoup) -> Optional[str]:
+    heading = soup.find("h1") or soup.find("title")
+    return heading.get_text(" ", strip=True) if heading else None
+
+
+def relevant_section(text: str, limit: int = SECTION_CHARS) -> str:
+    """단위/키워드 패턴이 가장 많이 모인 연속 줄 구간 (limit자 이내)"""
+    if len(text) <= limit:
+        return text
+    lines = text.split("\n")
+    scores = [len(_SECTION_HINT.findall(line)) for line in lines]
+    if not any(scores):
+        return text[:limit]
+
+    # 점수가 음수가 아니므로 투 포인터로 길이 제한 안의 최대 점수 구간 탐색
+    best = (0, 0, 0)  # score, start, end
+    start = length = score = 0
+    for end, line in enumerate(lines):
+        length += len(line) + 1
+        score += scores[end]
+        while length > limit and start <= end:
+            length -= len(lines[start]) + 1
+            score -= scores[start]
+            start += 1
+        if score > best[0]:
+            best = (score, start, end + 1)
+    # 앞뒤의 점수 없는 줄은 버리고, 제목 등 문맥용으로 몇 줄만 다시 붙임
+    _, start, end = best
+    while scores[start] == 0:
+        start += 1
+    while scores[end - 1] == 0:
+        end -= 1
+    start = max(start - SECTION_CONTEXT_LINES, 0)
+    end = min(end + SECTION_CONTEXT_LINES, len(lines))
+    return "\n".join(lines[start:end])[:limit]
+
+
+def preparse_soup(soup: BeautifulSoup, text_content: str) -> PreparseResult:
+    """로컬 추출 결과 (여러 방식 중 confidence가 가장 높은 것) + LLM에 보낼 구간"""
+    candidates = [r for r in (_from_jsonld(soup), _from_microdata(soup)) if r is not None]
+    lines = text_content.split("\n")
+    candidates.append(_build("regex", _page_title(soup), lines, lines))
+
+    result = max(candidates, key=lambda r: (r.recipe is not None, r.confidence))
+    if result.recipe is None and result.confidence == 0:
+        result.method = "none"
+    result.section = relevant_section(text_content)
+    return result
+
+
+def preparse_html(html_content: str) -> PreparseResult:
+    soup = BeautifulSoup(html_content, "html.parser")
+    return preparse_soup(soup, soup.get_text(separator="\n", strip=True))
+
+
+def measure_corpus(directory: str, min_confidence: float) -> Dict[str, Any]:
+    """HTML 파일 디렉터리에 대해 로컬 추출 적중률(LLM 생략 비율) 측정"""
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            result = preparse_html(f.read())
+        pages[name] = {
+            "method": result.method,
+            "confidence": result.confidence,
+            "local": result.is_confident(min_confidence),
+            "recipe": result.recipe,
+        }
+    hits = sum(page["local"] for page in pages.values())
+    return {"pages": pages, "total": len(pages), "hits": hits, "hit_rate": hits / len(pages) if pages else 0.0}
+
+
+def main(argv=None):
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Measure the local recipe pre-parser hit rate on saved HTML pages")
+    parser.add_argument("directory")
+    parser.add_argument("--min-confidence", type=float, default=settings.CRAWL_PREPARSE_MIN_CONFIDENCE)
+    args = parser.parse_args(argv)
+    report = measure_corpus(args.directory, args.min_confidence)
+    for name, page in report["pages"].items():
+        print(f"{name}: {page['method']} confidence={page['confidence']} local={page['local']}")
+    print(f"hit rate: {report['hits']}/{report['total']} ({report['hit_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
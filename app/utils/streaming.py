@@ -0,0 +1,20 @@
+"""
+스트리밍 응답 인코딩 헬퍼 (NDJSON / Server-Sent Events)
+- 이벤트는 "type" 키를 가진 dict, SSE에서는 type을 event 이름으로 사용
+"""
+import json
+from typing import Any, Dict
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# 프록시(nginx 등)가 버퍼링하지 않고 바로 흘려보내도록
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def encode_ndjson(item: Dict[str, Any]) -> str:
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def encode_sse(item: Dict[str, Any]) -> str:
+    data = json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {item['type']}\ndata: {data}\n\n"
@@ -1,22 +1,37 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.controller.machine_state_service import machine_states
+from app.core.database import Base, get_db, get_async_sessionmaker, create_async_db_engine
 
-# 1. 테스트용 인메모리 SQLite DB 설정
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# 1. 테스트용 SQLite DB 설정
+# 동기 Session과 AsyncSession(aiosqlite)이 같은 데이터를 보도록 임시 파일 DB 사용
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{_db_path}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{_db_path}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient는 요청마다 이벤트 루프가 달라질 수 있으므로 커넥션을 재사용하지 않음
+async_engine = create_async_db_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # 2. DB 의존성 오버라이드
 def override_get_db():
     try:
@@ -25,7 +40,13 @@ def override_get_db():
     finally:
         db.close()
 
+def override_get_async_sessionmaker():
+    return TestingAsyncSessionLocal
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_sessionmaker] = override_get_async_sessionmaker
+# 머신 상태 write-behind도 테스트 DB에 기록
+machine_states.session_factory = TestingAsyncSessionLocal
 
 # 3. 테스트 실행 전후로 테이블 생성/삭제
 @pytest.fixture(scope="module")
@@ -37,4 +58,40 @@ def client():
         yield c
     
     # 테스트 종료 후 테이블 삭제
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=engine)
+
+
+# 4. 요청 하나가 실행하는 SQL 문 수 측정 (N+1 회귀 방지용)
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    with query_budget(n): 블록 안에서 실행된 SQL 문이 n개를 넘으면 실패
+    동기/비동기 테스트 엔진을 모두 감시
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        counter = QueryCounter()
+        targets = (engine, async_engine.sync_engine)
+        for target in targets:
+            event.listen(target, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            for target in targets:
+                event.remove(target, "before_cursor_execute", counter)
+        assert counter.count <= max_queries, (
+            f"{counter.count} queries (budget {max_queries}):\n" + "\n".join(counter.statements)
+        )
+    return budget
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core.database import create_async_db_engine, to_async_url
+
+
+def test_to_async_url_swaps_driver():
+    assert to_async_url("sqlite:///./coffee.db") == "sqlite+aiosqlite:///./coffee.db"
+    assert to_async_url("postgresql://u:p@db:5432/brew") == "postgresql+asyncpg://u:p@db:5432/brew"
+    # 이미 비동기 드라이버면 그대로 유지
+    assert to_async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+def test_machine_register_and_list_on_async_session(client):
+    client.post(
+        "/usr/signup",
+        json={"email": "async@test.com", "username": "async", "password": "password123"},
+    )
+    token = client.post(
+        "/usr/login",
+        json={"email": "async@test.com", "password": "password123"},
+    ).json()["access_token"]
+
+    response = client.post(
+        "/machine/ASYNC_MACHINE/register",
+        json={"email": "async@test.com", "machine_id": "ASYNC_MACHINE"},
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "registered"
+
+    response = client.get("/machine/list", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    machines = response.json()["machines"]
+    assert [m["machine_id"] for m in machines] == ["ASYNC_MACHINE"]
+
+
+def test_missing_async_driver_fails_with_clear_error():
+    with pytest.raises(RuntimeError, match="mysql\\+aiomysql"):
+        create_async_db_engine("mysql+aiomysql://u:p@localhost/brew")
@@ -0,0 +1,38 @@
+import time
+
+from app.core.auth import CurrentUser, TokenCache, token_cache
+
+
+def test_token_cache_lru_and_expiry():
+    cache = TokenCache(ttl_s=60, maxsize=2)
+    a, b, c = (CurrentUser(user_id=u, email=f"{u}@test.com") for u in ("a", "b", "c"))
+    cache.put("ta", a)
+    cache.put("tb", b)
+    assert cache.get("ta") == a  # ta가 최근 사용으로 이동
+    cache.put("tc", c)
+    assert cache.get("tb") is None
+    assert cache.get("ta") == a
+
+    # 토큰 만료(exp)가 TTL보다 먼저면 exp 기준으로 만료
+    cache.put("expired", c, token_exp=time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.invalidate_user("a")
+    assert cache.get("ta") is None
+
+
+def test_authenticated_requests_use_cache_and_invalidate_on_update(client):
+    client.post("/usr/signup", json={"email": "cache@test.com", "username": "before", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "cache@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    token_cache.clear()
+    assert client.get("/usr/me/info", headers=headers).json()["username"] == "before"
+    hits = token_cache.hits
+    assert client.get("/usr/me/info", headers=headers).status_code == 200
+    assert token_cache.hits == hits + 1
+
+    response = client.patch("/usr/me/info", headers=headers, json={"username": "after"})
+    assert response.status_code == 200
+    assert token_cache.get(token) is None
+    assert client.get("/usr/me/info", headers=headers).json()["username"] == "after"
@@ -0,0 +1,29 @@
+def _login(client, email):
+    client.post("/usr/signup", json={"email": email, "username": "brewer", "password": "password123"})
+    return client.post("/usr/login", json={"email": email, "password": "password123"}).json()["access_token"]
+
+
+def test_brew_done_is_saved_by_background_queue(client):
+    machine_id = "QUEUE_MACHINE"
+    token = _login(client, "queue@test.com")
+    client.post(f"/machine/{machine_id}/register", json={"email": "queue@test.com", "machine_id": machine_id})
+
+    with client.websocket_connect(f"/ws/machine/{machine_id}") as machine_ws:
+        with client.websocket_connect(f"/ws/app/{machine_id}?token={token}") as app_ws:
+            machine_ws.send_json({"type": "BREW_DONE", "recipe_id": 1, "result": {"temperature_c": 91.5}})
+            # 저장을 기다리지 않고 다음 무게 프레임이 바로 릴레이되어야 함
+            machine_ws.send_json({"type": "LOADCELL_VALUE", "value": 250.0})
+
+            received = [app_ws.receive_json() for _ in range(3)]
+            types = [m["type"] for m in received]
+            assert types[:2] == ["BREW_DONE", "LOADCELL_VALUE"]
+            assert types[2] == "BREW_LOG_CREATED"
+            assert received[2]["log"]["status"] == "logged"
+
+    assert client.get("/ws/metrics/brew_log_queue").status_code == 401
+    metrics = client.get("/ws/metrics/brew_log_queue", headers={"Authorization": f"Bearer {token}"}).json()
+    assert metrics["written"] >= 1
+    assert metrics["queue_depth"] == 0
+
+    logs = client.get("/usr/me/brew_log", headers={"Authorization": f"Bearer {token}"}).json()
+    assert logs["items"][0]["temperature_c"] == 91.5
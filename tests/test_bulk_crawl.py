@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlparse
+
+import pytest
+
+from app.controller import crawl_service
+
+RECIPE_DATA = {
+    "recipe_name": "Bulk V60",
+    "dose_g": 15.0,
+    "brew_ratio": 16.0,
+    "water_temperature_c": 93.0,
+    "grind_level": 90,
+    "total_water_g": 240.0,
+    "total_brew_time_s": 80.0,
+    "pouring_steps": [
+        {"step_number": 1, "water_g": 40.0, "pour_time_s": 10.0, "bloom_time_s": 30.0, "technique": "center"},
+        {"step_number": 2, "water_g": 200.0, "pour_time_s": 40.0, "technique": "spiral_out"},
+    ],
+}
+
+
+def _login(client, email):
+    client.post("/usr/signup", json={"email": email, "username": "crawler", "password": "password123"})
+    token = client.post("/usr/login", json={"email": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def fake_crawl(monkeypatch):
+    """호스트별/전체 동시 요청 수와 요청 시작 시각을 기록하는 가짜 fetch/extract"""
+    stats = {"active": 0, "max_active": 0, "hosts": {}, "starts": {}}
+
+    async def scrape(url):
+        host = urlparse(url).hostname
+        stats["active"] += 1
+        stats["hosts"][host] = stats["hosts"].get(host, 0) + 1
+        stats["max_active"] = max(stats["max_active"], stats["active"])
+        assert stats["hosts"][host] == 1
+        stats["starts"].setdefault(host, []).append(time.monotonic())
+        try:
+            await asyncio.sleep(0.2 if "slow" in url else 0.01)
+            if "missing" in url:
+                return f"Error fetching '{url}': 404"
+            return f"<html>{url}</html>"
+        finally:
+            stats["active"] -= 1
+            stats["hosts"][host] -= 1
+
+    async def extract(html):
+        return json.loads(json.dumps(RECIPE_DATA))
+
+    monkeypatch.setattr(crawl_service, "scrape_website_async", scrape)
+    monkeypatch.setattr(crawl_service, "extract_recipe_from_html_async", extract)
+    monkeypatch.setattr(crawl_service.bulk_crawler, "concurrency", 3)
+    monkeypatch.setattr(crawl_service.bulk_crawler, "per_host", 1)
+    monkeypatch.setattr(crawl_service.bulk_crawler, "host_delay_s", 0.05)
+    monkeypatch.setattr(crawl_service.bulk_crawler, "_loop", None)
+    return stats
+
+
+def test_bulk_crawl_streams_ndjson_with_politeness(client, fake_crawl):
+    headers = _login(client, "bulk@test.com")
+    urls = [
+        "https://slow.example/a",
+        "https://roaster.example/1",
+        "https://roaster.example/2",
+        "https://roaster.example/3",
+        "https://other.example/missing",
+        "ftp://bad",
+    ]
+    with client.stream("POST", "/recipe/crawl/bulk", headers=headers, json={"urls": urls, "save": True}) as res:
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in res.iter_lines() if line]
+
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(r["index"] for r in results) == list(range(len(urls)))
+    # 느린 URL이 다른 결과를 막지 않음
+    assert results[-1]["url"] == "https://slow.example/a"
+    by_url = {r["url"]: r for r in results}
+    assert by_url["https://other.example/missing"]["error"] == "fetch_failed"
+    assert by_url["ftp://bad"]["error"] == "invalid_url"
+    assert by_url["https://roaster.example/1"]["recipe"]["source"] == "crawled"
+
+    assert fake_crawl["max_active"] <= 3
+    starts = fake_crawl["starts"]["roaster.example"]
+    assert all(b - a >= 0.045 for a, b in zip(starts, starts[1:]))
+
+    assert summary["type"] == "summary"
+    assert (summary["total"], summary["ok"], summary["failed"]) == (6, 4, 2)
+    assert len(summary["saved_recipe_ids"]) == 4
+    saved = client.get(f"/recipe/{summary['saved_recipe_ids'][0]}").json()
+    assert saved["source"] == "crawled"
+    assert [s["step_number"] for s in saved["pouring_steps"]] == [1, 2]
+
+
+def test_bulk_crawl_sse_and_limits(client, fake_crawl, monkeypatch):
+    headers = _login(client, "bulk-sse@test.com")
+    res = client.post(
+        "/recipe/crawl/bulk",
+        headers={**headers, "Accept": "text/event-stream"},
+        json={"urls": ["https://roaster.example/sse"]},
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in res.text.strip().split("\n\n")]
+    assert [e[0] for e in events] == ["event: result", "event: summary"]
+    assert "saved_recipe_ids" not in json.loads(events[1][1][len("data: "):])
+
+    monkeypatch.setattr(crawl_service.settings, "CRAWL_BULK_MAX_URLS", 1)
+    res = client.post("/recipe/crawl/bulk", headers=headers, json={"urls": ["https://a.example", "https://b.example"]})
+    assert res.status_code == 422
+    assert client.post("/recipe/crawl/bulk", json={"urls": ["https://a.example"]}).status_code in (401, 403)
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.controller import recipe_service
+from app.services.crawl_cache import CrawlCache
+from app.utils import openai_helper
+
+RECIPE_DATA = {
+    "recipe_name": "Async V60",
+    "dose_g": 15.0,
+    "water_temperature_c": 93.0,
+    "grind_level": 90,
+    "total_water_g": 250.0,
+    "pouring_steps": [
+        {"step_number": 1, "water_g": 50.0, "pour_time_s": 10.0, "wait_time_s": 30.0},
+        {"step_number": 2, "water_g": 200.0, "pour_time_s": 40.0},
+    ],
+}
+
+
+def _mock_client(monkeypatch, handler):
+    monkeypatch.setattr(openai_helper, "page_cache", CrawlCache(ttl_s=60, maxsize=8))
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(openai_helper, "_http_client", client)
+    return client
+
+
+def test_scrape_website_async_uses_shared_client(monkeypatch):
+    def handler(request):
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(200, text="<html>recipe</html>")
+
+    async def run():
+        _mock_client(monkeypatch, handler)
+        ok = await openai_helper.scrape_website_async("https://example.com/post")
+        missing = await openai_helper.scrape_website_async("https://example.com/missing")
+        await openai_helper.close_http_clients()
+        return ok, missing
+
+    ok, missing = asyncio.run(run())
+    assert ok == "<html>recipe</html>"
+    assert missing.startswith("Error fetching 'https://example.com/missing'")
+    assert openai_helper._http_client is None
+
+
+def test_crawl_endpoint_is_async(client, monkeypatch):
+    async def fake_scrape(url):
+        return "<html>recipe</html>"
+
+    async def fake_extract(html):
+        return dict(RECIPE_DATA)
+
+    monkeypatch.setattr(recipe_service, "scrape_website_async", fake_scrape)
+    monkeypatch.setattr(recipe_service, "extract_recipe_from_html_async", fake_extract)
+
+    res = client.get("/recipe/crawl", params={"url": "https://example.com/post"})
+    assert res.status_code == 200
+    recipe = res.json()["recipe_data"]
+    assert recipe["recipe_name"] == "Async V60"
+    assert [s["step_number"] for s in recipe["pouring_steps"]] == [1, 2]
+
+
+def test_crawl_endpoint_times_out(client, monkeypatch):
+    async def slow_scrape(url):
+        await asyncio.sleep(5)
+        return "<html></html>"
+
+    monkeypatch.setattr(recipe_service, "scrape_website_async", slow_scrape)
+    monkeypatch.setattr(settings, "CRAWL_TOTAL_TIMEOUT_S", 0.05)
+
+    res = client.get("/recipe/crawl", params={"url": "https://example.com/slow"})
+    assert res.status_code == 504
+    assert res.json()["detail"] == "crawl_timeout"
+
+    async def fail_scrape(url):
+        return "Error fetching 'https://example.com/bad': 404"
+
+    monkeypatch.setattr(recipe_service, "scrape_website_async", fail_scrape)
+    assert client.get("/recipe/crawl", params={"url": "https://example.com/bad"}).status_code == 422
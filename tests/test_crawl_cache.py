@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.crawl_cache import CrawlCache, make_key
+from app.utils import openai_helper
+
+RECIPE_JSON = {
+    "recipe_name": "Cached V60",
+    "dose_g": 15.0,
+    "water_temperature_c": 93.0,
+    "grind_level": 90,
+    "total_water_g": 250.0,
+    "pouring_steps": [
+        {"step_number": 1, "water_g": 50.0, "pour_time_s": 10.0},
+        {"step_number": 2, "water_g": 200.0, "pour_time_s": 40.0},
+    ],
+}
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    pages = CrawlCache(ttl_s=3600, maxsize=16, directory=str(tmp_path / "pages"))
+    extractions = CrawlCache(ttl_s=3600, maxsize=16, directory=str(tmp_path / "extractions"))
+    monkeypatch.setattr(openai_helper, "page_cache", pages)
+    monkeypatch.setattr(openai_helper, "extraction_cache", extractions)
+    return pages, extractions
+
+
+def test_page_is_revalidated_with_conditional_get(caches, monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(dict(request.headers))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html="<html>v1</html>", headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Sep 2025 00:00:00 GMT"})
+
+    async def run():
+        monkeypatch.setattr(openai_helper, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        first = await openai_helper.scrape_website_async("https://blog.example/v60")
+        # 신선한 동안은 요청 자체를 생략
+        fresh = await openai_helper.scrape_website_async("https://blog.example/v60")
+        monkeypatch.setattr(settings, "CRAWL_PAGE_FRESH_S", 0)
+        revalidated = await openai_helper.scrape_website_async("https://blog.example/v60")
+        await openai_helper.close_http_clients()
+        return first, fresh, revalidated
+
+    first, fresh, revalidated = asyncio.run(run())
+    assert first == fresh == revalidated == "<html>v1</html>"
+    assert len(seen) == 2
+    assert "if-none-match" not in seen[0]
+    assert seen[1]["if-none-match"] == '"v1"'
+    assert seen[1]["if-modified-since"] == "Mon, 01 Sep 2025 00:00:00 GMT"
+
+
+def test_non_html_and_oversized_pages_are_not_cached(caches, monkeypatch):
+    pages, _ = caches
+    monkeypatch.setattr(settings, "CRAWL_PAGE_CACHE_MAX_CHARS", 100)
+
+    def handler(request):
+        if request.url.path == "/feed":
+            return httpx.Response(200, json={"recipes": []})
+        if request.url.path == "/huge":
+            return httpx.Response(200, html="<html>" + "x" * 200 + "</html>")
+        return httpx.Response(200, html="<html>v60</html>")
+
+    async def run():
+        monkeypatch.setattr(openai_helper, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        bodies = [await openai_helper.scrape_website_async(f"https://blog.example/{path}") for path in ("feed", "huge", "v60")]
+        await openai_helper.close_http_clients()
+        return bodies
+
+    _, huge, page = asyncio.run(run())
+    # 응답은 그대로 돌려주고 저장만 생략
+    assert len(huge) > 200 and page == "<html>v60</html>"
+    stored = {path: pages.get(make_key(f"https://blog.example/{path}")) is not None for path in ("feed", "huge", "v60")}
+    assert stored == {"feed": False, "huge": False, "v60": True}
+
+
+def test_extraction_is_keyed_by_normalized_text_and_prompt_version(caches, monkeypatch):
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content=json.dumps(RECIPE_JSON))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(openai_helper, "get_async_openai_client", lambda: fake_client)
+
+    async def run():
+        first = await openai_helper.extract_recipe_from_html_async("<p>15g coffee</p><p>250g water</p>")
+        # 마크업/공백만 다른 같은 글 → 캐시 적중
+        first["recipe_name"] = "mutated by caller"
+        second = await openai_helper.extract_recipe_from_html_async("<div>\n 15g   coffee</div><div>250g water</div>")
+        monkeypatch.setattr(openai_helper, "EXTRACTION_PROMPT_VERSION", "test-v2")
+        third = await openai_helper.extract_recipe_from_html_async("<p>15g coffee</p><p>250g water</p>")
+        # pre-parser 규칙이 바뀌어도 다시 추출
+        monkeypatch.setattr(openai_helper, "PREPARSER_VERSION", "test-v2")
+        await openai_helper.extract_recipe_from_html_async("<p>15g coffee</p><p>250g water</p>")
+        return second, third
+
+    second, third = asyncio.run(run())
+    assert len(calls) == 3
+    assert second["recipe_name"] == third["recipe_name"] == "Cached V60"
+
+
+def test_disk_store_survives_restart_and_expires(tmp_path, monkeypatch):
+    directory = str(tmp_path / "store")
+    CrawlCache(ttl_s=60, maxsize=4, directory=directory).put("a" * 64, {"html": "saved"})
+
+    restarted = CrawlCache(ttl_s=60, maxsize=4, directory=directory)
+    assert restarted.get("a" * 64) == {"html": "saved"}
+    assert restarted.get("b" * 64) is None
+    assert (restarted.hits, restarted.misses) == (1, 1)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert CrawlCache(ttl_s=60, maxsize=4, directory=directory).get("a" * 64) is None
+    assert not os.path.exists(os.path.join(directory, "aa", "a" * 64 + ".json"))
+
+
+def test_memory_and_disk_eviction(tmp_path):
+    directory = str(tmp_path / "store")
+    cache = CrawlCache(ttl_s=60, maxsize=2, directory=directory, disk_max_entries=10)
+    for i in range(12):
+        cache.put(f"{i:064x}", {"i": i})
+        # mtime 순서가 확실하도록
+        path = os.path.join(directory, f"{i:064x}"[:2], f"{i:064x}.json")
+        os.utime(path, (i, i))
+
+    assert cache.info()["size"] == 2
+    remaining = sorted(name for _, _, names in os.walk(directory) for name in names)
+    assert len(remaining) <= 10
+    # 가장 오래된 파일부터 삭제
+    assert f"{0:064x}.json" not in remaining
+    assert f"{11:064x}.json" in remaining
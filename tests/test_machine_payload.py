@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+from app.services.machine_payload import (
+    BINARY_HEADER, BINARY_MAGIC, BINARY_STEP, TECHNIQUE_CODES,
+    build_recipe_message, encode_recipe_frames, machine_payloads,
+)
+
+RECIPE = {
+    "recipe_name": "Machine V60",
+    "dose_g": 15,
+    "water_temperature_c": 93.5,
+    "grind_level": 90,
+    "pouring_steps": [
+        {"step_number": 1, "water_g": 40, "pour_time_s": 10, "wait_time_s": 30, "technique": "center"},
+        {"step_number": 2, "water_g": 200.5, "pour_time_s": 40, "technique": "spiral_out"},
+    ],
+}
+
+
+def _login(client, email):
+    client.post("/usr/signup", json={"email": email, "username": "brewer", "password": "password123"})
+    token = client.post("/usr/login", json={"email": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _unpack(frame):
+    header = BINARY_HEADER.unpack_from(frame)
+    steps = [BINARY_STEP.unpack_from(frame, BINARY_HEADER.size + i * BINARY_STEP.size) for i in range(header[-1])]
+    assert len(frame) == BINARY_HEADER.size + len(steps) * BINARY_STEP.size
+    return header, steps
+
+
+def test_binary_handshake_and_cached_payload(client, query_budget):
+    machine_payloads.clear()
+    headers = _login(client, "payload@test.com")
+    recipe_id = client.post("/recipe/", headers=headers, json=RECIPE).json()["recipe_id"]
+    machine_id = "PAYLOAD_MACHINE"
+
+    with client.websocket_connect(f"/ws/machine/{machine_id}") as machine_ws:
+        machine_ws.send_json({"type": "HELLO", "encodings": ["binary", "json"]})
+        assert machine_ws.receive_json() == {"type": "HELLO_ACK", "encoding": "binary"}
+
+        res = client.post(f"/machine/{machine_id}/prepare", headers=headers, json={"recipe_id": str(recipe_id)})
+        assert res.json()["loaded_recipe_id"] == recipe_id
+        frame = machine_ws.receive_bytes()
+        header, steps = _unpack(frame)
+        assert header == (BINARY_MAGIC, 1, 1, recipe_id, 0, 935, 150, 80, 90, 600, 2)
+        assert steps == [(1, 400, TECHNIQUE_CODES["center"], 10, 30), (2, 2005, TECHNIQUE_CODES["spiral_out"], 40, 0)]
+
+        # 같은 버전이면 updated_at 조회 1번으로 끝남 (단계 재조회/재인코딩 없음)
+        with query_budget(1):
+            client.post(f"/machine/{machine_id}/prepare", headers=headers, json={"recipe_id": str(recipe_id)})
+        assert machine_ws.receive_bytes() == frame
+        assert machine_payloads.hits == 1
+
+        # 레시피를 수정하면 새 버전으로 다시 컴파일
+        client.patch(f"/recipe/{recipe_id}", headers=headers, json={"dose_g": 18})
+        client.post(f"/machine/{machine_id}/prepare", headers=headers, json={"recipe_id": str(recipe_id)})
+        header, _ = _unpack(machine_ws.receive_bytes())
+        assert header[6] == 180
+
+
+def test_machine_without_handshake_gets_json(client):
+    headers = _login(client, "payload-json@test.com")
+    recipe_id = client.post("/recipe/", headers=headers, json=RECIPE).json()["recipe_id"]
+
+    with client.websocket_connect("/ws/machine/JSON_MACHINE") as machine_ws:
+        client.post("/machine/JSON_MACHINE/prepare", headers=headers, json={"recipe_id": str(recipe_id)})
+        command = machine_ws.receive_json()
+    assert command["type"] == "RECIPE_DATA"
+    assert command["recipe"]["dose_g"] == 15.0
+    assert command["recipe"]["total_brew_time_s"] == 80
+    assert [s["technique"] for s in command["recipe"]["pouring_steps"]] == ["center", "spiral_out"]
+
+    missing = client.post("/machine/JSON_MACHINE/prepare", headers=headers, json={"recipe_id": "999999"})
+    assert missing.status_code == 404
+
+
+def test_binary_frame_is_compact_and_optional():
+    steps = [
+        SimpleNamespace(step_number=n, water_g=50.0, pour_time_s=10, wait_time_s=20, technique=None)
+        for n in range(1, 6)
+    ]
+    recipe = SimpleNamespace(rinsing=True, water_temperature_c=92.0, dose_g=15.0, total_brew_time_s=None,
+                             grind_level=None, grind_microns=None, pouring_steps=steps)
+    frames = encode_recipe_frames(1, build_recipe_message(recipe))
+    assert len(frames["binary"]) * 4 < len(frames["json"].encode())
+
+    # 범위를 벗어나는 값이 있으면 binary 프레임 없이 JSON으로 보냄
+    recipe.total_brew_time_s = 10 ** 6
+    frames = encode_recipe_frames(1, build_recipe_message(recipe))
+    assert "binary" not in frames and "json" in frames
@@ -0,0 +1,90 @@
+import pytest
+from conftest import TestingSessionLocal
+from starlette.websockets import WebSocketDisconnect
+
+from app.controller.machine_state_service import machine_states
+from app.controller.ws_service import ws_manager
+from app.models.machine import Machine
+
+
+def _login(client, email):
+    client.post("/usr/signup", json={"email": email, "username": "brewer", "password": "password123"})
+    token = client.post("/usr/login", json={"email": email, "password": "password123"}).json()["access_token"]
+    return token, {"Authorization": f"Bearer {token}"}
+
+
+def _db_row(machine_id):
+    db = TestingSessionLocal()
+    try:
+        machine = db.get(Machine, machine_id)
+        return machine.current_phase.value, machine.last_brew_id
+    finally:
+        db.close()
+
+
+def test_status_is_served_from_memory_and_flushed_in_batches(client, query_budget, monkeypatch):
+    machine_id = "STATE_MACHINE"
+    token, headers = _login(client, "state@test.com")
+    client.post(f"/machine/{machine_id}/register", json={"email": "state@test.com", "machine_id": machine_id})
+    # 테스트 중에는 주기적 flush가 끼어들지 않게 함
+    monkeypatch.setattr(machine_states, "flush_interval_s", 3600)
+
+    with client.websocket_connect(f"/ws/machine/{machine_id}") as machine_ws:
+        with client.websocket_connect(f"/ws/app/{machine_id}?token={token}") as app_ws:
+            machine_ws.send_json({"type": "BREW_STATUS", "phase": "pouring", "step_no": 2, "brew_id": "brew-1"})
+            for value in (120.0, 180.5):
+                machine_ws.send_json({"type": "LOADCELL_VALUE", "value": value})
+            machine_ws.send_json({"type": "BREW_STATUS", "phase": "pouring", "step_no": 3})
+            # 앱이 마지막 상태 프레임을 받으면 서버 처리가 끝난 것
+            while app_ws.receive_json().get("step_no") != 3:
+                pass
+
+            # 소유 확인 조회 1번 외에는 DB를 읽지도 쓰지도 않음
+            with query_budget(1):
+                live = client.get(f"/machine/{machine_id}/status", headers=headers).json()
+            assert live["online"] is True
+            assert (live["current_phase"], live["step_no"], live["last_brew_id"]) == ("pouring", 3, "brew-1")
+            assert live["weight_g"] == 180.5
+            assert _db_row(machine_id) == ("idle", None)
+
+            listed = client.get("/machine/list", headers=headers).json()["machines"]
+            assert (listed[0]["online"], listed[0]["current_phase"]) == (True, "pouring")
+
+            # 밀린 변경은 UPDATE 한 번으로 기록
+            with query_budget(1):
+                client.portal.call(machine_states.flush)
+            assert _db_row(machine_id) == ("pouring", "brew-1")
+
+    status = client.get(f"/machine/{machine_id}/status", headers=headers).json()
+    assert (status["online"], status["current_phase"]) == (False, "pouring")
+    client.portal.call(machine_states.flush)
+    # 기록이 끝난 오프라인 머신은 메모리에서 빠지고 DB 값으로 응답
+    assert machine_states.get(machine_id) is None
+    status = client.get(f"/machine/{machine_id}/status", headers=headers).json()
+    assert (status["online"], status["current_phase"], status["last_brew_id"]) == (False, "pouring", "brew-1")
+
+    assert client.get("/ws/metrics/machine_states").status_code == 401
+    metrics = client.get("/ws/metrics/machine_states", headers=headers).json()
+    assert metrics["failed"] == 0 and metrics["pending"] == 0
+
+
+def test_status_requires_owned_machine(client):
+    _, headers = _login(client, "state-other@test.com")
+    assert client.get("/machine/STATE_MACHINE/status", headers=headers).status_code == 404
+    assert client.get("/machine/STATE_MACHINE/status").status_code in (401, 403)
+
+
+def test_bad_frame_marks_machine_offline(client):
+    machine_id = "STATE_BAD_FRAME"
+    _, headers = _login(client, "state-bad@test.com")
+    client.post(f"/machine/{machine_id}/register", json={"email": "state-bad@test.com", "machine_id": machine_id})
+
+    with client.websocket_connect(f"/ws/machine/{machine_id}") as machine_ws:
+        machine_ws.send_json({"type": "BREW_STATUS", "phase": "blooming"})
+        machine_ws.send_text("not json")
+        with pytest.raises(WebSocketDisconnect):
+            machine_ws.receive_text()
+
+    status = client.get(f"/machine/{machine_id}/status", headers=headers).json()
+    assert (status["online"], status["current_phase"]) == (False, "blooming")
+    assert not client.portal.call(ws_manager.is_machine_connected, machine_id)
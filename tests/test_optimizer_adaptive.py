@@ -0,0 +1,41 @@
+import numpy as np
+
+from app.services import coffee_optimizer as opt
+
+FEEDBACKS = [
+    # base_tds, base_taste, taste, tds, weight, intensity
+    (1.0, 3.0, 2, 6, 4.0, 4.0),
+    (0.8, 2.5, 6, 2, 5.0, 3.0),
+    (1.2, 4.0, 4, 4, 4.0, 4.0),
+    (0.7, 2.0, 1, 7, 2.0, 6.0),
+]
+
+
+def _error(candidate, weight_fb):
+    weight_taste = weight_fb / 4.0
+    # 반올림된 표시값이 아니라 보간기로 다시 계산
+    point = np.array([[candidate['grind_level'], candidate['ratio'], candidate['water_temp_c']]])
+    tds = opt._interpolators['tds'](point)[0]
+    taste = opt._interpolators['taste'](point)[0]
+    return abs(tds - candidate['goal_tds']) + weight_taste * abs(taste - candidate['goal_taste'])
+
+
+def test_adaptive_search_on_coarse_grid_beats_dense_grid():
+    try:
+        opt.load_and_build_model(n_points=31)
+        dense = [opt.recommend_next_recipe(*fb, top_k=3)[0] for fb in FEEDBACKS]
+
+        opt.load_and_build_model(n_points=11)
+        assert opt._fine_grid['tds'].shape == (11, 11, 11)
+        adaptive = opt.recommend_next_recipes(*zip(*FEEDBACKS), top_k=3, search="adaptive")
+    finally:
+        opt.load_and_build_model()
+
+    for fb, grid_best, refined in zip(FEEDBACKS, dense, adaptive):
+        assert [c['rank'] for c in refined] == [1, 2, 3]
+        best = refined[0]
+        assert 75 <= best['grind_level'] <= 105
+        assert 1.0 <= best['ratio'] <= 3.0
+        assert 85 <= best['water_temp_c'] <= 95
+        # 11³ 격자 + 국소 탐색이 31³ 격자 결과보다 나쁘지 않아야 함
+        assert _error(best, fb[4]) <= _error(grid_best, fb[4]) + 1e-3
@@ -0,0 +1,81 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import coffee_model_build
+from app.services import coffee_optimizer as opt
+
+
+@pytest.fixture
+def model_paths(tmp_path, monkeypatch):
+    csv_path = tmp_path / "coffee_data.csv"
+    shutil.copy(settings.OPTIMIZER_DATA_PATH, csv_path)
+    artifact_dir = tmp_path / "artifacts"
+    monkeypatch.setattr(settings, "OPTIMIZER_DATA_PATH", str(csv_path))
+    monkeypatch.setattr(settings, "OPTIMIZER_ARTIFACT_DIR", str(artifact_dir))
+    yield csv_path, artifact_dir
+    monkeypatch.undo()
+    opt.load_and_build_model()
+
+
+def test_artifact_is_built_once_and_memory_mapped(model_paths, monkeypatch):
+    csv_path, artifact_dir = model_paths
+
+    meta = opt.load_model()
+    assert meta["csv_sha256"] == opt.csv_fingerprint(str(csv_path))
+    assert os.listdir(artifact_dir) == [os.path.basename(meta["path"])]
+    assert isinstance(opt._fine_grid["tds"], np.memmap)
+
+    # 같은 CSV면 다시 빌드하지 않음
+    def fail_build(*args, **kwargs):
+        raise AssertionError("artifact rebuilt for unchanged csv")
+    monkeypatch.setattr(coffee_model_build, "_build_arrays", fail_build)
+    assert opt.load_model()["path"] == meta["path"]
+
+    assert opt.recommend_next_recipe(1.0, 3.0, 2, 6)[0]["rank"] == 1
+
+
+def test_artifact_rebuilds_when_csv_changes(model_paths):
+    csv_path, artifact_dir = model_paths
+    first = opt.load_model()
+    before = opt.estimate_outcome(90, 1.6667, 90)
+
+    with open(csv_path) as f:
+        lines = f.read().splitlines()
+    # 14번 레시피(90, 1.667, 90)의 맛 점수 변경
+    lines = [
+        ",".join(line.split(",")[:-1] + ["6.0"]) if line.startswith("14,") else line
+        for line in lines
+    ]
+    csv_path.write_text("\n".join(lines) + "\n")
+
+    second = opt.load_model()
+    assert second["path"] != first["path"]
+    assert len(os.listdir(artifact_dir)) == 2
+    assert opt.estimate_outcome(90, 1.6667, 90)["predicted_taste"] != before["predicted_taste"]
+
+
+def test_recommend_loads_model_lazily(model_paths, monkeypatch):
+    monkeypatch.setattr(opt, "_fine_grid", None)
+    monkeypatch.setattr(opt, "_interpolators", None)
+    results = opt.recommend_next_recipe(1.0, 3.0, 4, 4)
+    assert len(results) == 5
+
+
+def test_trilinear_interpolator_matches_scipy():
+    from scipy.interpolate import RegularGridInterpolator
+
+    rng = np.random.default_rng(1)
+    axes = (np.array([75.0, 90.0, 105.0]), np.array([1.0, 5 / 3, 3.0]), np.array([85.0, 90.0, 95.0]))
+    values = rng.uniform(0.5, 2.0, (3, 3, 3))
+    # 격자 안/경계/밖(외삽) 점을 모두 포함
+    points = np.column_stack([
+        rng.uniform(60, 120, 500), rng.uniform(0.5, 3.5, 500), rng.uniform(80, 100, 500),
+    ])
+    points[:3] = [[75, 1.0, 85], [105, 3.0, 95], [90, 5 / 3, 90]]
+
+    expected = RegularGridInterpolator(axes, values, bounds_error=False, fill_value=None)(points)
+    np.testing.assert_allclose(opt.TrilinearInterpolator(axes, values)(points), expected, rtol=1e-12)
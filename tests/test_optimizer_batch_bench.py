@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+
+from app.services import coffee_optimizer as opt
+
+N_FEEDBACKS = 200
+
+
+def _legacy_recommend(base_tds, base_taste, taste_fb, tds_fb, weight_fb, intensity_fb, top_k=5):
+    # 기존 단건 경로: 피드백마다 31³ error 배열 생성 + 전체 argsort
+    goal_tds, goal_taste, weight_taste = (
+        float(v) for v in opt._goal_values(base_tds, base_taste, taste_fb, tds_fb, weight_fb, intensity_fb)
+    )
+    error = np.abs(opt._fine_grid['tds'] - goal_tds) + weight_taste * np.abs(opt._fine_grid['taste'] - goal_taste)
+    best_idxs = np.argsort(error.ravel(), kind='stable')[:top_k * 3]
+    return opt._format_candidates(best_idxs, goal_tds, goal_taste, top_k)
+
+
+def _feedbacks():
+    rng = np.random.default_rng(0)
+    return (
+        rng.uniform(0.5, 1.5, N_FEEDBACKS),
+        rng.uniform(1.5, 5.0, N_FEEDBACKS),
+        rng.integers(1, 8, N_FEEDBACKS),
+        rng.integers(1, 8, N_FEEDBACKS),
+        rng.integers(1, 8, N_FEEDBACKS).astype(float),
+        rng.integers(1, 8, N_FEEDBACKS).astype(float),
+    )
+
+
+def test_batched_recommendation_matches_scalar():
+    opt.load_and_build_model()
+    feedbacks = _feedbacks()
+    rows = list(zip(*feedbacks))
+
+    started = time.perf_counter()
+    legacy = [_legacy_recommend(*row) for row in rows]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scalar = [opt.recommend_next_recipe(*row) for row in rows]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = opt.recommend_next_recipes(*feedbacks)
+    batched_s = time.perf_counter() - started
+
+    print()
+    print(f"{'path':>22} {'ms/feedback':>12}")
+    for name, elapsed in (("legacy argsort", legacy_s), ("scalar argpartition", scalar_s), ("batched", batched_s)):
+        print(f"{name:>22} {elapsed / N_FEEDBACKS * 1e3:>12.3f}")
+
+    assert batched == scalar
+    assert [[c['predicted_tds'] for c in r] for r in batched] == [[c['predicted_tds'] for c in r] for r in legacy]
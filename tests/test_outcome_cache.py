@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+
+from app.services import coffee_optimizer as opt
+
+
+def test_estimate_outcome_uses_quantized_lru_cache():
+    opt.load_and_build_model()
+    cache = opt.outcome_cache
+    assert cache.info()["size"] == 0
+    hits, misses = cache.hits, cache.misses
+
+    first = opt.estimate_outcome(90.01, 1.6667, 90.0)
+    # 같은 양자화 칸 (grind 0.1 단위)이면 캐시 적중
+    second = opt.estimate_outcome(90.04, 1.6667, 90.0)
+    assert (cache.misses - misses, cache.hits - hits) == (1, 1)
+    assert second["predicted_tds"] == first["predicted_tds"]
+    assert second["grind_level"] == 90.04
+
+    opt.estimate_outcome(90.2, 1.6667, 90.0)
+    assert cache.misses - misses == 2
+
+    # 모델을 다시 로드하면 캐시를 비움
+    opt.load_and_build_model()
+    assert cache.info()["size"] == 0
+
+
+def test_estimate_outcomes_matches_scalar():
+    opt.load_and_build_model()
+    rng = np.random.default_rng(0)
+    n = 500
+    grinds, ratios, temps = rng.uniform(75, 105, n), rng.uniform(1.0, 3.0, n), rng.uniform(85, 95, n)
+
+    started = time.perf_counter()
+    scalar = [opt.estimate_outcome(g, r, t) for g, r, t in zip(grinds, ratios, temps)]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = opt.estimate_outcomes(grinds, ratios, temps)
+    batched_s = time.perf_counter() - started
+
+    print(f"\nestimate_outcome x{n}: {scalar_s * 1e3:.2f} ms, estimate_outcomes: {batched_s * 1e3:.2f} ms")
+    assert batched == scalar
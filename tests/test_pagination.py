@@ -0,0 +1,41 @@
+def test_bean_list_cursor_walk_matches_page_mode(client):
+    for i in range(5):
+        client.post("/bean/", json={"bean_name": f"bean-{i}", "origin": "Ethiopia", "roast_level": 2})
+
+    paged = client.get("/bean/", params={"page": 1, "page_size": 100}).json()
+    expected = [b["bean_id"] for b in paged["items"]]
+
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/bean/", params=params).json()
+        seen += [b["bean_id"] for b in body["items"]]
+        # cursor 모드에서는 기본적으로 count를 생략
+        assert body["total"] == (None if "cursor" in params else len(expected))
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def test_brew_log_cursor_pagination_newest_first(client):
+    client.post("/usr/signup", json={"email": "page@test.com", "username": "p", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "page@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(5):
+        client.post("/usr/me/brew_log", headers=headers,
+                    json={"recipe_id": 1, "machine_id": "M", "brew_id": f"brew-{i}"})
+
+    first = client.get("/usr/me/brew_log", headers=headers, params={"page_size": 2}).json()
+    assert [log["brew_id"] for log in first["items"]] == ["brew-4", "brew-3"]
+    assert first["total"] == 5
+
+    second = client.get("/usr/me/brew_log", headers=headers,
+                        params={"page_size": 2, "cursor": first["next_cursor"]}).json()
+    assert [log["brew_id"] for log in second["items"]] == ["brew-2", "brew-1"]
+    assert second["total"] is None
+
+    bad = client.get("/usr/me/brew_log", headers=headers, params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
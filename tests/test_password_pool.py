@@ -0,0 +1,72 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.core.auth import PasswordHashPool, password_pool, pwd_context
+
+
+def test_pool_rejects_with_429_when_saturated():
+    async def scenario():
+        pool = PasswordHashPool(pwd_context, workers=1, max_pending=1)
+        release = threading.Event()
+        blocked = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(HTTPException) as exc:
+            await pool.verify("password123", "$argon2id$v=19$m=8,t=1,p=1$c2FsdHNhbHQ$aGFzaA")
+        assert exc.value.status_code == 429
+        assert pool.rejected == 1
+
+        release.set()
+        await blocked
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_password_change_goes_through_pool(client, monkeypatch):
+    client.post("/usr/signup", json={"email": "pool@test.com", "username": "pool", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "pool@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with monkeypatch.context() as m:
+        m.setattr(password_pool, "max_pending", 0)
+        assert client.patch("/usr/me/info", headers=headers, json={"password": "changed456"}).status_code == 429
+
+    assert client.patch("/usr/me/info", headers=headers, json={"password": "changed456"}).status_code == 200
+    assert client.post("/usr/login", json={"email": "pool@test.com", "password": "changed456"}).status_code == 200
+
+
+def test_default_cost_keeps_existing_hashes_current():
+    # 기본 비용은 passlib 기본값과 같아야 기존 해시가 deprecated(재해싱 대상)로 바뀌지 않음
+    existing = CryptContext(schemes=["argon2"]).hash("password123")
+    assert pwd_context.verify("password123", existing)
+    assert not pwd_context.needs_update(existing)
+
+
+def test_login_verify_throughput_benchmark():
+    # 운영 설정과 같은 구조의 argon2 해시를 검증 (테스트 시간 때문에 비용만 낮춤)
+    context = CryptContext(schemes=["argon2"], argon2__time_cost=2, argon2__memory_cost=8192, argon2__parallelism=1)
+    hashed = context.hash("password123")
+    cores = os.cpu_count() or 1
+    logins = 64
+
+    async def run(workers: int) -> float:
+        pool = PasswordHashPool(context, workers=workers, max_pending=logins)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(pool.verify("password123", hashed) for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+        assert all(results)
+        return logins / elapsed
+
+    print()
+    print(f"{'workers':>7} {'logins/s':>10} {'logins/s/core':>14}  (cpu_count={cores})")
+    for workers in sorted({1, min(4, cores)}):
+        throughput = asyncio.run(run(workers))
+        print(f"{workers:>7} {throughput:>10.1f} {throughput / min(workers, cores):>14.1f}")
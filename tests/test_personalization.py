@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+from conftest import TestingSessionLocal
+from app.models.taste_model import UserTasteModel
+from app.services import coffee_optimizer as opt
+from app.services.personalization import ResidualModel, TASTE_PER_POINT
+
+
+def test_update_touches_only_surrounding_grid_points():
+    opt.load_and_build_model()
+    axes = opt.data_axes()
+    model = ResidualModel()
+    assert model.correction() is None
+
+    model.update(axes, (82.5, 1.6667, 87.5), taste_fb=2, tds_fb=4)
+    assert np.count_nonzero(model.weights) == 8
+    assert np.isclose(model.weights.sum(), 1.0)
+
+    # 같은 점에 리뷰가 쌓일수록 보정값이 관측 잔차(-2 × 0.35)에 가까워짐
+    first = model.correction()["taste"].min()
+    for _ in range(20):
+        model.update(axes, (82.5, 1.6667, 87.5), taste_fb=2, tds_fb=4)
+    converged = model.correction()["taste"].min()
+    assert -2 * TASTE_PER_POINT < converged < first < 0
+    assert np.allclose(model.correction()["tds"], 0)
+
+    restored = ResidualModel.from_dict(model.to_dict())
+    assert restored.n_reviews == 21
+    assert np.allclose(restored.correction()["taste"], model.correction()["taste"])
+
+
+def test_personalized_grid_matches_corrected_interpolators():
+    opt.load_and_build_model(n_points=11)
+    try:
+        rng = np.random.default_rng(0)
+        correction = {"tds": rng.normal(0, 0.05, (3, 3, 3)), "taste": rng.normal(0, 0.3, (3, 3, 3))}
+        grid, interpolators = opt._personalized(correction)
+        G, R, T = np.meshgrid(grid["grind"], grid["ratio"], grid["temp"], indexing="ij")
+        points = np.column_stack([G.ravel(), R.ravel(), T.ravel()])
+        for key in ("tds", "taste"):
+            np.testing.assert_allclose(grid[key].ravel(), interpolators[key](points), atol=1e-12)
+
+        # 보정이 있으면 추천 결과의 예측값도 보정된 면 기준
+        plain = opt.estimate_outcome(90, 5 / 3, 90)
+        shifted = opt.estimate_outcome(90, 5 / 3, 90, correction=correction)
+        assert abs(shifted["predicted_taste"] - (plain["predicted_taste"] + correction["taste"][1, 1, 1])) <= 0.01
+    finally:
+        opt.load_and_build_model()
+
+
+def test_review_job_persists_user_taste_model(client):
+    client.post("/usr/signup", json={"email": "taste@test.com", "username": "t", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "taste@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    recipe = client.post("/recipe/", headers=headers, json={
+        "recipe_name": "taste-base", "dose_g": 20, "water_temperature_c": 90, "grind_level": 90,
+        "pouring_steps": [{"step_number": n, "water_g": 80, "pour_time_s": 20} for n in (1, 2, 3)],
+    }).json()
+    client.post("/usr/me/brew_log", headers=headers,
+                json={"recipe_id": recipe["recipe_id"], "machine_id": "TASTE", "brew_id": "taste-brew"})
+    log_id = client.get("/usr/me/brew_log", headers=headers).json()["items"][0]["log_id"]
+    user_id = recipe["user_id"]
+
+    for taste in (2, 3):
+        res = client.post("/review/reviews", json={"brew_log_id": log_id, "taste": taste, "tds": 5, "weight": 4, "intensity": 4})
+        job_url = res.json()["status_url"]
+        deadline = time.monotonic() + 10
+        while client.get(job_url).json()["status"] in ("queued", "running"):
+            assert time.monotonic() < deadline, "review job did not finish"
+            time.sleep(0.01)
+        assert client.get(job_url).json()["status"] == "done"
+
+    with TestingSessionLocal() as db:
+        row = db.get(UserTasteModel, user_id)
+        assert row.n_reviews == 2
@@ -0,0 +1,39 @@
+def _recipe(i, source=None):
+    return {
+        "recipe_name": f"budget-{i}",
+        "dose_g": 15,
+        "water_temperature_c": 92,
+        "source": source,
+        "pouring_steps": [
+            {"step_number": n, "water_g": 50, "pour_time_s": 10} for n in range(1, 4)
+        ],
+    }
+
+
+def test_recipe_endpoints_stay_within_query_budget(client, query_budget):
+    client.post("/usr/signup", json={"email": "budget@test.com", "username": "b", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "budget@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = [
+        client.post("/recipe/", headers=headers, json=_recipe(i, "generated")).json()["recipe_id"]
+        for i in range(30)
+    ]
+    # 토큰 캐시를 채워서 인증 조회가 예산에 섞이지 않게 함
+    client.get("/recipe/recommend", headers=headers)
+
+    # 목록: count 1 + 페이지 1 (항목 수와 무관)
+    with query_budget(2):
+        body = client.get("/recipe/", params={"page_size": 30}).json()
+    assert len(body["items"]) == 30
+
+    with query_budget(2):
+        body = client.get("/recipe/generated", headers=headers, params={"page_size": 30}).json()
+    assert len(body["items"]) == 30
+
+    with query_budget(1):
+        assert len(client.get("/recipe/recommend", headers=headers, params={"limit": 30}).json()) == 30
+
+    # 상세: 레시피 1 + pouring_steps selectin 1
+    with query_budget(2):
+        detail = client.get(f"/recipe/{ids[0]}").json()
+    assert [s["step_number"] for s in detail["pouring_steps"]] == [1, 2, 3]
@@ -0,0 +1,150 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.controller import recipe_service
+from app.utils import openai_helper
+
+RECIPE_DATA = {
+    "recipe_name": "Fruity Light Roast",
+    "dose_g": 15.0,
+    "brew_ratio": 16.0,
+    "water_temperature_c": 94.0,
+    "total_water_g": 240.0,
+    "total_brew_time_s": 70.0,
+    "pouring_steps": [
+        {"step_number": 1, "water_g": 40.0, "pour_time_s": 10.0, "bloom_time_s": 30.0},
+        {"step_number": 2, "water_g": 200.0, "pour_time_s": 30.0},
+    ],
+}
+
+
+def _login(client, email):
+    client.post("/usr/signup", json={"email": email, "username": "generator", "password": "password123"})
+    token = client.post("/usr/login", json={"email": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _events(res):
+    events = []
+    for block in res.text.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_generate_streams_tokens_then_saves_recipe(client, monkeypatch):
+    extracted_from = []
+
+    async def fake_stream(description):
+        for text in ["Dose 15g, ", "pour 240g ", "at 94°C."]:
+            yield text
+
+    async def fake_extract(text):
+        extracted_from.append(text)
+        return dict(RECIPE_DATA)
+
+    monkeypatch.setattr(recipe_service, "stream_recipe_from_description", fake_stream)
+    monkeypatch.setattr(recipe_service, "extract_recipe_from_description_async", fake_extract)
+    headers = _login(client, "generate@test.com")
+
+    res = client.post("/recipe/generate", headers=headers, json={"description": "fruity, light roast"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(res)
+    assert [name for name, _ in events] == ["token", "token", "token", "extracting", "recipe"]
+    assert extracted_from == ["Dose 15g, pour 240g at 94°C."]
+
+    recipe_event = events[-1][1]
+    saved = client.get(f"/recipe/{recipe_event['recipe_id']}").json()
+    assert (saved["source"], saved["is_public"], saved["recipe_name"]) == ("generated", False, "Fruity Light Roast")
+    assert [s["water_g"] for s in saved["pouring_steps"]] == [40.0, 200.0]
+
+    generated = client.get("/recipe/generated", headers=headers).json()["items"]
+    assert [item["recipe_id"] for item in generated] == [recipe_event["recipe_id"]]
+
+
+def test_generate_reports_failures_without_saving(client, monkeypatch):
+    async def fake_stream(description):
+        yield "partial text"
+        raise Exception("upstream closed")
+
+    monkeypatch.setattr(recipe_service, "stream_recipe_from_description", fake_stream)
+    headers = _login(client, "generate-fail@test.com")
+
+    events = _events(client.post("/recipe/generate", headers=headers, json={"description": "anything"}))
+    assert events == [("token", {"type": "token", "text": "partial text"}),
+                      ("error", {"type": "error", "detail": "generation_failed"})]
+    assert client.get("/recipe/generated", headers=headers).json()["items"] == []
+    assert client.post("/recipe/generate", headers=headers, json={"description": ""}).status_code == 422
+
+
+def test_generate_rejects_empty_extraction_and_reports_save_errors(client, monkeypatch):
+    async def fake_stream(description):
+        yield "Dose 15g."
+
+    extracted = [{}, {**RECIPE_DATA, "pouring_steps": []}, dict(RECIPE_DATA)]
+
+    async def fake_extract(text):
+        return extracted.pop(0)
+
+    async def failing_save(session_factory, user_id, payloads):
+        raise Exception("database is locked")
+
+    monkeypatch.setattr(recipe_service, "stream_recipe_from_description", fake_stream)
+    monkeypatch.setattr(recipe_service, "extract_recipe_from_description_async", fake_extract)
+    headers = _login(client, "generate-empty@test.com")
+
+    # 빈 추출 결과/단계 없는 결과는 기본값으로 채워서 저장하지 않음
+    for _ in range(2):
+        events = _events(client.post("/recipe/generate", headers=headers, json={"description": "x"}))
+        assert events[-1] == ("error", {"type": "error", "detail": "parse_failed", "text": "Dose 15g."})
+
+    # 저장 실패도 스트림 안에서 error 이벤트로 전달
+    monkeypatch.setattr(recipe_service.RecipeController, "save_recipes_async", failing_save)
+    events = _events(client.post("/recipe/generate", headers=headers, json={"description": "x"}))
+    assert events[-1] == ("error", {"type": "error", "detail": "save_failed"})
+    assert client.get("/recipe/generated", headers=headers).json()["items"] == []
+
+    # 없는 원두는 스트림을 시작하기 전에 거절
+    res = client.post("/recipe/generate", headers=headers, json={"description": "x", "bean_id": 999999})
+    assert res.status_code == 404
+    assert res.json()["detail"] == "bean_not_found"
+
+
+def test_stream_helper_closes_upstream_when_consumer_stops(monkeypatch):
+    closed = []
+
+    class FakeStream:
+        def __init__(self, texts):
+            self.texts = texts
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for text in self.texts:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+        async def close(self):
+            closed.append(True)
+
+    async def create(**kwargs):
+        assert kwargs["stream"] is True
+        return FakeStream(["Hello", None, " world"])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(openai_helper, "get_async_openai_client", lambda: client)
+
+    async def run():
+        full = [text async for text in openai_helper.stream_recipe_from_description("x")]
+        stream = openai_helper.stream_recipe_from_description("x")
+        first = await stream.__anext__()
+        await stream.aclose()
+        return full, first
+
+    full, first = asyncio.run(run())
+    assert full == ["Hello", " world"]
+    assert first == "Hello"
+    assert closed == [True, True]
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.crawl_cache import CrawlCache
+from app.utils import openai_helper
+from app.utils.recipe_preparser import SECTION_CHARS, measure_corpus, preparse_html
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "recipe_pages")
+
+with open(os.path.join(CORPUS, "expected.json")) as f:
+    EXPECTED = json.load(f)
+
+
+def _read(name):
+    with open(os.path.join(CORPUS, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_corpus_hit_rate():
+    report = measure_corpus(CORPUS, settings.CRAWL_PREPARSE_MIN_CONFIDENCE)
+    assert report["total"] == len(EXPECTED)
+    assert report["hit_rate"] >= 0.6
+
+    for name, expected in EXPECTED.items():
+        page = report["pages"][name]
+        assert page["local"] == expected["local"], name
+        if not expected["local"]:
+            continue
+        recipe = page["recipe"]
+        assert page["method"] == expected["method"], name
+        assert recipe["dose_g"] == expected["dose_g"], name
+        assert recipe["total_water_g"] == expected["total_water_g"], name
+        assert recipe["water_temperature_c"] == expected["water_temperature_c"], name
+        assert [s["water_g"] for s in recipe["pouring_steps"]] == expected["steps"], name
+        assert openai_helper.validate_recipe_data(recipe) == (True, []), name
+
+
+def test_low_confidence_page_sends_only_relevant_section():
+    html = _read("blog_missing_dose.html")
+    result = preparse_html(html)
+    text = openai_helper.html_to_text(html)
+
+    assert not result.is_confident(settings.CRAWL_PREPARSE_MIN_CONFIDENCE)
+    assert len(text) > SECTION_CHARS
+    assert len(result.section) <= SECTION_CHARS
+    # 앞부분을 자르는 대신 레시피 구간을 보냄
+    assert "Pour to 250g over 20 seconds." in result.section
+    assert "Pour to 250g" not in text[:SECTION_CHARS]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(openai_helper, "extraction_cache", CrawlCache(ttl_s=60, maxsize=8))
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs["messages"][-1]["content"])
+        content = json.dumps({
+            "recipe_name": "From LLM", "dose_g": 15.0, "brew_ratio": 16.0, "total_water_g": 240.0,
+            "total_brew_time_s": 60.0, "water_temperature_c": 93.0,
+            "pouring_steps": [{"step_number": 1, "water_g": 240.0, "pour_time_s": 60.0}],
+        })
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(openai_helper, "get_async_openai_client", lambda: client)
+    return calls
+
+
+def test_confident_pages_skip_the_llm(fake_llm):
+    recipe = asyncio.run(openai_helper.extract_recipe_from_html_async(_read("jsonld_v60.html")))
+    assert fake_llm == []
+    assert recipe["recipe_name"] == "Hario V60 15g"
+    assert [s.get("technique") for s in recipe["pouring_steps"]] == [None, "spiral_out", "center"]
+
+    recipe = asyncio.run(openai_helper.extract_recipe_from_html_async(_read("blog_missing_dose.html")))
+    assert recipe["recipe_name"] == "From LLM"
+    assert len(fake_llm) == 1
+    assert "Pour to 250g over 20 seconds." in fake_llm[0]
+
+
+def test_preparse_can_be_disabled(fake_llm, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_PREPARSE_ENABLED", False)
+    asyncio.run(openai_helper.extract_recipe_from_html_async(_read("jsonld_v60.html")))
+    assert len(fake_llm) == 1
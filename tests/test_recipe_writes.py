@@ -0,0 +1,85 @@
+import warnings
+
+from sqlalchemy.exc import SADeprecationWarning
+
+from app.core.config import settings
+from app.controller.recipe_service import RecipeController
+
+
+def _recipe(i, source=None):
+    return {
+        "recipe_name": f"budget-{i}",
+        "dose_g": 15,
+        "water_temperature_c": 92,
+        "source": source,
+        "pouring_steps": [
+            {"step_number": n, "water_g": 50, "pour_time_s": 10} for n in range(1, 4)
+        ],
+    }
+
+
+def test_recipe_writes_use_bulk_step_inserts(client, query_budget):
+    client.post("/usr/signup", json={"email": "budget-write@test.com", "username": "w", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "budget-write@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/recipe/recommend", headers=headers)
+
+    # 생성: recipe INSERT 1 + pouring_steps 일괄 INSERT 1, 응답은 메모리 객체로
+    with query_budget(2):
+        created = client.post("/recipe/", headers=headers, json=_recipe("write")).json()
+    assert [s["step_number"] for s in created["pouring_steps"]] == [1, 2, 3]
+    assert all(s["pouring_step_id"] and s["recipe_id"] == created["recipe_id"] for s in created["pouring_steps"])
+
+    # 단계 교체: 조회 1 + DELETE 1 + UPDATE 1 + 일괄 INSERT 1
+    steps = [{"step_number": n, "water_g": 40, "pour_time_s": 15} for n in range(1, 6)]
+    with query_budget(4), warnings.catch_warnings():
+        warnings.simplefilter("error", SADeprecationWarning)
+        updated = client.patch(f"/recipe/{created['recipe_id']}", headers=headers,
+                               json={"recipe_name": "renamed", "pouring_steps": steps}).json()
+    assert updated["recipe_name"] == "renamed"
+    assert [s["water_g"] for s in updated["pouring_steps"]] == [40] * 5
+    assert updated["updated_at"] > created["updated_at"]
+    detail = client.get(f"/recipe/{created['recipe_id']}").json()
+    assert detail["pouring_steps"] == updated["pouring_steps"]
+
+    # 일괄 등록: pouring_steps는 150개여도 INSERT 1번
+    # (recipes는 PostgreSQL에선 insertmanyvalues로 1번, sqlite는 RETURNING 순서 보장이 없어 행마다)
+    with query_budget(50 + 1):
+        res = client.post("/recipe/batch", headers=headers, json={"recipes": [_recipe(f"batch-{i}") for i in range(50)]})
+    assert res.status_code == 201
+    body = res.json()
+    assert body["created"] == 50 and len(set(body["recipe_ids"])) == 50
+    batch_detail = client.get(f"/recipe/{body['recipe_ids'][-1]}").json()
+    assert (batch_detail["recipe_name"], len(batch_detail["pouring_steps"])) == ("budget-batch-49", 3)
+
+
+def test_recipe_batch_is_atomic(client, monkeypatch):
+    client.post("/usr/signup", json={"email": "batch-atomic@test.com", "username": "a", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "batch-atomic@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    before = client.get("/recipe/", params={"page_size": 1}).json()["total"]
+
+    # 레시피 INSERT 후 단계 INSERT에서 실패하면 전체 롤백
+    def fail_steps(*args, **kwargs):
+        raise RuntimeError("step insert failed")
+    with monkeypatch.context() as m:
+        m.setattr(RecipeController, "insert_steps", staticmethod(fail_steps))
+        res = client.post("/recipe/batch", headers=headers, json={"recipes": [_recipe("atomic-1"), _recipe("atomic-2")]})
+    assert res.status_code == 500
+    assert client.get("/recipe/", params={"page_size": 1}).json()["total"] == before
+
+
+
+def test_recipe_batch_size_is_checked_before_items(client, monkeypatch):
+    client.post("/usr/signup", json={"email": "batch-max@test.com", "username": "m", "password": "password123"})
+    token = client.post("/usr/login", json={"email": "batch-max@test.com", "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(settings, "RECIPE_BATCH_MAX", 2)
+
+    # 항목이 잘못되어 있어도 개수 초과 오류 하나만 (레시피별 검증 전에 거절)
+    res = client.post("/recipe/batch", headers=headers, json={"recipes": [{"recipe_name": i} for i in range(3)]})
+    assert res.status_code == 422
+    assert [(e["type"], e["loc"]) for e in res.json()["detail"]] == [("too_many_recipes", ["body", "recipes"])]
+
+    res = client.post("/recipe/batch", headers=headers, json={"recipes": [_recipe(i) for i in range(2)]})
+    assert res.status_code == 201
@@ -0,0 +1,79 @@
+import time
+
+from conftest import TestingSessionLocal
+from app.models.brew_log import BrewLog
+
+
+def _login(client, email):
+    client.post("/usr/signup", json={"email": email, "username": "reviewer", "password": "password123"})
+    return client.post("/usr/login", json={"email": email, "password": "password123"}).json()["access_token"]
+
+
+def _brew_log(client, headers, machine_id):
+    recipe = client.post("/recipe/", headers=headers, json={
+        "recipe_name": "review-base",
+        "dose_g": 20,
+        "water_temperature_c": 90,
+        "grind_level": 90,
+        "pouring_steps": [
+            {"step_number": 1, "water_g": 60, "pour_time_s": 20},
+            {"step_number": 2, "water_g": 125, "pour_time_s": 20},
+            {"step_number": 3, "water_g": 75, "pour_time_s": 20},
+        ],
+    }).json()
+    client.post("/usr/me/brew_log", headers=headers,
+                json={"recipe_id": recipe["recipe_id"], "machine_id": machine_id, "brew_id": "review-brew"})
+    logs = client.get("/usr/me/brew_log", headers=headers).json()["items"]
+    return logs[0]["log_id"]
+
+
+def test_review_is_accepted_and_optimized_in_background(client):
+    machine_id = "REVIEW_MACHINE"
+    token = _login(client, "review@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    log_id = _brew_log(client, headers, machine_id)
+
+    with client.websocket_connect(f"/ws/app/{machine_id}?token={token}") as app_ws:
+        res = client.post("/review/reviews", json={
+            "brew_log_id": log_id, "taste": 2, "tds": 6, "weight": 4, "intensity": 5, "notes": "sour",
+        })
+        assert res.status_code == 202
+        job_id = res.json()["job_id"]
+
+        pushed = app_ws.receive_json()
+        assert pushed["type"] == "REVIEW_RECIPE_READY"
+        assert pushed["job_id"] == job_id
+
+    job = client.get(f"/review/jobs/{job_id}").json()
+    assert job["status"] == "done"
+    assert job["new_recipe_id"] == pushed["new_recipe_id"]
+
+    child = client.get(f"/recipe/{job['new_recipe_id']}").json()
+    assert [s["step_number"] for s in child["pouring_steps"]] == [1, 2, 3]
+    with TestingSessionLocal() as db:
+        log = db.get(BrewLog, log_id)
+        assert (log.review_taste, log.review_notes) == (2, "sour")
+        assert log.child_recipe_id == job["new_recipe_id"]
+
+
+def test_review_job_failure_is_reported(client):
+    token = _login(client, "review-fail@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/usr/me/brew_log", headers=headers,
+                json={"recipe_id": 999999, "machine_id": "NO_APPS", "brew_id": "missing-recipe"})
+    log_id = client.get("/usr/me/brew_log", headers=headers).json()["items"][0]["log_id"]
+
+    res = client.post("/review/reviews", json={"brew_log_id": log_id, "taste": 4, "tds": 4, "weight": 4, "intensity": 4})
+    assert res.status_code == 202
+
+    job_url = res.json()["status_url"]
+    for _ in range(100):
+        job = client.get(job_url).json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.02)
+    assert job["status"] == "failed"
+    assert job["error"] == "recipe_not_found"
+
+    assert client.post("/review/reviews", json={"brew_log_id": 999999, "taste": 4, "tds": 4, "weight": 4, "intensity": 4}).status_code == 404
+    assert client.get("/review/jobs/unknown").status_code == 404
@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+
+# 새 프로세스에서 import app.main 시간과 최대 RSS 측정
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_s": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted(m for m in ("pandas", "scipy") if m in sys.modules),
+}))
+"""
+
+
+def test_import_app_main_startup_cost():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=root, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    print(f"\nimport app.main: {result['import_s'] * 1000:.0f} ms, max RSS {result['max_rss_mb']:.1f} MB")
+
+    # 요청 처리 경로에서는 pandas/scipy를 불러오지 않아야 함
+    assert result["heavy_modules"] == []
@@ -0,0 +1,271 @@
+import asyncio
+import json
+
+from app.core.backplane import InMemoryBackplane, InMemoryBroker, RedisBackplane
+from app.controller.ws_service import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        pass
+
+
+class FakeRedisServer:
+    """PUBLISH/(UN)SUBSCRIBE/HSET/HGET/HDEL만 지원하는 테스트용 RESP 서버"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.channels = {}
+        self.clients = set()
+        self.published = []
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.drop_clients()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def drop_clients(self):
+        """Redis 재시작처럼 모든 커넥션을 끊음"""
+        for writer in list(self.clients):
+            writer.close()
+        self.clients.clear()
+        self.channels.clear()
+
+    def subscribed(self, channel):
+        return len(self.channels.get(channel.encode(), []))
+
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        data = value if isinstance(value, bytes) else str(value).encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _handle(self, reader, writer):
+        self.clients.add(writer)
+        while True:
+            try:
+                args = await self._read_command(reader)
+            except (ConnectionError, ValueError):
+                args = None
+            if args is None:
+                for subscribers in self.channels.values():
+                    if writer in subscribers:
+                        subscribers.remove(writer)
+                break
+            command = args[0].upper()
+            if command == b"SUBSCRIBE":
+                for i, channel in enumerate(args[1:], start=1):
+                    self.channels.setdefault(channel, []).append(writer)
+                    writer.write(b"*3\r\n" + self._bulk(b"subscribe") + self._bulk(channel) + b":%d\r\n" % i)
+            elif command == b"UNSUBSCRIBE":
+                for channel in args[1:]:
+                    if writer in self.channels.get(channel, []):
+                        self.channels[channel].remove(writer)
+                    writer.write(b"*3\r\n" + self._bulk(b"unsubscribe") + self._bulk(channel) + b":0\r\n")
+            elif command == b"PUBLISH":
+                self.published.append(args[1])
+                subscribers = self.channels.get(args[1], [])
+                for sub in subscribers:
+                    sub.write(b"*3\r\n" + self._bulk(b"message") + self._bulk(args[1]) + self._bulk(args[2]))
+                writer.write(b":%d\r\n" % len(subscribers))
+            elif command == b"HSET":
+                self.hashes.setdefault(args[1], {})[args[2]] = args[3]
+                writer.write(b":1\r\n")
+            elif command == b"HGET":
+                writer.write(self._bulk(self.hashes.get(args[1], {}).get(args[2])))
+            elif command == b"HMGET":
+                values = [self.hashes.get(args[1], {}).get(field) for field in args[2:]]
+                writer.write(b"*%d\r\n" % len(values) + b"".join(self._bulk(v) for v in values))
+            elif command == b"HDEL":
+                removed = self.hashes.get(args[1], {}).pop(args[2], None)
+                writer.write(b":%d\r\n" % (removed is not None))
+            else:
+                writer.write(b"+OK\r\n")
+            try:
+                await writer.drain()
+            except ConnectionError:
+                break
+
+
+async def _cross_worker_scenario(backplane_a, backplane_b):
+    worker_a, worker_b = ConnectionManager(), ConnectionManager()
+    await worker_a.start_backplane(backplane_a)
+    await worker_b.start_backplane(backplane_b)
+
+    machine, app = FakeWebSocket(), FakeWebSocket()
+    await worker_b.connect_machine("M1", machine)
+    await worker_a.connect_app("M1", app, "viewer@test.com")
+
+    # 앱(A) -> 머신(B) 명령
+    assert await worker_a.is_machine_connected("M1")
+    assert await worker_a.machines_connected(["M1", "M9"]) == {"M1": True, "M9": False}
+    assert await worker_a.send_command_to_machine("M1", {"type": "RECIPE_DATA"}, recipe_id=7)
+    for _ in range(50):
+        if machine.sent:
+            break
+        await asyncio.sleep(0.01)
+    assert machine.sent == [{"type": "RECIPE_DATA"}]
+    assert worker_b.get_last_recipe("M1") == 7
+
+    # 머신(B) -> 앱(A) 브로드캐스트
+    await worker_b.process_machine_message("M1", {"type": "BREW_STATUS", "phase": "pouring"})
+    for _ in range(50):
+        if app.sent:
+            break
+        await asyncio.sleep(0.01)
+    assert app.sent == [{"type": "BREW_STATUS", "phase": "pouring"}]
+
+    worker_b.disconnect_machine("M1")
+    await asyncio.sleep(0.05)
+    assert not await worker_a.is_machine_connected("M1")
+    assert not await worker_a.send_command_to_machine("M1", {"type": "START_BREW"})
+
+    worker_a.disconnect_app("M1", app)
+    await worker_a.stop_backplane()
+    await worker_b.stop_backplane()
+
+
+def test_in_memory_backplane_routes_between_workers():
+    broker = InMemoryBroker()
+    asyncio.run(_cross_worker_scenario(InMemoryBackplane(broker), InMemoryBackplane(broker)))
+
+
+def test_send_to_user_reaches_only_that_users_apps():
+    async def scenario():
+        broker = InMemoryBroker()
+        worker_a, worker_b = ConnectionManager(), ConnectionManager()
+        await worker_a.start_backplane(InMemoryBackplane(broker))
+        await worker_b.start_backplane(InMemoryBackplane(broker))
+        owner_a, other_a, owner_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect_app("M1", owner_a, "owner@test.com", "u-owner")
+        await worker_a.connect_app("M1", other_a, "other@test.com", "u-other")
+        await worker_b.connect_app("M1", owner_b, "owner@test.com", "u-owner")
+
+        await worker_a.send_to_user("M1", "u-owner", {"type": "REVIEW_RECIPE_READY", "job_id": "j1"})
+        await _wait_for(lambda: owner_a.sent and owner_b.sent)
+        await asyncio.sleep(0.01)
+        # 다른 워커에 붙은 같은 사용자의 앱까지 전달, 같은 머신을 보는 다른 사용자는 받지 않음
+        assert owner_a.sent == owner_b.sent == [{"type": "REVIEW_RECIPE_READY", "job_id": "j1"}]
+        assert other_a.sent == []
+
+        for worker, ws in ((worker_a, owner_a), (worker_a, other_a), (worker_b, owner_b)):
+            worker.disconnect_app("M1", ws)
+        await worker_a.stop_backplane()
+        await worker_b.stop_backplane()
+
+    asyncio.run(scenario())
+
+
+def test_in_memory_backplane_skips_publish_to_self():
+    async def scenario():
+        worker = ConnectionManager()
+        backplane = InMemoryBackplane(InMemoryBroker())
+        published = []
+
+        async def publish(channel, message):
+            published.append(channel)
+            return 0
+
+        backplane.publish = publish
+        await worker.start_backplane(backplane)
+        app = FakeWebSocket()
+        await worker.connect_app("M1", app, "viewer@test.com")
+        await worker.broadcast_to_apps("M1", {"type": "LOADCELL_VALUE", "value": 1.0})
+        await asyncio.sleep(0.01)
+        # 로컬 앱에는 바로 전달, 구독자가 자기 자신뿐인 채널로는 발행하지 않음
+        assert app.sent == [{"type": "LOADCELL_VALUE", "value": 1.0}]
+        assert published == []
+        worker.disconnect_app("M1", app)
+        await worker.stop_backplane()
+
+    asyncio.run(scenario())
+
+
+def test_redis_backplane_routes_between_workers():
+    async def scenario():
+        server = FakeRedisServer()
+        port = await server.start()
+        url = f"redis://127.0.0.1:{port}/0"
+        try:
+            await _cross_worker_scenario(RedisBackplane(url), RedisBackplane(url))
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_redis_backplane_subscribes_per_machine_and_reconnects():
+    async def scenario():
+        server = FakeRedisServer()
+        port = await server.start()
+        url = f"redis://127.0.0.1:{port}/0"
+        worker_a, worker_b = ConnectionManager(), ConnectionManager()
+        backplane_a = RedisBackplane(url, prefix="t", reconnect_max_s=0.05)
+        await worker_a.start_backplane(backplane_a)
+        await worker_b.start_backplane(RedisBackplane(url, prefix="t", reconnect_max_s=0.05))
+        try:
+            app = FakeWebSocket()
+            await worker_a.connect_app("M1", app, "viewer@test.com")
+            await _wait_for(lambda: server.subscribed("t:apps:M1") == 1)
+            # 앱이 없는 머신의 텔레메트리는 어느 노드도 구독하지 않음
+            assert server.subscribed("t:apps:M2") == 0
+
+            await worker_b.broadcast_to_apps("M1", {"type": "LOADCELL_VALUE", "value": 1.0})
+            await worker_b.broadcast_to_apps("M2", {"type": "LOADCELL_VALUE", "value": 2.0})
+            await _wait_for(lambda: app.sent)
+            assert app.sent == [{"type": "LOADCELL_VALUE", "value": 1.0}]
+
+            # Redis가 끊겼다 돌아와도 구독/발행이 복구됨
+            server.drop_clients()
+            await _wait_for(lambda: server.subscribed("t:apps:M1") == 1)
+            for _ in range(100):
+                await worker_b.broadcast_to_apps("M1", {"type": "BREW_STATUS", "phase": "pouring"})
+                if len(app.sent) > 1:
+                    break
+                await asyncio.sleep(0.02)
+            assert app.sent[-1] == {"type": "BREW_STATUS", "phase": "pouring"}
+
+            # 마지막 앱이 떨어지면 구독 해제
+            worker_a.disconnect_app("M1", app)
+            await _wait_for(lambda: server.subscribed("t:apps:M1") == 0)
+        finally:
+            await worker_a.stop_backplane()
+            await worker_b.stop_backplane()
+            await server.stop()
+
+    asyncio.run(scenario())
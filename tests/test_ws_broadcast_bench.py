@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+
+from app.controller.ws_service import ConnectionManager
+
+# ESP32가 보내는 무게 프레임과 비슷한 크기의 메시지
+FRAME = {"type": "LOADCELL_VALUE", "machine_id": "BENCH_MACHINE", "value": 231.47, "elapsed_ms": 48210, "step": 2}
+ROUNDS = 300
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.received.append(text)
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _broadcast(subscribers: int, encode_once: bool):
+    """앱 subscribers개에 ROUNDS 프레임을 보내고 모든 소켓이 받을 때까지의 시간"""
+    manager = ConnectionManager(app_queue_size=ROUNDS + 1, app_max_lag_s=60)
+    sockets = [CountingWebSocket() for _ in range(subscribers)]
+    for i, ws in enumerate(sockets):
+        await manager.connect_app("BENCH_MACHINE", ws, f"app-{i}")
+    apps = manager.active_connections["BENCH_MACHINE"]["apps"]
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        if encode_once:
+            await manager.broadcast_to_apps("BENCH_MACHINE", FRAME)
+        else:
+            # 이전 방식: 앱마다 따로 직렬화
+            for conn in apps:
+                conn.enqueue(FRAME)
+        await asyncio.sleep(0)
+    deadline = started + 30
+    while any(len(ws.received) < ROUNDS for ws in sockets):
+        assert time.perf_counter() < deadline, "apps did not receive every frame"
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    for ws in sockets:
+        manager.disconnect_app("BENCH_MACHINE", ws)
+    return elapsed, sockets
+
+
+def test_broadcast_benchmark():
+    print()
+    print(f"{'apps':>5} {'per-app encode (us/frame)':>26} {'encode-once (us/frame)':>24}")
+    for subscribers in (1, 10, 100):
+        legacy, legacy_sockets = asyncio.run(_broadcast(subscribers, encode_once=False))
+        shared, shared_sockets = asyncio.run(_broadcast(subscribers, encode_once=True))
+        print(f"{subscribers:>5} {legacy / ROUNDS * 1e6:>26.1f} {shared / ROUNDS * 1e6:>24.1f}")
+
+        # 두 방식 모두 모든 앱이 모든 프레임을 같은 내용으로 받아야 함
+        for ws in legacy_sockets + shared_sockets:
+            assert len(ws.received) == ROUNDS
+            assert all(json.loads(text) == FRAME for text in ws.received)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from app.controller.ws_service import AppConnection, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_code = code
+
+
+def test_slow_app_does_not_delay_other_apps():
+    async def scenario():
+        manager = ConnectionManager(app_queue_size=8, app_max_lag_s=10.0)
+        slow, fast = FakeWebSocket(delay=1.0), FakeWebSocket()
+        await manager.connect_app("M1", slow, "slow@test.com")
+        await manager.connect_app("M1", fast, "fast@test.com")
+
+        for i in range(5):
+            await manager.broadcast_to_apps("M1", {"type": "LOADCELL_VALUE", "value": i})
+        await asyncio.sleep(0.05)
+
+        assert [m["value"] for m in fast.sent] == [0, 1, 2, 3, 4]
+        assert slow.sent == []
+        manager.disconnect_app("M1", slow)
+        manager.disconnect_app("M1", fast)
+
+    asyncio.run(scenario())
+
+
+def test_telemetry_is_dropped_oldest_first_but_control_frames_are_kept():
+    async def scenario():
+        ws = FakeWebSocket(delay=10.0)
+        conn = AppConnection(ws, "user", maxsize=3, max_lag_s=60.0)
+        conn.enqueue({"type": "BREW_STATUS", "phase": "pouring"})
+        for i in range(5):
+            conn.enqueue({"type": "LOADCELL_VALUE", "value": i})
+        conn.enqueue({"type": "BREW_DONE"})
+
+        frames = [json.loads(f[2]) for f in conn._frames]
+        assert frames[0]["type"] == "BREW_STATUS"
+        assert frames[-1]["type"] == "BREW_DONE"
+        # 텔레메트리는 최신 값만 남음
+        assert [f["value"] for f in frames if f["type"] == "LOADCELL_VALUE"] == [3, 4]
+        assert conn.dropped == 3
+
+    asyncio.run(scenario())
+
+
+def test_lagging_app_is_disconnected():
+    async def scenario():
+        ws = FakeWebSocket(delay=10.0)
+        conn = AppConnection(ws, "user", maxsize=8, max_lag_s=0.05)
+        conn.enqueue({"type": "BREW_STATUS"})
+        conn.enqueue({"type": "BREW_STATUS"})
+        await asyncio.sleep(0.1)
+
+        assert conn.enqueue({"type": "BREW_STATUS"}) is False
+        await asyncio.sleep(0)
+        assert conn.closed
+        assert ws.closed_code is not None
+        conn.stop()
+
+    asyncio.run(scenario())
+
+
+def test_loadcell_frames_are_coalesced_and_flushed_before_status():
+    async def scenario():
+        manager = ConnectionManager(app_queue_size=64, app_max_lag_s=10.0, loadcell_window_s=0.05)
+        app = FakeWebSocket()
+        await manager.connect_app("M2", app, "viewer@test.com")
+
+        for i in range(10):
+            await manager.process_machine_message("M2", {"type": "LOADCELL_VALUE", "value": i})
+        await manager.process_machine_message("M2", {"type": "BREW_STATUS", "phase": "done"})
+        await asyncio.sleep(0.01)
+
+        # 첫 값은 바로, 나머지는 최신 값 하나로 합쳐져서 상태 프레임 전에 전달
+        assert [(m["type"], m.get("value")) for m in app.sent] == [
+            ("LOADCELL_VALUE", 0),
+            ("LOADCELL_VALUE", 9),
+            ("BREW_STATUS", None),
+        ]
+
+        app.sent.clear()
+        for i in range(3):
+            await manager.process_machine_message("M2", {"type": "LOADCELL_VALUE", "value": i})
+        await asyncio.sleep(0.1)
+        # 창이 끝나면 마지막 값이 전송됨
+        assert [m["value"] for m in app.sent][-1] == 2
+        manager.disconnect_app("M2", app)
+
+    asyncio.run(scenario())